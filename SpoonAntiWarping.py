@@ -32,15 +32,14 @@ except ImportError:
     VERSION_QT5 = True
 
 
-import os.path 
-import math
-import numpy as np
+import os
+import re
+import weakref
 
-from typing import Optional, List
+from typing import Optional, List, TYPE_CHECKING
 from collections import OrderedDict
 
 from cura.CuraApplication import CuraApplication
-from cura.PickingPass import PickingPass
 from cura.CuraVersion import CuraVersion  # type: ignore
 from cura.Operations.SetParentOperation import SetParentOperation
 from cura.Scene.SliceableObjectDecorator import SliceableObjectDecorator
@@ -51,9 +50,12 @@ from UM.Resources import Resources
 from UM.Logger import Logger
 from UM.Message import Message
 from UM.Math.Vector import Vector
+from UM.Math.Matrix import Matrix
+from UM.Math.Quaternion import Quaternion
 from UM.Tool import Tool
 from UM.Event import Event, MouseEvent
 from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Mesh.MeshData import MeshData
 from UM.Settings.SettingInstance import SettingInstance
 from UM.Settings.SettingDefinition import SettingDefinition
 from UM.Settings.DefinitionContainer import DefinitionContainer
@@ -63,25 +65,43 @@ from UM.Operations.AddSceneNodeOperation import AddSceneNodeOperation
 from UM.Operations.RemoveSceneNodeOperation import RemoveSceneNodeOperation
 from UM.Scene.Selection import Selection
 from UM.Scene.SceneNode import SceneNode
-from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
-from UM.Tool import Tool
-from UM.Version import Version
-from UM.Resources import Resources
 from UM.i18n import i18nCatalog
 
-i18n_cura_catalog = i18nCatalog("cura")
-i18n_catalog = i18nCatalog("fdmprinter.def.json")
-i18n_extrud_catalog = i18nCatalog("fdmextruder.def.json")
+from .SpoonSceneIndex import SpoonSceneIndex
+
+# The geometry modules (NumPy) and the helpers of the tool are imported on the first activation of the tool
+if TYPE_CHECKING:
+    from .SpoonCore.Planner import PlanResult, PlanTask
+    from .SpoonCore.SpatialHash import SpatialHash
+    from .SpoonPlacementContext import SpoonPlacementContext
 
 Resources.addSearchPath(
     os.path.join(os.path.abspath(os.path.dirname(__file__)),'resources')
-)  # Plugin translation file import
+)  # Plugin translation file import, also used for the name of the tool at the registration
+
+
+class _LazyCatalog:
+    """i18nCatalog loaded on its first use."""
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._catalog = None  # type: Optional[i18nCatalog]
+
+    def __getattr__(self, attribute: str):
+        if self._catalog is None:
+            self._catalog = i18nCatalog(self._name)
+            if self._name == "spoonantiwarping" and self._catalog.hasTranslationLoaded():
+                Logger.log("i", "Spoon Anti-Warping Plugin translation loaded!")
+        return getattr(self._catalog, attribute)
+
+
+i18n_catalog = _LazyCatalog("fdmprinter.def.json")
+catalog = _LazyCatalog("spoonantiwarping")
+
+# Name of the tab nodes : SpoonTab_<number>, SpoonTabs_<number> for the merged nodes. The names contain the marker
+# "SpoonTab" of the SpoonOrder script, and the number tells the tabs apart in the G-code.
+TAB_NAME = re.compile(r"^SpoonTabs?_(\d+)$")
 
-catalog = i18nCatalog("spoonantiwarping")
 
-if catalog.hasTranslationLoaded():
-    Logger.log("i", "Spoon Anti-Warping Plugin translation loaded!")
-   
 class SpoonAntiWarping(Tool):
     def __init__(self):
         super().__init__()
@@ -89,15 +109,22 @@ class SpoonAntiWarping(Tool):
         # Stock Data  
         self._all_picked_node = []
         
+        # Unrotated spoon MeshData shared by the tabs with the same shape parameters (LRU order)
+        self._spoon_templates = OrderedDict()
+        self._spoon_templates_size = 32
+        
         # variable for menu dialog        
         self._UseSize = 10.0
         self._UseLength = 2.0
         self._UseWidth = 2.0
         self._InitialLayerSpeed = 0.0
+        self._ChordTolerance = 0.0
         self._Nb_Layer = 1
         self._Mesg = False # To avoid message 
         self._direct_shape = False
-        self._SMsg = catalog.i18nc("@label", "Remove All") 
+        self._merge_tabs = False
+        # Translated on the first activation
+        self._SMsg = "Remove All"
 
         # Shortcut
         if not VERSION_QT5:
@@ -106,7 +133,6 @@ class SpoonAntiWarping(Tool):
             self._shortcut_key = Qt.Key_K
             
         self._controller = self.getController()
-
         self._selection_pass = None
         
         self._application = CuraApplication.getInstance()
@@ -134,8 +160,76 @@ class SpoonAntiWarping(Tool):
             except:
                 pass
         
-        self.setExposedProperties("SSize", "SLength", "SWidth", "NLayer", "ISpeed", "DirectShape", "SMsg" )
+        self.setExposedProperties("SSize", "SLength", "SWidth", "NLayer", "ISpeed", "STolerance", "DirectShape", "MergeTabs", "SMsg", "SProfile" )
+        
+        # Automatic placement running in the background
+        self._auto_job = None
+        self._auto_message = None
+        self._auto_nodes = []
+        self._auto_operations = []
+        self._auto_context = None
+        self._auto_template = None
+        # Grid of the collision test shared with the job, None without avoidance
+        self._auto_tab_hash = None  # type: Optional[SpatialHash]
+        self._auto_total = 0
+        self._auto_done = 0
+        self._auto_tabs = 0
+        self._auto_skipped = 0
+
+        # Define a new settings "spoon_mesh""
+        self._settings_dict = OrderedDict()
+        self._settings_dict["spoon_mesh"] = {
+            "label": "Spoon mesh",
+            "description": "Mesh used as spoon identification element (Special parameter added for the plugin Spoon Anti-Warping!)",
+            "type": "bool",
+            "default_value": False,
+            "enabled": True,
+            "settable_per_mesh": True,
+            "settable_per_extruder": False,
+            "settable_per_meshgroup": False,
+            "settable_globally": False
+        }
+        # Only the injection of the setting definition is needed before the first activation of the tool
+        ContainerRegistry.getInstance().containerLoadComplete.connect(self._onContainerLoadComplete)
+        self._initialized = False
+        # Summary of the last profiled creation shown in the panel
+        self._profile_text = ""
+        # Last number used in the tab names, read from the scene when None
+        self._tab_number = None  # type: Optional[int]
+        # Logger.log('d', "Info CuraVersion --> " + str(CuraVersion))
+
+    def _initialize(self) -> None:
+        """Geometry modules, catalogs, signals and preferences, loaded on the first activation of the tool."""
+        if self._initialized:
+            return
+        self._initialized = True
+        
+        from .SpoonCore.Profiler import Profiler
+        from .SpoonHullCache import SpoonHullCache
+        from .SpoonNotificationBatch import SpoonNotificationBatch
+        from .SpoonParentTracker import SpoonParentTracker
+        
+        self._SMsg = catalog.i18nc("@label", "Remove All") 
+        
+        # Role of the scene nodes and tabs by parent, maintained from sceneChanged
+        self._scene_index = SpoonSceneIndex(self._controller.getScene())
+        
+        # Convex hull and adhesion area of the parents, kept while the parent is not moved
+        self._hull_cache = SpoonHullCache()
+        
+        # Timings of the phases of the tab creation, enabled by the preference profiling
+        self._profiler = Profiler()
+        self._profile_lookups = 0
+        
+        # One scene / property notification for a group of tabs
+        self._notifications = SpoonNotificationBatch(self._controller.getScene(), self.propertyChanged, self._profiler)
         
+        # Ray cast acceleration structure of the meshes for the manual placement
+        self._bvh_cache = weakref.WeakKeyDictionary()
+        
+        # Tabs placed again when their parent is rotated or scaled
+        self._parent_tracker = SpoonParentTracker(self._controller.getScene(), self._scene_index, self._onParentsTransformed)
+
         CuraApplication.getInstance().globalContainerStackChanged.connect(self._updateEnabled)
          
         # Note: if the selection is cleared with this tool active, there is no way to switch to
@@ -143,7 +237,7 @@ class SpoonAntiWarping(Tool):
         # toolbar will have been disabled. That is why we need to ignore the first press event
         # after the selection has been cleared.
         Selection.selectionChanged.connect(self._onSelectionChanged)
-        self._had_selection = False
+        self._had_selection = Selection.hasSelection()
         self._skip_press = False
 
         self._had_selection_timer = QTimer()
@@ -167,6 +261,10 @@ class SpoonAntiWarping(Tool):
 
         self._preferences.addPreference("spoon_anti_warping/s_initial_layer_speed", 0)
         self._InitialLayerSpeed = float(self._preferences.getValue("spoon_anti_warping/s_initial_layer_speed"))
+
+        # Maximum chord error of the round part, 0 = a tenth of the nozzle size
+        self._preferences.addPreference("spoon_anti_warping/s_chord_tolerance", 0)
+        self._ChordTolerance = float(self._preferences.getValue("spoon_anti_warping/s_chord_tolerance"))
         
         self._preferences.addPreference("spoon_anti_warping/nb_layer", 1)
         # convert as float to avoid further issue
@@ -176,30 +274,53 @@ class SpoonAntiWarping(Tool):
         # convert as bool to avoid further issue
         self._direct_shape = bool(self._preferences.getValue("spoon_anti_warping/direct_shape")) 
 
-        # Define a new settings "spoon_mesh""
-        self._settings_dict = OrderedDict()
-        self._settings_dict["spoon_mesh"] = {
-            "label": "Spoon mesh",
-            "description": "Mesh used as spoon identification element (Special parameter added for the plugin Spoon Anti-Warping!)",
-            "type": "bool",
-            "default_value": False,
-            "enabled": True,
-            "settable_per_mesh": True,
-            "settable_per_extruder": False,
-            "settable_per_meshgroup": False,
-            "settable_globally": False
-        }
-        ContainerRegistry.getInstance().containerLoadComplete.connect(self._onContainerLoadComplete)
+        self._preferences.addPreference("spoon_anti_warping/merge_tabs", False)
+        # convert as bool to avoid further issue
+        self._merge_tabs = bool(self._preferences.getValue("spoon_anti_warping/merge_tabs")) 
+
+        # Indexed watertight mesh (shared vertices) or former triangle soup
+        self._preferences.addPreference("spoon_anti_warping/indexed_mesh", True)
+        self._indexed_mesh = bool(self._preferences.getValue("spoon_anti_warping/indexed_mesh"))
+
+        # Tabs placed on the first layer footprint (with the concave corners) or on the former convex hull
+        self._preferences.addPreference("spoon_anti_warping/footprint", True)
+        self._use_footprint = bool(self._preferences.getValue("spoon_anti_warping/footprint"))
+
+        # Manual placement with a ray cast on the mesh instead of a render of the picking pass
+        self._preferences.addPreference("spoon_anti_warping/cpu_picking", True)
+        self._cpu_picking = bool(self._preferences.getValue("spoon_anti_warping/cpu_picking"))
+
+        # Follow the rotation and the scale of the parents
+        self._preferences.addPreference("spoon_anti_warping/follow_parent", True)
+        self._parent_tracker.setEnabled(bool(self._preferences.getValue("spoon_anti_warping/follow_parent")))
+
+        # Automatic placement avoiding the neighbouring parts and their tabs
+        self._preferences.addPreference("spoon_anti_warping/avoid_collisions", True)
+        self._avoid_collisions = bool(self._preferences.getValue("spoon_anti_warping/avoid_collisions"))
+
+        # Number of threads used to plan the automatic placement, 0 = number of processors
+        self._preferences.addPreference("spoon_anti_warping/planner_workers", 0)
+        self._planner_workers = int(self._preferences.getValue("spoon_anti_warping/planner_workers"))
+
+        # Timings and counters of the tab creation in the log and in the panel, JSON file of the last runs if a path is given
+        self._preferences.addPreference("spoon_anti_warping/profiling", False)
+        self._profiler.setEnabled(bool(self._preferences.getValue("spoon_anti_warping/profiling")))
+        self._preferences.addPreference("spoon_anti_warping/profiling_export", "")
+        
         self._application.fileCompleted.connect(self._onFileCompleted)
-        # Logger.log('d', "Info CuraVersion --> " + str(CuraVersion))
+        self._updateEnabled()
 
     def _onFileCompleted(self) -> None:
         # Reset Stock Data  
         self._all_picked_node = []
+        # The tabs of the loaded project keep their names
+        self._tab_number = None
         self._SMsg = catalog.i18nc("@label", "Remove All") 
             
     def event(self, event):
         super().event(event)
+        # The first event received is the activation of the tool
+        self._initialize()
         modifiers = QApplication.keyboardModifiers()
         if not VERSION_QT5:
             ctrl_is_active = modifiers & Qt.KeyboardModifier.ControlModifier
@@ -211,6 +332,10 @@ class SpoonAntiWarping(Tool):
                 self._controller.setActiveTool("RotateTool")
                 return
 
+            if self._auto_job is not None:
+                # No manual modification while the automatic placement is running
+                return
+
             if self._skip_press:
                 # The selection was previously cleared, do not add/remove an support mesh but
                 # use this click for selection and reactivating this tool only.
@@ -238,22 +363,63 @@ class SpoonAntiWarping(Tool):
                     # Try to add also to support but as support got a X/Y distance/ part it's useless
                     return
 
-            # Create a pass for picking a world-space location from the mouse location
-            active_camera = self._controller.getScene().getActiveCamera()
-            picking_pass = PickingPass(active_camera.getViewportWidth(), active_camera.getViewportHeight())
-            picking_pass.render()
-
-            picked_position = picking_pass.getPickedPosition(event.x, event.y)
+            self._startProfile("click")
+            # Ray cast on the mesh of the picked node, the picking pass is only used if the ray doesn't hit the mesh
+            picked_position = None
+            if self._cpu_picking:
+                with self._profiler.span("ray_cast"):
+                    picked_position = self._castRay(picked_node, event.x, event.y)
+            if picked_position is None:
+                # Create a pass for picking a world-space location from the mouse location
+                from cura.PickingPass import PickingPass
+                with self._profiler.span("picking_pass"):
+                    active_camera = self._controller.getScene().getActiveCamera()
+                    picking_pass = PickingPass(active_camera.getViewportWidth(), active_camera.getViewportHeight())
+                    picking_pass.render()
+
+                    picked_position = picking_pass.getPickedPosition(event.x, event.y)
 
             # Logger.log('d', "X : {}".format(picked_position.x))
             # Logger.log('d', "Y : {}".format(picked_position.y))
             # Logger.log('d', "Name : {}".format(node_stack.getName()))
                             
             # Add the spoon_mesh at the picked location
-            self._op = GroupedOperation()
-            self._createSpoonMesh(picked_node, picked_position)
-            self._op.push() 
+            with self._notifications:
+                self._op = GroupedOperation()
+                self._createSpoonMesh(picked_node, picked_position)
+                with self._profiler.span("operation_push"):
+                    self._op.push() 
+            self._finishProfile()
            
+    def _castRay(self, node: CuraSceneNode, x: float, y: float) -> Optional[Vector]:
+        """World position of the first intersection of the mouse ray with the mesh of the node.
+
+        param x, y: Mouse position in the normalized coordinates of the event.
+        """
+        import numpy as np
+        from .SpoonCore.Raycast import TriangleBVH
+        
+        mesh_data = node.getMeshData()
+        if mesh_data is None or mesh_data.getVertices() is None:
+            return None
+            
+        # The BVH is built in the mesh coordinates, so it stays valid when the node is moved
+        bvh = self._bvh_cache.get(mesh_data)
+        if bvh is None:
+            bvh = TriangleBVH(mesh_data.getVertices(), mesh_data.getIndices() if mesh_data.hasIndices() else None)
+            self._bvh_cache[mesh_data] = bvh
+            
+        ray = self._controller.getScene().getActiveCamera().getRay(x, y)
+        inverse = np.linalg.inv(node.getWorldTransformation().getData())
+        origin = inverse @ np.array([ray.origin.x, ray.origin.y, ray.origin.z, 1.0])
+        direction = inverse[:3, :3] @ np.array([ray.direction.x, ray.direction.y, ray.direction.z])
+        
+        # Same parameter along the ray in the local and in the world coordinates
+        t = bvh.intersect(origin[:3], direction)
+        if t is None:
+            return None
+        return ray.getPointAlongRay(t)
+
     def _onContainerLoadComplete(self, container_id):
         if not ContainerRegistry.getInstance().isLoaded(container_id):
             # skip containers that could not be loaded, or subsequent findContainers() will cause an infinite loop
@@ -288,120 +454,186 @@ class SpoonAntiWarping(Tool):
                 container._definition_cache[setting_key] = definition
                 container._updateRelations(definition)
         
-    def _createSpoonMesh(self, parent: CuraSceneNode, position: Vector):
-        node = CuraSceneNode()
-        EName = parent.getName()
-        
-        # local_transformation = parent.getLocalTransformation()
-        # Logger.log('d', "Parent local_transformation --> " + str(local_transformation))
-        
-        node.setName("SpoonTab")           
-        node.setSelectable(True)
-        
-        # long=Support Height
-        _long=position.y
+    def _createPlacementContext(self) -> "SpoonPlacementContext":
+        """Read the stacks once for all the tabs created by a click or an automatic run."""
+        from .SpoonPlacementContext import SpoonPlacementContext
+        context = SpoonPlacementContext(self._UseSize, self._Nb_Layer, self._ChordTolerance)
+        self._profiler.count("stack_lookups", context.stack_lookups)
 
-        # get layer_height_0 used to define pastille height
-        _id_ex=0
-        
-        # This function can be triggered in the middle of a machine change, so do not proceed if the machine change has not done yet.
-        global_container_stack = CuraApplication.getInstance().getGlobalContainerStack()
-        #extruder = global_container_stack.extruderList[int(_id_ex)] 
-        extruder_stack = CuraApplication.getInstance().getExtruderManager().getActiveExtruderStacks()[0]     
-        #self._Extruder_count=global_container_stack.getProperty("machine_extruder_count", "value") 
-        
-        _layer_h_i = extruder_stack.getProperty("layer_height_0", "value")
-        _layer_height = extruder_stack.getProperty("layer_height", "value")
-        _layer_h = (_layer_h_i * 1.2) + (_layer_height * (self._Nb_Layer -1) )
-
-        key = "adhesion_type"
-        adhesion=global_container_stack.getProperty(key, "value") 
-           
-        if adhesion ==  'none' :
+        if context.needAdhesionFix() :
             if not self._Mesg :
+                key = "adhesion_type"
                 definition_key=key + " label"
-                untranslated_label=extruder_stack.getProperty(key,"label")
+                untranslated_label=context.extruder_stack.getProperty(key,"label")
                 translated_label=i18n_catalog.i18nc(definition_key, untranslated_label) 
                 Format_String = catalog.i18nc("@info:label", "Info modification current profile '") + translated_label  + catalog.i18nc("@info:label", "' parameter\nNew value : ") + catalog.i18nc("@info:label", "Skirt")                
                 Message(text = Format_String, title = catalog.i18nc("@info:title", "Warning ! Spoon Anti-Warping")).show()
                 self._Mesg = True
-            # Define temporary adhesion_type=skirt to force boundary calculation ?
-            global_container_stack.setProperty(key, "value", 'skirt')
-            Logger.log('d', "Info adhesion_type --> " + str(adhesion)) 
-
-        _angle = self._defineAngle(EName,position)
+            context.fixAdhesion()
+        return context
+        
+    def _createSpoonMesh(self, parent: CuraSceneNode, position: Vector, context: Optional["SpoonPlacementContext"] = None):
+        if context is None:
+            context = self._createPlacementContext()
+            
+        # local_transformation = parent.getLocalTransformation()
+        # Logger.log('d', "Parent local_transformation --> " + str(local_transformation))
+        
+        with self._profiler.span("define_angle", id(parent), parent.getName()):
+            _angle = self._defineAngle(parent, position, context)
         # Logger.log('d', "Info createSpoonMesh Angle --> " + str(_angle))
                 
-        # Spoon creation Diameter , Length, Width, Increment angle 10°, length, layer_height_0*1.2
-        mesh = self._createSpoon(self._UseSize,self._UseLength,self._UseWidth, 10,_long,_layer_h , self._direct_shape, _angle)
+        # Spoon creation Diameter , Length, Width, Increment angle, layer_height_0*1.2
+        # The mesh is shared between the tabs, the angle is applied as the orientation of the node
+        mesh_data = self._getSpoonTemplate(context.segment_angle, context.spoon_height)
         
-        # new_transformation = Matrix()
-        node.setMeshData(mesh.build())
+        # The template starts on the build plate : the picked height is not used for the node
+        self._addSpoonNode(parent, self._newTabName("SpoonTab"), mesh_data, Vector(position.x, 0, position.z), _angle, context)
 
-        active_build_plate = CuraApplication.getInstance().getMultiBuildPlateModel().activeBuildPlate
-        node.addDecorator(BuildPlateDecorator(active_build_plate))
+    def _createMergedSpoonMesh(self, parent: CuraSceneNode, result: "PlanResult", context: "SpoonPlacementContext"):
+        """All the tabs of one parent as a single mesh node, which replaces the previous merged node of this parent."""
+        if result.vertices is None:
+            return
+            
+        with self._profiler.span("create_spoon"):
+            mesh = MeshBuilder()
+            mesh.setVertices(result.vertices)
+            mesh.setIndices(result.indices)
+            mesh.calculateNormals()
+            mesh_data = mesh.build()
+        self._profiler.count("tabs", len(result.placements))
+        self._profiler.count("mesh_bytes", self._meshBytes(mesh_data))
+        
+        # Regenerate as a unit, with the name of the previous merged node
+        name = None
+        for child in parent.getChildren():
+            if self._isMergedSpoon(child):
+                name = child.getName()
+                self._op.addOperation(RemoveSceneNodeOperation(child))
+                if child in self._all_picked_node:
+                    self._all_picked_node.remove(child)
+                    
+        self._addSpoonNode(parent, name or self._newTabName("SpoonTabs"), mesh_data, Vector(result.origin[0], 0, result.origin[1]), 0, context)
+
+    def _isMergedSpoon(self, node: SceneNode) -> bool:
+        return node.getName().startswith("SpoonTabs") and self._scene_index.getRole(node) == SpoonSceneIndex.ROLE_SPOON
+
+    def _newTabName(self, base: str) -> str:
+        """Unique name of a new tab node, kept for the life of the node.
+
+        param base: SpoonTab or SpoonTabs for a merged node.
+        """
+        if self._tab_number is None:
+            numbers = [TAB_NAME.match(tab.getName()) for tab in self._scene_index.getAllTabs()]
+            self._tab_number = max([int(match.group(1)) for match in numbers if match] + [0])
+        self._tab_number += 1
+        return "{}_{}".format(base, self._tab_number)
+        
+    def _addSpoonNode(self, parent: CuraSceneNode, name: str, mesh_data: MeshData, position: Vector, angle: float, context: "SpoonPlacementContext"):
+        node = CuraSceneNode()
+        
+        node.setName(name)           
+        node.setSelectable(True)
+        
+        node.setMeshData(mesh_data)
+
+        node.addDecorator(BuildPlateDecorator(context.active_build_plate))
         node.addDecorator(SliceableObjectDecorator())
 
-        stack = node.callDecoration("getStack") # created by SettingOverrideDecorator that is automatically added to CuraSceneNode
-        settings = stack.getTop()
+        # Settings of the tab : getStack and one getSettingDefinition per setting
+        lookups = 4 if self._InitialLayerSpeed > 0 else 3
+        with self._profiler.span("setting_instances"):
+            stack = node.callDecoration("getStack") # created by SettingOverrideDecorator that is automatically added to CuraSceneNode
+            settings = stack.getTop()
 
-        definition = stack.getSettingDefinition("meshfix_union_all")
-        new_instance = SettingInstance(definition, settings)
-        new_instance.setProperty("value", False)
-        new_instance.resetState()  # Ensure that the state is not seen as a user state.
-        settings.addInstance(new_instance)
+            definition = stack.getSettingDefinition("meshfix_union_all")
+            new_instance = SettingInstance(definition, settings)
+            new_instance.setProperty("value", False)
+            new_instance.resetState()  # Ensure that the state is not seen as a user state.
+            settings.addInstance(new_instance)
+        
+            # speed_layer_0
+            if self._InitialLayerSpeed > 0 :
+                definition = stack.getSettingDefinition("speed_layer_0")
+                new_instance = SettingInstance(definition, settings)
+                new_instance.setProperty("value", self._InitialLayerSpeed) # initial layer speed
+                new_instance.resetState()  # Ensure that the state is not seen as a user state.
+                settings.addInstance(new_instance)   
         
-        # speed_layer_0
-        if self._InitialLayerSpeed > 0 :
-            definition = stack.getSettingDefinition("speed_layer_0")
+            definition = stack.getSettingDefinition("infill_mesh_order")
             new_instance = SettingInstance(definition, settings)
-            new_instance.setProperty("value", self._InitialLayerSpeed) # initial layer speed
+            new_instance.setProperty("value", 49) #50 "maximum_value_warning": "50"
             new_instance.resetState()  # Ensure that the state is not seen as a user state.
-            settings.addInstance(new_instance)   
-        
-        definition = stack.getSettingDefinition("infill_mesh_order")
-        new_instance = SettingInstance(definition, settings)
-        new_instance.setProperty("value", 49) #50 "maximum_value_warning": "50"
-        new_instance.resetState()  # Ensure that the state is not seen as a user state.
-        settings.addInstance(new_instance)        
-
-        definition = stack.getSettingDefinition("spoon_mesh")
-        new_instance = SettingInstance(definition, settings)
-        new_instance.setProperty("value", True)
-        new_instance.resetState()  # Ensure that the state is not seen as a user state.
-        settings.addInstance(new_instance)
-        
-        # Fix some settings in Cura to get a better result
-        id_ex=0
-        global_container_stack = CuraApplication.getInstance().getGlobalContainerStack()
-        extruder_stack = CuraApplication.getInstance().getExtruderManager().getActiveExtruderStacks()[0]
-        #extruder = global_container_stack.extruderList[int(id_ex)]    
-                
+            settings.addInstance(new_instance)        
+
+            definition = stack.getSettingDefinition("spoon_mesh")
+            new_instance = SettingInstance(definition, settings)
+            new_instance.setProperty("value", True)
+            new_instance.resetState()  # Ensure that the state is not seen as a user state.
+            settings.addInstance(new_instance)
+        self._profiler.count("stack_lookups", lookups + 1)
+        
         #self._op = GroupedOperation()
         # First add node to the scene at the correct position/scale, before parenting, so the Spoon mesh does not get scaled with the parent
         self._op.addOperation(AddSceneNodeOperation(node, self._controller.getScene().getRoot())) # This one will set the model with the right transformation
         self._op.addOperation(SetParentOperation(node, parent)) # This one will link the tab with the parent ( Scale)
         
         node.setPosition(position, CuraSceneNode.TransformSpace.World)  # Set the World Transformmation
+        node.setOrientation(Quaternion.fromAngleAxis(-angle, Vector.Unit_Y), CuraSceneNode.TransformSpace.World)
+        
+        if not name.startswith("SpoonTabs"):
+            self._profiler.count("tabs")
+        self._profiler.count("nodes")
+        self._profiler.count("vertices", mesh_data.getVertexCount())
         
         self._all_picked_node.append(node)
         self._SMsg = catalog.i18nc("@label", "Remove Last") 
-        self.propertyChanged.emit()
-        
-        CuraApplication.getInstance().getController().getScene().sceneChanged.emit(node)
+        self._notifications.propertyChanged()
+        self._notifications.sceneChanged(node)
+
+    def _getSpoonTemplate(self, nb: float, He: float) -> MeshData:
+        """Unrotated spoon mesh for the current shape parameters.
+
+        param nb: Increment angle in degree.
+        param He: Height of the spoon.
+        """
+        key = (self._UseSize, self._UseLength, self._UseWidth, nb, He, self._direct_shape, self._indexed_mesh)
+        mesh_data = self._spoon_templates.get(key)
+        if mesh_data is not None:
+            self._spoon_templates.move_to_end(key)
+            return mesh_data
+
+        with self._profiler.span("create_spoon"):
+            mesh_data = self._createSpoon(self._UseSize, self._UseLength, self._UseWidth, nb, 0, He, self._direct_shape, 0).build()
+        self._profiler.count("mesh_bytes", self._meshBytes(mesh_data))
+        self._spoon_templates[key] = mesh_data
+        if len(self._spoon_templates) > self._spoon_templates_size:
+            self._spoon_templates.popitem(last = False)
+        return mesh_data
 
     def _removeSpoonMesh(self, node: CuraSceneNode):
-        parent = node.getParent()
-        if parent == self._controller.getScene().getRoot():
-            parent = None
+        self._removeSpoonMeshes([node])
 
-        op = RemoveSceneNodeOperation(node)
+    def _removeSpoonMeshes(self, nodes: List[CuraSceneNode]) -> None:
+        """Remove tabs with one undoable operation, the selection and the scene are updated once."""
+        if not nodes:
+            return
+            
+        root = self._controller.getScene().getRoot()
+        parents = OrderedDict()
+        op = GroupedOperation()
+        for node in nodes:
+            parent = node.getParent()
+            if parent is not None and parent is not root:
+                parents[parent] = True
+            op.addOperation(RemoveSceneNodeOperation(node))
         op.push()
 
-        if parent and not Selection.isSelected(parent):
-            Selection.add(parent)
+        for parent in parents:
+            if not Selection.isSelected(parent):
+                Selection.add(parent)
 
-        CuraApplication.getInstance().getController().getScene().sceneChanged.emit(node)
+        self._notifications.sceneChanged(root)
 
     def _updateEnabled(self):
         plugin_enabled = False
@@ -429,198 +661,37 @@ class SpoonAntiWarping(Tool):
 
         self._had_selection = has_selection
 
-    def _tangential_point_on_circle(self,center, radius, point_fixe):
-        # Calculation of the distance between point_fix and (center[0], center[1])
-        d = math.sqrt((center[0] - point_fixe[0])**2 + (center[1] - point_fixe[1])**2)
-
-        # Search for the points of tangency of the line with the circle
-        tangency_points = []
-
-        # If point_fix is on the circle, there is only one point of tangency
-        if d == radius:
-            tangency_points.append(point_fixe[0])
-            tangency_points.append(point_fixe[1])
-           
-        else:
-            p = math.sqrt( d**2-radius**2)
-            # Calculation of the angle between the line and the radius of the circle passing through the point of tangency
-            theta = math.asin(radius / d)
-            # Calculation of the angle of the line
-            alpha = math.atan2(center[1] - point_fixe[1] , center[0] - point_fixe[0] )
-            # Calculation of the angles of the two rays passing through the points of tangency
-            beta1 = alpha + theta
-            beta2 = alpha - theta
-            # Calculation of the coordinates of the tangency points
-            tx1 = center[0] - radius* math.sin(beta1)
-            ty1 = center[1] + radius* math.cos(beta1)
-            tangency_points.append(tx1)
-            tangency_points.append(ty1)
-        return tangency_points
-        
     # SPOON creation
     def _createSpoon(self, size , length , width , nb , lg, He ,direct_shape ,angle):   
-        mesh = MeshBuilder()
-        # Per-vertex normals require duplication of vertices
-        r = size / 2
-        # First layer length
-        sup = -lg + He
-        l = -lg        
-        
-        rng = int(360 / nb)
-        ang = math.radians(nb)
-        
-        verts = []
-        
-        # Add the handle of the spoon        
-        s_sup = width / 2
-        s_inf = s_sup
+        from .SpoonCore.Geometry import createSpoonArrays, createSpoonIndexedArrays
         
-        if direct_shape :
-            p = [-s_sup,s_sup]
-            c = [(r+length),0]
-            result = self._tangential_point_on_circle(c,r,p)
-            # Logger.log('d', "Point tangence : {}".format(result))
-
-            max_val=result[1]
-            max_l=result[0]
+        mesh = MeshBuilder()
+        if self._indexed_mesh:
+            # Shared vertices : no duplicate vertex and closed manifold edges
+            verts, indices = createSpoonIndexedArrays(size, length, width, nb, lg, He, direct_shape, angle)
         else:
-            max_val=s_sup
-            max_l=length
- 
-        nbv=20 
-        verts = [ # 5 faces with 4 corners each
-            [-s_inf, l,  s_inf], [-s_sup,  sup,  s_sup], [ max_l,  sup,  max_val], [ max_l, l,  max_val],
-            [-s_sup,  sup, -s_sup], [-s_inf, l, -s_inf], [ max_l, l, -max_val], [ max_l,  sup, -max_val],
-            [ max_l, l, -max_val], [-s_inf, l, -s_inf], [-s_inf, l,  s_inf], [ max_l, l,  max_val],
-            [-s_sup,  sup, -s_sup], [ max_l,  sup, -max_val], [ max_l,  sup,  max_val], [-s_sup,  sup,  s_sup],
-            [-s_inf, l,  s_inf], [-s_inf, l, -s_inf], [-s_sup,  sup, -s_sup], [-s_sup,  sup,  s_sup]
-        ]
-            
-        # Add Round Part of the Spoon
-        nbvr = 0
-        remain1 = 0
-        remain2 = 0
-
-        for i in range(0, rng):
-            if (r*math.cos((i+1)*ang)) >= 0 or (abs(r*math.sin((i+1)*ang)) > max_val and abs(r*math.sin(i*ang)) > max_val)  :
-                nbvr += 1
-                # Top
-                verts.append([length+r, sup, 0])
-                verts.append([length+r+r*math.cos((i+1)*ang), sup, r*math.sin((i+1)*ang)])
-                verts.append([length+r+r*math.cos(i*ang), sup, r*math.sin(i*ang)])
-                #Side 1a
-                verts.append([length+r+r*math.cos(i*ang), sup, r*math.sin(i*ang)])
-                verts.append([length+r+r*math.cos((i+1)*ang), sup, r*math.sin((i+1)*ang)])
-                verts.append([length+r+r*math.cos((i+1)*ang), l, r*math.sin((i+1)*ang)])
-                #Side 1b
-                verts.append([length+r+r*math.cos((i+1)*ang), l, r*math.sin((i+1)*ang)])
-                verts.append([length+r+r*math.cos(i*ang), l, r*math.sin(i*ang)])
-                verts.append([length+r+r*math.cos(i*ang), sup, r*math.sin(i*ang)])
-                #Bottom 
-                verts.append([length+r, l, 0])
-                verts.append([length+r+r*math.cos(i*ang), l, r*math.sin(i*ang)])
-                verts.append([length+r+r*math.cos((i+1)*ang), l, r*math.sin((i+1)*ang)])  
-            else :
-                if remain1 == 0 :
-                    remain1 = i*ang
-                    remain2 = 2*math.pi-remain1
-                    
-                    if direct_shape :
-                        lg = max_l
-                    else:
-                        lg = length
-                        
-                    nbvr += 1
-                    # Top
-                    verts.append([length+r, sup, 0])
-                    verts.append([lg, sup, max_val])
-                    verts.append([length+r+r*math.cos(remain1), sup, r*math.sin(remain1)])
-                    #Side 1a
-                    verts.append([length+r+r*math.cos(remain1), sup, r*math.sin(remain1)])
-                    verts.append([lg, sup, max_val])
-                    verts.append([lg, l, max_val])
-                    #Side 1b
-                    verts.append([lg, l, max_val])
-                    verts.append([length+r+r*math.cos(remain1), l, r*math.sin(remain1)])
-                    verts.append([length+r+r*math.cos(remain1), sup, r*math.sin(remain1)])
-                    #Bottom 
-                    verts.append([length+r, l, 0])
-                    verts.append([length+r+r*math.cos(remain1), l, r*math.sin(remain1)])
-                    verts.append([lg, l, max_val])  
-                    
-                    nbvr += 1 
-                    # Top
-                    verts.append([length+r, sup, 0])
-                    verts.append([length+r+r*math.cos(remain2), sup, r*math.sin(remain2)])
-                    verts.append([lg, sup, -max_val])
-                    #Side 1a
-                    verts.append([lg, sup, -max_val])
-                    verts.append([length+r+r*math.cos(remain2), sup, r*math.sin(remain2)])
-                    verts.append([length+r+r*math.cos(remain2), l, r*math.sin(remain2)])
-                    #Side 1b
-                    verts.append([length+r+r*math.cos(remain2), l, r*math.sin(remain2)])
-                    verts.append([lg, l, -max_val])
-                    verts.append([lg, sup, -max_val])
-                    #Bottom 
-                    verts.append([length+r, l, 0])
-                    verts.append([lg, l, -max_val])
-                    verts.append([length+r+r*math.cos(remain2), l, r*math.sin(remain2)]) 
-
-       
-        # Add link part between handle and Round Part
-        # Top center
-        verts.append([max_l, sup, max_val])
-        verts.append([length+r, sup, 0])
-        verts.append([max_l, sup, -max_val])
-        
-        # Bottom  center
-        verts.append([max_l, l, -max_val])
-        verts.append([length+r, l, 0])
-        verts.append([max_l, l, max_val])
-
-        # Rotate the mesh
-        tot = nbvr * 12 + 6 + nbv 
-        Tverts = []
-        # Logger.log('d', "Angle Rotation : {}".format(angle))
-        for i in range(0,tot) :           
-            xr = (verts[i][0] * math.cos(angle)) - (verts[i][2] * math.sin(angle)) 
-            yr = (verts[i][0] * math.sin(angle)) + (verts[i][2] * math.cos(angle))
-            zr = verts[i][1]
-            Tverts.append([xr, zr, yr])
-            
-        mesh.setVertices(np.asarray(Tverts, dtype=np.float32))
-
-        indices = []
-        for i in range(0, nbv, 4): # All 6 quads (12 triangles)
-            indices.append([i, i+2, i+1])
-            indices.append([i, i+3, i+2])
-            
-        # for every angle increment 12 Vertices
-        tot = nbvr * 12 + 6 + nbv 
-        for i in range(nbv, tot, 3): # 
-            indices.append([i, i+1, i+2])
-        mesh.setIndices(np.asarray(indices, dtype=np.int32))
+            # Per-vertex normals require duplication of vertices
+            verts, indices = createSpoonArrays(size, length, width, nb, lg, He, direct_shape, angle)
+        mesh.setVertices(verts)
+        mesh.setIndices(indices)
 
         mesh.calculateNormals()
         return mesh
  
     def removeAllSpoonMesh(self):
-        if self._all_picked_node:
-            for node in self._all_picked_node:
-                node_stack = node.callDecoration("getStack")
-                if node_stack.getProperty("spoon_mesh", "value"):
-                    self._removeSpoonMesh(node)
-            self._all_picked_node = []
-            self._SMsg = catalog.i18nc("@label", "Remove All") 
-            self.propertyChanged.emit()
-        else:        
-            for node in DepthFirstIterator(self._application.getController().getScene().getRoot()):
-                if node.callDecoration("isSliceable"):
-                    node_stack=node.callDecoration("getStack")           
-                    if node_stack:        
-                        if node_stack.getProperty("spoon_mesh", "value"):
-                            # Logger.log('d', "spoon_mesh : {}".format(node.getName())) 
-                            self._removeSpoonMesh(node)
+        self._initialize()
+        if self._auto_job is not None:
+            # The tabs of the running automatic placement are removed by its Cancel button
+            return
+            
+        with self._notifications:
+            if self._all_picked_node:
+                self._removeSpoonMeshes([node for node in self._all_picked_node if self._scene_index.getRole(node) == SpoonSceneIndex.ROLE_SPOON])
+                self._all_picked_node = []
+                self._SMsg = catalog.i18nc("@label", "Remove All") 
+                self._notifications.propertyChanged()
+            else:        
+                self._removeSpoonMeshes(self._scene_index.getAllTabs())
  
     # Source code from MeshTools Plugin 
     # Copyright (c) 2020 Aldo Hoeben / fieldOfView
@@ -641,226 +712,360 @@ class SpoonAntiWarping(Tool):
         return []
 
 
-    def _distance(self,p1, p2):
-        """Calculates the distance between two points."""
-        x1, y1 = p1
-        x2, y2 = p2
-        return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-
-    def _closest_point_on_segment(self, segment, point):
-        """Find the closest point between a segment and a given point."""
-        p, q = segment
-        pq_distance = self._distance(p, q)
-        if pq_distance == 0:
-            return p
-        u = ((point[0] - p[0]) * (q[0] - p[0]) + (point[1] - p[1]) * (q[1] - p[1])) / pq_distance ** 2
-        if u < 0:
-            return p
-        elif u > 1:
-            return q
-        else:
-            return (p[0] + u * (q[0] - p[0]), p[1] + u * (q[1] - p[1]))
-    
-    def _defineAngle(self, Cname : str, act_position: Vector) -> float:
-        Angle = 0
-        min_lght = 9999999.999
-        # Set on the build plate for distance
-        calc_position = Vector(act_position.x, 0, act_position.z)
-        # Logger.log('d', "Position : {}".format(calc_position))
-
-        nodes_list = self._getAllSelectedNodes()
-        if not nodes_list:
-            nodes_list = DepthFirstIterator(self._application.getController().getScene().getRoot())
-         
-        for node in nodes_list:
-            if node.callDecoration("isSliceable"):
-                # Logger.log('d', "isSliceable : {}".format(node.getName()))
-                node_stack=node.callDecoration("getStack")           
-                if node_stack:                    
-                    if node.getName()==Cname :
-                        # Logger.log('d', "Mesh : {}".format(node.getName()))
-                        
-                        hull_polygon = node.callDecoration("getAdhesionArea")
-                        # hull_polygon = node.callDecoration("getConvexHull")
-                        # hull_polygon = node.callDecoration("getConvexHullBoundary")
-                        # hull_polygon = node.callDecoration("_compute2DConvexHull")
-                                   
-                        if not hull_polygon or hull_polygon.getPoints is None:
-                            Logger.log("w", "Object {} cannot be calculated because it has no convex hull.".format(node.getName()))
-                            return 0
-                            
-                        points=hull_polygon.getPoints()
-                        # nb_pt = point[0] / point[1] must be divided by 2
-                        Id=0
-                        Start_Id=0
-                        End_Id=0
-                        for point in points:                               
-                            # Logger.log('d', "Point : {}".format(point))
-                            new_position = Vector(point[0], 0, point[1])
-                            lg=calc_position-new_position
-                            # lght = lg.length()
-                            lght = round(lg.length(),0)
-
-                            if lght<min_lght and lght>0 :
-                                min_lght=lght
-                                Start_Id=Id
-                                Select_position = new_position                                                                 
-                                    
-                            if lght==min_lght and lght>0 :
-                                if Id > End_Id+1 :
-                                    Start_Id=Id
-                                    End_Id=Id
-                                else :
-                                    End_Id=Id                                 
-                            Id+=1
-                        
-                        # Could be the case in pickpoint 
-                        # Logger.log('d', "Start_Id : {}".format(Start_Id))
-                        # Logger.log('d', "End_Id : {}".format(End_Id))
-                        # if Start_Id != End_Id :
-                        if Start_Id == End_Id :
-                            # Add First point at the end for Segment Analyse
-                            if Start_Id < len(points)-1 :
-                                p1 = points[Start_Id]
-                                p2 = points[Start_Id+1]
-                            else :
-                                p1 = points[Start_Id]
-                                p2 = points[0]
-                                
-                            segment = ((p1[0], p1[1]), (p2[0], p2[1]))
-                            # Logger.log('d', "Segment : {}".format(segment))
-                            pt = (calc_position.x, calc_position.z)
-                            # Logger.log('d', "Point : {}".format(pt))
-                            pt_r=self._closest_point_on_segment(segment,pt)
-                            # Logger.log('d', "Closest_point_on_segment : {}".format(pt_r))
-                            new_position = Vector(pt_r[0], 0, pt_r[1]) 
-                            lg=calc_position-new_position
-                            lght = round(lg.length(),0)
-                            
-                            if lght<min_lght and lght>0 :                                
-                                # Logger.log('d', "New_position : {}".format(new_position))
-                                Select_position = new_position
- 
-                            if Start_Id > 0 :
-                                p1 = points[Start_Id-1]
-                                p2 = points[Start_Id]
-                            else :
-                                p1 = points[len(points)-1]
-                                p2 = points[0]
-                                
-                            segment = ((p1[0], p1[1]), (p2[0], p2[1]))
-                            # Logger.log('d', "Segment : {}".format(segment))
-                            pt = (calc_position.x, calc_position.z)
-                            # Logger.log('d', "Point : {}".format(pt))
-                            pt_r=self._closest_point_on_segment(segment,pt)
-                            # Logger.log('d', "Closest_point_on_segment : {}".format(pt_r))
-                            new_position = Vector(pt_r[0], 0, pt_r[1]) 
-                            lg=calc_position-new_position
-                            lght = round(lg.length(),0)
-                            
-                            if lght<min_lght and lght>0 :                                
-                                # Logger.log('d', "New_position : {}".format(new_position))
-                                Select_position = new_position
-                                
-                        else : # Could be the case with automatic .. rarely in pickpoint 
-                            Id=int(Start_Id+0.5*(End_Id-Start_Id))
-                            # Logger.log('d', "Id : {}".format(Id))
-                            Select_position = Vector(points[Id][0], 0, points[Id][1])
-
-                        # Angle Ref for angle / Y Dir
-                        ref = Vector(0, 0, 1)              
-                        lg=calc_position-Select_position                            
-                        unit_vector2 = lg.normalized()
-                        LeSin = math.asin(ref.dot(unit_vector2))
-                        # LeCos = math.acos(ref.dot(unit_vector2))
-                        
-                        if unit_vector2.x>=0 :
-                            Angle = math.pi+LeSin  #angle in radian
-                        else :
-                            Angle = -LeSin
-                                    
-                        # Logger.log('d', "Pick_position   : {}".format(calc_position))
-                        # Logger.log('d', "Close_position  : {}".format(Select_position))
-                        # Logger.log('d', "Unit_vector2    : {}".format(unit_vector2))
-                        # Logger.log('d', "Angle Sinus     : {}".format(math.degrees(LeSin)))
-                        # Logger.log('d', "Angle Cosinus   : {}".format(math.degrees(LeCos)))
-                        # Logger.log('d', "Chose Angle     : {}".format(math.degrees(Angle)))
+    def _defineAngle(self, parent: CuraSceneNode, act_position: Vector, context: "SpoonPlacementContext") -> float:
+        from .SpoonCore.Polygon import nearestPolygon, outwardAngle
+        
+        if self._use_footprint :
+            # Nearest edge of the real contact polygons, with the concave corners
+            loops = self._hull_cache.getFootprint(parent, context.layer_height_0)
+            index = nearestPolygon(loops, (act_position.x, act_position.z))
+            if index >= 0:
+                return outwardAngle(loops[index], (act_position.x, act_position.z))
+        
+        hull_polygon = self._hull_cache.getAdhesionArea(parent)
+        # hull_polygon = parent.callDecoration("getConvexHull")
+        # hull_polygon = parent.callDecoration("getConvexHullBoundary")
+        # hull_polygon = parent.callDecoration("_compute2DConvexHull")
+                   
+        if not hull_polygon or len(hull_polygon.getPoints()) < 2:
+            Logger.log("w", "Object {} cannot be calculated because it has no convex hull.".format(parent.getName()))
+            return 0
+            
+        # Nearest edge of the adhesion area and its outward normal
+        Angle = outwardAngle(hull_polygon.getPoints(), (act_position.x, act_position.z))
+        # Logger.log('d', "Chose Angle     : {}".format(math.degrees(Angle)))
         return Angle
+
+    def _nearestOutlinePoint(self, parent: CuraSceneNode, act_position: Vector, context: "SpoonPlacementContext") -> Vector:
+        """Nearest point of the outline where the tabs are planned : the footprint, or the convex hull of the parent."""
+        from .SpoonCore.Polygon import nearestEdge, nearestPolygon
+        
+        point = (act_position.x, act_position.z)
+        loops = self._hull_cache.getFootprint(parent, context.layer_height_0) if self._use_footprint else None
+        if not loops:
+            hull_polygon = self._hull_cache.getConvexHull(parent)
+            if not hull_polygon or len(hull_polygon.getPoints()) < 2:
+                return act_position
+            loops = [hull_polygon.getPoints()]
+        index = 0 if len(loops) == 1 else nearestPolygon(loops, point)
+        nearest = nearestEdge(loops[index], point)[0]
+        return Vector(float(nearest[0]), 0, float(nearest[1]))
     
     # Automatic creation    
     def addAutoSpoonMesh(self) -> int:
-        nb_Tab=0
-        act_position = Vector(99999.99,99999.99,99999.99)
-        first_pt=Vector
-
+        """Start the automatic placement in a background job, return the number of objects to process."""
+        from .SpoonAutoJob import SpoonAutoJob
+        
+        self._initialize()
+        if self._auto_job is not None:
+            Logger.log('w', "Automatic placement already running")
+            return 0
+        self._startProfile("auto")
+            
+        # Only "normal" meshes can have spoon_mesh added to them (cutting meshes are also accepted)
+        parent_roles = (SpoonSceneIndex.ROLE_NORMAL, SpoonSceneIndex.ROLE_CUTTING)
         nodes_list = self._getAllSelectedNodes()
-        if not nodes_list:
-            nodes_list = DepthFirstIterator(self._application.getController().getScene().getRoot())
+        if nodes_list:
+            nodes_list = [node for node in nodes_list if self._scene_index.getRole(node) in parent_roles]
+        else:
+            nodes_list = self._scene_index.getNodes(parent_roles)
 
         if self._all_picked_node:
             self._all_picked_node = []
             self._SMsg = catalog.i18nc("@label", "Remove All") 
         
-        self._op = GroupedOperation()   
-        for node in nodes_list:
-            if node.callDecoration("isSliceable"):
-                # Logger.log('d', "isSliceable : {}".format(node.getName()))
-                node_stack=node.callDecoration("getStack")           
-                if node_stack: 
-                    type_infill_mesh = node_stack.getProperty("infill_mesh", "value")
-                    type_cutting_mesh = node_stack.getProperty("cutting_mesh", "value")
-                    type_support_mesh = node_stack.getProperty("support_mesh", "value")
-                    type_spoon_mesh = node_stack.getProperty("spoon_mesh", "value")
-                    type_anti_overhang_mesh = node_stack.getProperty("anti_overhang_mesh", "value") 
-                    
-                    if not type_infill_mesh and not type_support_mesh and not type_anti_overhang_mesh :
-                    # and Selection.isSelected(node)
-                        # Logger.log('d', "Mesh : {}".format(node.getName()))
-                        
-                        # hull_polygon = node.callDecoration("getAdhesionArea")
-                        # hull_polygon = node.callDecoration("getConvexHull")
-                        # hull_polygon = node.callDecoration("getConvexHullBoundary")
-                        hull_polygon = node.callDecoration("_compute2DConvexHull")
-                                   
-                        if not hull_polygon or hull_polygon.getPoints is None:
-                            Logger.log("w", "Object {} cannot be calculated because it has no convex hull.".format(node.getName()))
+        context = self._createPlacementContext()
+        template = self._getSpoonTemplate(context.segment_angle, context.spoon_height)
+        
+        # Planning : footprint, spacing, angles and merged meshes, in parallel and without access to the scene
+        tasks = []
+        for key, node in enumerate(nodes_list):
+            with self._profiler.span("plan_task", id(node), node.getName()):
+                task = self._createPlanTask(key, node, context, template, self._merge_tabs)
+            if task is not None:
+                tasks.append(task)
+        if not tasks:
+            self._finishProfile()
+            return 0
+        
+        self._auto_nodes = nodes_list
+        self._auto_context = context
+        self._auto_template = template
+        self._auto_operations = []
+        self._auto_total = len(tasks)
+        self._auto_done = 0
+        self._auto_tabs = 0
+        self._auto_skipped = 0
+        
+        # Other parts and tabs of the build plate, for the collision test of the new tabs
+        tab_hash = None
+        if self._avoid_collisions:
+            with self._profiler.span("tab_hash"):
+                tab_hash = self._createTabHash(nodes_list, context)
+        
+        self._auto_message = Message(text = self._autoProgressText(), title = catalog.i18nc("@info:title", "Spoon Anti-Warping"), progress = 0, dismissable = False, lifetime = 0)
+        self._auto_message.addAction("cancel", catalog.i18nc("@action:button", "Cancel"), "", "")
+        self._auto_message.actionTriggered.connect(self._onAutoMessageAction)
+        self._auto_message.show()
+        
+        workers = self._planner_workers if self._planner_workers > 0 else (os.cpu_count() or 1)
+        self._auto_tab_hash = tab_hash
+        self._auto_job = SpoonAutoJob(tasks, workers, self._onAutoResults, self._onAutoDone, tab_hash = tab_hash)
+        self._auto_job.start()
+        return len(tasks)
+
+    def _autoProgressText(self) -> str:
+        return catalog.i18nc("@info:status", "Objects : {} / {}\nTabs : {}").format(self._auto_done, self._auto_total, self._auto_tabs)
+
+    def _onAutoMessageAction(self, message: Message, action: str) -> None:
+        if action == "cancel" and self._auto_job is not None:
+            self._auto_job.cancel()
+            message.setText(catalog.i18nc("@info:status", "Cancelling..."))
+
+    def _onAutoResults(self, results: List["PlanResult"]) -> None:
+        """Add a chunk of planned tabs to the scene (main thread). The operation is executed now and pushed at the end."""
+        from .SpoonCore.Planner import planTabs
+        
+        if self._auto_job is None or self._auto_job.isCancelled():
+            return
+            
+        with self._notifications:
+            context = self._auto_context
+            self._op = GroupedOperation()   
+            for result in results:
+                node = self._auto_nodes[result.key]
+                self._auto_done += 1
+                if self._scene_index.getRole(node) is None:
+                    # The object has been removed during the planning
+                    continue
+                # Measured in the thread of the planner
+                self._profiler.add("planning", result.elapsed, id(node), node.getName())
+                
+                if result.footprint is not None:
+                    self._hull_cache.storeFootprint(node, context.layer_height_0, result.footprint)
+                    if not result.footprint:
+                        # The mesh cannot be cut, use the convex hull, also added to the grid for the next parts
+                        task = self._createHullPlanTask(result.key, node, self._auto_template, self._merge_tabs)
+                        if task is None:
                             continue
-                            
-                        points=hull_polygon.getPoints()
-                        # nb_pt = point[0] / point[1] must be divided by 2
-                        nb_pt=points.size*0.5
-                        # Logger.log('d', "Size pt : {}".format(nb_pt))
-                        
-                        for point in points:
-                            nb_Tab+=1
-                            # Logger.log('d', "Nb_Tab : {}".format(nb_Tab))
-                            if nb_Tab == 1:
-                                first_pt = Vector(point[0], 0, point[1])
-                                # Logger.log('d', "First X : {}".format(point[0]))
-                                # Logger.log('d', "First Y : {}".format(point[1]))
-                                
-                            # Logger.log('d', "X : {}".format(point[0]))
-                            # Logger.log('d', "Y : {}".format(point[1]))
-                            new_position = Vector(point[0], 0, point[1])
-                            lg=act_position-new_position
-                            lght = round(lg.length(),0)
-                            # Logger.log('d', "Length : {}".format(lght))
-                            # Add a tab if the distance between 2 tabs are more than a Tab Radius
-                            # We have to tune this parameter or algorythm in the futur
-                            if nb_Tab == nb_pt:
-                                lgfl=(first_pt-new_position).length()
-                                 
-                                # Logger.log('d', "Length First Last : {}".format(lgfl))
-                                if lght >= (self._UseSize*0.8) and lgfl >= (self._UseSize*0.8) :
-                                    self._createSpoonMesh(node, new_position)
-                                    act_position = new_position                               
-                            else:
-                                if lght >= (self._UseSize*0.8) :
-                                    self._createSpoonMesh(node, new_position)
-                                    act_position = new_position
-                                  
-        self._op.push() 
-        return nb_Tab
+                        if self._auto_tab_hash is not None:
+                            for loop in task.loops:
+                                self._auto_tab_hash.addPolygon(loop, task.key)
+                        result = planTabs(task, tab_hash = self._auto_tab_hash)
+            
+                self._auto_tabs += len(result.placements)
+                self._auto_skipped += result.skipped
+                with self._profiler.span("create_nodes", id(node), node.getName()):
+                    if self._merge_tabs :
+                        # One spoon node for all the tabs of this parent
+                        self._createMergedSpoonMesh(node, result, context)
+                    else:
+                        for x, z, angle in result.placements:
+                            self._addSpoonNode(node, self._newTabName("SpoonTab"), self._auto_template, Vector(x, 0, z), angle, context)
+        
+            with self._profiler.span("operation_redo"):
+                self._op.redo()
+            self._auto_operations.append(self._op)
+        
+        self._auto_message.setProgress(100 * self._auto_done / self._auto_total)
+        self._auto_message.setText(self._autoProgressText())
+
+    def _onAutoDone(self, cancelled: bool) -> None:
+        from .SpoonAutoJob import AppliedOperation
+        
+        with self._notifications:
+            if cancelled or self._auto_job.isCancelled():
+                # The tabs of the chunks already added are removed
+                for operation in reversed(self._auto_operations):
+                    operation.undo()
+                Logger.log('d', "Automatic placement cancelled")
+                self._all_picked_node = []
+                self._SMsg = catalog.i18nc("@label", "Remove All") 
+            elif self._auto_operations:
+                # The chunks are already in the scene, they are only put on the undo stack as one operation so that
+                # a single undo removes all the tabs
+                self._op = AppliedOperation()
+                for operation in self._auto_operations:
+                    self._op.addOperation(operation)
+                with self._profiler.span("operation_push"):
+                    self._op.push()
+            self._notifications.sceneChanged()
+            self._notifications.propertyChanged()
+        
+        stats = self._hull_cache.getStats()
+        Logger.log('d', "Hull cache : {} hits, {} misses".format(stats["hits"], stats["misses"]))
+        Logger.log('d', "Spoon notifications not emitted : {}".format(self._notifications.getSuppressedCount()))
+        if self._auto_skipped:
+            Logger.log('d', "Tabs skipped because of a collision : {}".format(self._auto_skipped))
+        
+        self._auto_message.hide()
+        self._auto_message = None
+        self._auto_job = None
+        self._auto_nodes = []
+        self._auto_operations = []
+        self._auto_context = None
+        self._auto_template = None
+        self._auto_tab_hash = None
+        self._finishProfile()
+
+    def _startProfile(self, label: str) -> None:
+        if not self._profiler.isEnabled():
+            return
+        self._profiler.start(label)
+        self._profile_lookups = self._scene_index.getStackLookups()
+
+    def _finishProfile(self) -> None:
+        """End the profiled run : summary in the log and in the panel, JSON file if the preference profiling_export is set."""
+        from .SpoonCore.Profiler import ownersText, summaryText
+        
+        if not self._profiler.isEnabled():
+            return
+        self._profiler.count("stack_lookups", self._scene_index.getStackLookups() - self._profile_lookups)
+        run = self._profiler.finish()
+        if run is None:
+            return
+            
+        Logger.log('d', "Spoon profile : " + summaryText(run, phases = 10))
+        if len(run["owners"]) > 1:
+            Logger.log('d', "Spoon profile by object :\n" + ownersText(run))
+        self._profile_text = summaryText(run)
+        self.propertyChanged.emit()
+        
+        path = self._preferences.getValue("spoon_anti_warping/profiling_export")
+        if path:
+            try:
+                self._profiler.exportJson(path)
+            except OSError:
+                Logger.logException('w', "Cannot write the Spoon profile in {}".format(path))
+
+    @staticmethod
+    def _meshBytes(mesh_data: MeshData) -> int:
+        """Bytes of the vertices, normals and indices of a mesh."""
+        arrays = (mesh_data.getVertices(), mesh_data.getNormals(), mesh_data.getIndices())
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def _createPlanTask(self, key: int, node: CuraSceneNode, context: "SpoonPlacementContext", template: MeshData, merge: bool) -> Optional["PlanTask"]:
+        """Data of a parent for the planner, read in the main thread."""
+        from .SpoonCore.Planner import PlanTask
+        
+        merge_template = (template.getVertices(), template.getIndices()) if merge else None
+        
+        if self._use_footprint :
+            # Contact polygons of the first layer, computed by the planner if they are not in the cache
+            loops = self._hull_cache.getCachedFootprint(node, context.layer_height_0)
+            if loops:
+                return PlanTask(key, self._UseSize, loops = loops, template = merge_template, length = self._UseLength)
+            mesh_data = node.getMeshData()
+            if loops is None and mesh_data is not None and mesh_data.getVertices() is not None:
+                return PlanTask(key, self._UseSize, vertices = mesh_data.getVertices(), indices = mesh_data.getIndices() if mesh_data.hasIndices() else None,
+                                transformation = node.getWorldTransformation().getData(), layer_height = context.layer_height_0, template = merge_template,
+                                length = self._UseLength)
+        
+        return self._createHullPlanTask(key, node, template, merge)
+
+    def _createHullPlanTask(self, key: int, node: CuraSceneNode, template: MeshData, merge: bool) -> Optional["PlanTask"]:
+        """Tabs on the convex hull, oriented with the adhesion area."""
+        from .SpoonCore.Planner import PlanTask
+        
+        # hull_polygon = node.callDecoration("getAdhesionArea")
+        # hull_polygon = node.callDecoration("getConvexHull")
+        # hull_polygon = node.callDecoration("getConvexHullBoundary")
+        hull_polygon = self._hull_cache.getConvexHull(node)
+        if not hull_polygon or len(hull_polygon.getPoints()) < 2:
+            Logger.log("w", "Object {} cannot be calculated because it has no convex hull.".format(node.getName()))
+            return None
+            
+        adhesion_area = self._hull_cache.getAdhesionArea(node)
+        angle_polygons = [adhesion_area.getPoints()] if adhesion_area and len(adhesion_area.getPoints()) >= 2 else None
+        merge_template = (template.getVertices(), template.getIndices()) if merge else None
+        return PlanTask(key, self._UseSize, loops = [hull_polygon.getPoints()], angle_polygons = angle_polygons, template = merge_template,
+                        length = self._UseLength)
+
+    def _createTabHash(self, nodes_list: List[SceneNode], context: "SpoonPlacementContext") -> "SpatialHash":
+        """Grid of the parts not planned and of the tabs already on the build plate."""
+        import numpy as np
+        from .SpoonCore.SpatialHash import SpatialHash
+        
+        tab_hash = SpatialHash(self._UseSize)
+        planned = set(nodes_list)
+        
+        parent_roles = (SpoonSceneIndex.ROLE_NORMAL, SpoonSceneIndex.ROLE_CUTTING)
+        for key, node in enumerate(self._scene_index.getNodes(parent_roles)):
+            if node in planned:
+                continue
+            loops = self._hull_cache.getCachedFootprint(node, context.layer_height_0) if self._use_footprint else None
+            if not loops:
+                hull_polygon = self._hull_cache.getConvexHull(node)
+                loops = [hull_polygon.getPoints()] if hull_polygon and len(hull_polygon.getPoints()) >= 3 else []
+            for loop in loops:
+                tab_hash.addPolygon(loop, ("part", key))
+        
+        # Existing tabs collide with all the new tabs. The merged nodes are replaced or have no tab position.
+        reach = self._UseLength + self._UseSize * 0.5
+        for tab in self._scene_index.getAllTabs():
+            if self._isMergedSpoon(tab):
+                continue
+            center = tab.getWorldTransformation().getData() @ np.array([reach, 0, 0, 1])
+            tab_hash.addDisc(float(center[0]), float(center[2]), self._UseSize * 0.5)
+        return tab_hash
+
+    def _onParentsTransformed(self, parents: List[SceneNode]) -> None:
+        """Place again the tabs of the parents rotated, tilted or scaled, the tabs stay flat on the build plate.
+
+        A merged node is planned again, a separate tab is moved to the nearest point of the new outline.
+        """
+        if self._auto_job is not None:
+            return
+            
+        context = self._createPlacementContext()
+        template = self._getSpoonTemplate(context.segment_angle, context.spoon_height)
+        for parent in parents:
+            for tab in self._scene_index.getTabs(parent):
+                if self._isMergedSpoon(tab):
+                    self._replaceMergedSpoon(parent, tab, context, template)
+                else:
+                    # Nearest point of the new outline from its place on the build plate, oriented to the nearest edge
+                    world_position = tab.getWorldPosition()
+                    position = self._nearestOutlinePoint(parent, Vector(world_position.x, 0, world_position.z), context)
+                    self._setSpoonWorldTransformation(tab, position, self._defineAngle(parent, position, context))
+            self._parent_tracker.acceptTransformation(parent)
+        
+    def _replaceMergedSpoon(self, parent: CuraSceneNode, node: CuraSceneNode, context: "SpoonPlacementContext", template: MeshData) -> None:
+        """Plan again all the tabs of a merged spoon node."""
+        from .SpoonCore.Planner import planTabs
+        
+        task = self._createPlanTask(0, parent, context, template, True)
+        if task is None:
+            return
+        result = planTabs(task)
+        if result.footprint is not None:
+            self._hull_cache.storeFootprint(parent, context.layer_height_0, result.footprint)
+            if not result.footprint:
+                task = self._createHullPlanTask(0, parent, template, True)
+                if task is None:
+                    return
+                result = planTabs(task)
+        if result.vertices is None:
+            return
+            
+        mesh = MeshBuilder()
+        mesh.setVertices(result.vertices)
+        mesh.setIndices(result.indices)
+        mesh.calculateNormals()
+        node.setMeshData(mesh.build())
+        self._setSpoonWorldTransformation(node, Vector(result.origin[0], 0, result.origin[1]), 0)
+        
+    def _setSpoonWorldTransformation(self, node: CuraSceneNode, position: Vector, angle: float) -> None:
+        """Place a tab in world space whatever the transformation of its parent (scale, tilt)."""
+        world = Matrix()
+        world.setByTranslation(position)
+        rotation = Matrix()
+        rotation.setByRotationAxis(-angle, Vector.Unit_Y)
+        world.multiply(rotation)
+        
+        local = node.getParent().getWorldTransformation().getInverse()
+        local.multiply(world)
+        node.setTransformation(local)
 
     def getSMsg(self) -> bool:
         """ 
@@ -874,6 +1079,12 @@ class SpoonAntiWarping(Tool):
         """
         self._SMsg = SMsg
         
+    def getSProfile(self) -> str:
+        """ 
+            return: Summary of the last profiled creation, empty when the profiling is off.
+        """ 
+        return self._profile_text if self._initialized and self._profiler.isEnabled() else ""
+        
     def getSSize(self) -> float:
         """ 
             return: global _UseSize  in mm.
@@ -962,6 +1173,27 @@ class SpoonAntiWarping(Tool):
         self._InitialLayerSpeed = s_value
         self._preferences.setValue("spoon_anti_warping/s_initial_layer_speed", s_value) 
         
+    def getSTolerance(self) -> float:
+        """ 
+            return: global _ChordTolerance  in mm.
+        """           
+        return self._ChordTolerance
+  
+    def setSTolerance(self, STolerance: str) -> None:
+        """
+        param STolerance : STolerance in mm ( 0 = a tenth of the Nozzle size ).
+        """
+ 
+        try:
+            s_value = float(STolerance)
+        except ValueError:
+            return
+
+        if s_value < 0: 
+            return         
+        self._ChordTolerance = s_value
+        self._preferences.setValue("spoon_anti_warping/s_chord_tolerance", s_value) 
+        
     def getNLayer(self) -> int:
         """ 
             return: global _Nb_Layer
@@ -994,3 +1226,11 @@ class SpoonAntiWarping(Tool):
         self._direct_shape = value
         self.propertyChanged.emit()
         self._preferences.setValue("spoon_anti_warping/direct_shape", self._direct_shape)
+
+    def getMergeTabs(self )-> bool:
+        return self._merge_tabs
+
+    def setMergeTabs(self, value: bool) -> None:
+        self._merge_tabs = value
+        self.propertyChanged.emit()
+        self._preferences.setValue("spoon_anti_warping/merge_tabs", self._merge_tabs)
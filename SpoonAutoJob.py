@@ -0,0 +1,135 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Background job of the automatic placement.
+#
+# The tasks are planned out of the main thread, the results are given by chunks to the main thread with callLater, where
+# the tabs are added to the scene. The job can be cancelled between two tasks.
+# With a SpatialHash, the footprints of all the parents are computed first, then the tabs are placed one parent after
+# the other to avoid the neighbouring parts and the tabs already placed.
+# The chunks already executed are pushed at the end as one AppliedOperation, so a single undo removes all the tabs.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+from cura.CuraApplication import CuraApplication
+
+from UM.Job import Job
+from UM.Logger import Logger
+from UM.Operations.GroupedOperation import GroupedOperation
+
+from .SpoonCore.Planner import PlanResult, PlanTask, computeFootprint, obstacleLoops, planTabs
+from .SpoonCore.SpatialHash import SpatialHash
+
+
+class AppliedOperation(GroupedOperation):
+    """Operations already executed : the first redo (done by push) does nothing, the next ones execute them again."""
+    def __init__(self) -> None:
+        super().__init__()
+        self._applied = True
+
+    def redo(self) -> None:
+        if self._applied:
+            self._applied = False
+            return
+        super().redo()
+
+
+class SpoonAutoJob(Job):
+    def __init__(self, tasks: Sequence[PlanTask], workers: int, on_results: Callable[[List[PlanResult]], None], on_done: Callable[[bool], None],
+                 chunk_tabs: int = 64, tab_hash: Optional[SpatialHash] = None) -> None:
+        """
+        param tasks: One task per parent.
+        param workers: Number of threads of the planner.
+        param on_results: Called in the main thread with the results of a chunk, in the order of the tasks.
+        param on_done: Called in the main thread after the last chunk, with True when the job has been cancelled.
+        param chunk_tabs: Number of tabs above which a chunk is sent to the main thread.
+        param tab_hash: Parts and tabs of the build plate to avoid, None to place the tabs without collision test.
+        """
+        super().__init__()
+        self._tasks = tasks
+        self._workers = workers
+        self._on_results = on_results
+        self._on_done = on_done
+        self._chunk_tabs = chunk_tabs
+        self._tab_hash = tab_hash
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        """Stop the planning after the current task, the chunks already sent are still given to on_results.
+
+        The job is not removed from the JobQueue, so on_done is always called.
+        """
+        self._cancelled = True
+
+    def isCancelled(self) -> bool:
+        return self._cancelled
+
+    def run(self) -> None:
+        application = CuraApplication.getInstance()
+        start_time = time.perf_counter()
+        if self._cancelled:
+            application.callLater(self._on_done, True)
+            return
+
+        executor = None
+        futures = []
+        if self._workers > 1 and len(self._tasks) > 1:
+            executor = ThreadPoolExecutor(max_workers = min(self._workers, len(self._tasks)))
+
+        if self._tab_hash is None:
+            if executor is not None:
+                futures = [executor.submit(planTabs, task) for task in self._tasks]
+                results = (future.result() for future in futures)
+            else:
+                results = (planTabs(task) for task in self._tasks)
+        else:
+            if executor is not None:
+                futures = [executor.submit(computeFootprint, task) for task in self._tasks]
+                footprints = (future.result() for future in futures)
+            else:
+                footprints = (computeFootprint(task) for task in self._tasks)
+            results = self._placeTabs(footprints)
+
+        chunk = []  # type: List[PlanResult]
+        nb_tabs = 0
+        failed = False
+        try:
+            for result in results:
+                if self._cancelled:
+                    break
+                chunk.append(result)
+                nb_tabs += len(result.placements)
+                if nb_tabs >= self._chunk_tabs:
+                    application.callLater(self._on_results, chunk)
+                    chunk = []
+                    nb_tabs = 0
+        except Exception:
+            # on_done must still be called : it removes the tabs of the chunks already added and releases the tool
+            Logger.logException('e', "Automatic placement of the spoon tabs failed")
+            failed = True
+        finally:
+            for future in futures:
+                future.cancel()
+            if executor is not None:
+                executor.shutdown(wait = True)
+
+        if chunk and not self._cancelled and not failed:
+            application.callLater(self._on_results, chunk)
+        Logger.log('d', "Planning of {} objects : {:.3f} s".format(len(self._tasks), time.perf_counter() - start_time))
+        application.callLater(self._on_done, self._cancelled or failed)
+
+    def _placeTabs(self, footprints: Iterable[list]) -> Iterator[PlanResult]:
+        """Results of the tasks placed one after the other with the SpatialHash, once all the footprints are known."""
+        all_loops = []
+        for task, loops in zip(self._tasks, footprints):
+            if self._cancelled:
+                return
+            all_loops.append(loops)
+            for loop in obstacleLoops(task, loops):
+                self._tab_hash.addPolygon(loop, task.key)
+        for task, loops in zip(self._tasks, all_loops):
+            yield planTabs(task, loops, self._tab_hash)
@@ -0,0 +1,428 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Headless batch : add the spoon tabs to 3MF / STL files without Cura.
+#
+#   python -m SpoonCore.Batch part1.3mf part2.stl -o output_folder [--size 10 --length 2 --width 2 ...]
+#
+# Run from the folder of the plugin. Every input file gives one 3MF file with the tabs as objects flagged spoon_mesh,
+# opened by Cura with the plugin installed. The files are processed in parallel with a process pool.
+#
+# The files are in Z up coordinates, the core modules in the coordinates of Cura (Y up, build plate in X / Z) :
+# (x, y, z) of a file is (x, z, -y) in Cura.
+# No import from Cura or Uranium in this module.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import argparse
+import os
+import re
+import struct
+import sys
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .Geometry import NOZZLE_CHORD_RATIO, createSpoonIndexedArrays, mergeSpoonArrays, segmentAngle
+from .Planner import PlanResult, PlanTask, planTabs, runPlanner
+from .Polygon import convexHull
+from .Roles import ROLE_NORMAL, ROLE_SPOON, settingsRole
+from .SpatialHash import SpatialHash
+
+CORE_NAMESPACE = "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"
+MODEL_RELATIONSHIP = "http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"
+DEFAULT_MODEL_PATH = "3D/3dmodel.model"
+
+# Length of the 3MF units in mm
+UNITS = {"micron": 0.001, "millimeter": 1.0, "centimeter": 10.0, "inch": 25.4, "foot": 304.8, "meter": 1000.0}
+
+
+class BatchParameters:
+    def __init__(self, size: float = 10.0, length: float = 2.0, width: float = 2.0, nb_layer: int = 1, layer_height_0: float = 0.2,
+                 layer_height: float = 0.2, chord_tolerance: float = 0.0, initial_layer_speed: float = 0.0, direct_shape: bool = False,
+                 merge_tabs: bool = True, footprint: bool = True, avoid_collisions: bool = True) -> None:
+        """Parameters of the tool panel, with the values of the profile read by the tool in Cura.
+
+        param chord_tolerance: Chord tolerance of the round part in mm, a tenth of a 0.4 mm nozzle when 0.
+        param initial_layer_speed: speed_layer_0 of the tabs, not set when 0.
+        param merge_tabs: All the tabs of a part as one object.
+        param footprint: Tabs on the first layer footprint, on the convex hull when False.
+        """
+        self.size = size
+        self.length = length
+        self.width = width
+        self.nb_layer = nb_layer
+        self.layer_height_0 = layer_height_0
+        self.layer_height = layer_height
+        self.chord_tolerance = chord_tolerance
+        self.initial_layer_speed = initial_layer_speed
+        self.direct_shape = direct_shape
+        self.merge_tabs = merge_tabs
+        self.footprint = footprint
+        self.avoid_collisions = avoid_collisions
+
+    def spoonHeight(self) -> float:
+        # Same height as SpoonPlacementContext
+        return (self.layer_height_0 * 1.2) + (self.layer_height * (self.nb_layer - 1))
+
+    def spoonTemplate(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Unrotated spoon, in the coordinates of Cura."""
+        tolerance = self.chord_tolerance if self.chord_tolerance > 0 else 0.4 * NOZZLE_CHORD_RATIO
+        return createSpoonIndexedArrays(self.size, self.length, self.width, segmentAngle(self.size, tolerance), 0, self.spoonHeight(), self.direct_shape, 0)
+
+    def settings(self) -> Dict[str, str]:
+        """Per object settings of a tab, as set by the tool."""
+        settings = {"spoon_mesh": "True", "meshfix_union_all": "False", "infill_mesh_order": "49"}
+        if self.initial_layer_speed > 0:
+            settings["speed_layer_0"] = str(self.initial_layer_speed)
+        return settings
+
+
+class BatchMesh:
+    def __init__(self, name: str, vertices: np.ndarray, indices: np.ndarray) -> None:
+        """
+        param vertices: Vertices (n, 3) in mm, in the coordinates of the file (Z up) after the transformation of the build item.
+        param indices: Triangles (m, 3).
+        """
+        self.name = name
+        self.vertices = vertices
+        self.indices = indices
+
+
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Reading
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+def readStl(path: str) -> List[BatchMesh]:
+    """The mesh of an ASCII or binary STL file, as one part."""
+    with open(path, "rb") as stream:
+        data = stream.read()
+
+    name = os.path.splitext(os.path.basename(path))[0]
+    count = struct.unpack_from("<I", data, 80)[0] if len(data) >= 84 else 0
+    if len(data) == 84 + count * 50:
+        records = np.frombuffer(data, dtype=np.dtype([("normal", "<f4", (3,)), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")]), count=count, offset=84)
+        soup = records["vertices"].reshape(-1, 3)
+    else:
+        values = re.findall(rb"vertex\s+(\S+)\s+(\S+)\s+(\S+)", data)
+        soup = np.array(values, dtype=np.float64).reshape(-1, 3)
+
+    vertices, inverse = np.unique(soup.astype(np.float32), axis=0, return_inverse=True)
+    return [BatchMesh(name, vertices.astype(np.float64), inverse.reshape(-1, 3).astype(np.int32))]
+
+
+def _modelPath(archive: zipfile.ZipFile) -> str:
+    try:
+        relationships = ET.fromstring(archive.read("_rels/.rels"))
+    except KeyError:
+        return DEFAULT_MODEL_PATH
+    for relationship in relationships:
+        if relationship.get("Type") == MODEL_RELATIONSHIP:
+            return relationship.get("Target", DEFAULT_MODEL_PATH).lstrip("/")
+    return DEFAULT_MODEL_PATH
+
+
+def _parseTransform(text: Optional[str]) -> np.ndarray:
+    """4x4 matrix (column vectors) of a 3MF transform (row vectors, 12 values)."""
+    matrix = np.identity(4)
+    if text:
+        values = np.array(text.split(), dtype=np.float64).reshape(4, 3)
+        matrix[:3, :3] = values[:3].T
+        matrix[:3, 3] = values[3]
+    return matrix
+
+
+def _objectSettings(element: ET.Element, tag) -> Dict[str, str]:
+    """Per object settings saved by Cura in the metadata of a 3MF object ("cura:spoon_mesh" -> "spoon_mesh")."""
+    settings = {}
+    group = element.find(tag("metadatagroup"))
+    for metadata in (group if group is not None else []):
+        name = metadata.get("name", "")
+        if name.startswith("cura:"):
+            settings[name[5:]] = metadata.text or ""
+    return settings
+
+
+def read3mf(path: str) -> Tuple[List[BatchMesh], float]:
+    """One part per build item, with its components, and the length of the unit of the file in mm.
+
+    Like the tool in the scene, only the normal objects are parts : the spoon tabs and the support, infill, anti
+    overhang and cutting meshes are skipped.
+    """
+    with zipfile.ZipFile(path) as archive:
+        root = ET.fromstring(archive.read(_modelPath(archive)))
+
+    tag = lambda name: "{{{}}}{}".format(CORE_NAMESPACE, name)
+    unit = UNITS.get(root.get("unit", "millimeter"), 1.0)
+
+    objects = {}
+    for element in root.iter(tag("object")):
+        objects[element.get("id")] = element
+
+    def collect(object_id: str, transformation: np.ndarray, vertices: list, indices: list, depth: int = 0) -> None:
+        element = objects.get(object_id)
+        if element is None or depth > 32 or settingsRole(_objectSettings(element, tag)) != ROLE_NORMAL:
+            return
+        mesh = element.find(tag("mesh"))
+        if mesh is not None:
+            points = np.array([(vertex.get("x"), vertex.get("y"), vertex.get("z")) for vertex in mesh.find(tag("vertices"))], dtype=np.float64)
+            triangles = np.array([(triangle.get("v1"), triangle.get("v2"), triangle.get("v3")) for triangle in mesh.find(tag("triangles"))], dtype=np.int64)
+            if len(points) and len(triangles):
+                offset = sum(len(block) for block in vertices)
+                vertices.append(points @ transformation[:3, :3].T + transformation[:3, 3])
+                indices.append(triangles.reshape(-1, 3) + offset)
+        components = element.find(tag("components"))
+        if components is not None:
+            for component in components:
+                collect(component.get("objectid"), transformation @ _parseTransform(component.get("transform")), vertices, indices, depth + 1)
+
+    parts = []
+    build = root.find(tag("build"))
+    for item in (build if build is not None else []):
+        vertices = []  # type: List[np.ndarray]
+        indices = []  # type: List[np.ndarray]
+        collect(item.get("objectid"), _parseTransform(item.get("transform")), vertices, indices)
+        if vertices:
+            name = objects[item.get("objectid")].get("name") or "Object {}".format(item.get("objectid"))
+            parts.append(BatchMesh(name, np.concatenate(vertices) * unit, np.concatenate(indices).astype(np.int32)))
+    return parts, unit
+
+
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Placement
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+def _toCura(vertices: np.ndarray) -> np.ndarray:
+    return np.column_stack((vertices[:, 0], vertices[:, 2], -vertices[:, 1]))
+
+
+def _fromCura(vertices: np.ndarray) -> np.ndarray:
+    return np.column_stack((vertices[:, 0], -vertices[:, 2], vertices[:, 1]))
+
+
+def placeTabs(parts: Sequence[BatchMesh], parameters: BatchParameters) -> List[BatchMesh]:
+    """Tabs of all the parts of a build plate, in the coordinates of the file.
+
+    Same placement as the automatic mode of the tool : first layer footprint (convex hull when the mesh cannot be cut),
+    spacing of 0.8 * size, outward angle, and collision avoidance between the parts of the file.
+    """
+    template = parameters.spoonTemplate()
+    cura_vertices = [_toCura(part.vertices) for part in parts]
+
+    tasks = []
+    for key, (part, vertices) in enumerate(zip(parts, cura_vertices)):
+        if parameters.footprint:
+            tasks.append(PlanTask(key, parameters.size, vertices=vertices, indices=part.indices, layer_height=parameters.layer_height_0,
+                                  template=template, length=parameters.length))
+        else:
+            tasks.append(_hullTask(key, vertices, parameters, template))
+
+    tab_hash = SpatialHash(parameters.size) if parameters.avoid_collisions else None
+    results = runPlanner(tasks, tab_hash=tab_hash)
+    for index, result in enumerate(results):
+        if result.footprint is not None and not result.footprint:
+            # The mesh cannot be cut
+            task = _hullTask(result.key, cura_vertices[result.key], parameters, template)
+            if tab_hash is not None:
+                tab_hash.addPolygon(task.loops[0], task.key)
+            results[index] = planTabs(task, tab_hash=tab_hash)
+
+    tabs = []
+    for result, part, vertices in zip(results, parts, cura_vertices):
+        base = float(vertices[:, 1].min())
+        for name, tab_vertices, tab_indices in _tabMeshes(result, part.name, template, parameters.merge_tabs):
+            tab_vertices = tab_vertices.astype(np.float64)
+            tab_vertices[:, 1] += base
+            tabs.append(BatchMesh(name, _fromCura(tab_vertices), tab_indices))
+    return tabs
+
+
+def _hullTask(key: int, vertices: np.ndarray, parameters: BatchParameters, template: Tuple[np.ndarray, np.ndarray]) -> PlanTask:
+    hull = convexHull(vertices[:, [0, 2]])
+    return PlanTask(key, parameters.size, loops=[hull], template=template, length=parameters.length)
+
+
+def _tabMeshes(result: PlanResult, name: str, template: Tuple[np.ndarray, np.ndarray], merge: bool) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+    if not len(result.placements):
+        return []
+    if merge:
+        placements = result.placements.copy()
+        placements[:, :2] -= result.origin
+        vertices, indices = mergeSpoonArrays(template[0], template[1], placements)
+        vertices = vertices.astype(np.float64)
+        vertices[:, [0, 2]] += result.origin
+        return [("SpoonTabs {}".format(name), vertices, indices)]
+    return [("SpoonTab {} {}".format(name, index + 1),) + mergeSpoonArrays(template[0], template[1], [placement])
+            for index, placement in enumerate(result.placements)]
+
+
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Writing
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def _objectXml(object_id: int, mesh: BatchMesh, unit: float, prefix: str, settings: Optional[Dict[str, str]] = None) -> str:
+    lines = ['<{0}object id="{1}" name="{2}" type="model">'.format(prefix, object_id, _escape(mesh.name))]
+    if settings:
+        lines.append("<{}metadatagroup>".format(prefix))
+        for key, value in settings.items():
+            lines.append('<{0}metadata name="cura:{1}" preserve="true" type="xs:string">{2}</{0}metadata>'.format(prefix, key, value))
+        lines.append("</{}metadatagroup>".format(prefix))
+    lines.append("<{0}mesh><{0}vertices>".format(prefix))
+    vertex = '<' + prefix + 'vertex x="%.6g" y="%.6g" z="%.6g" />'
+    lines.extend(vertex % tuple(point) for point in (mesh.vertices / unit).tolist())
+    lines.append("</{0}vertices><{0}triangles>".format(prefix))
+    triangle = '<' + prefix + 'triangle v1="%d" v2="%d" v3="%d" />'
+    lines.extend(triangle % tuple(indices) for indices in mesh.indices.tolist())
+    lines.append("</{0}triangles></{0}mesh></{0}object>".format(prefix))
+    return "\n".join(lines)
+
+
+def write3mf(path: str, parts: Sequence[BatchMesh], tabs: Sequence[BatchMesh], settings: Dict[str, str]) -> None:
+    """New 3MF file with the parts and the tabs."""
+    objects = []
+    items = []
+    for object_id, mesh in enumerate(list(parts) + list(tabs), 1):
+        objects.append(_objectXml(object_id, mesh, 1.0, "", settings if object_id > len(parts) else None))
+        items.append('<item objectid="{}" />'.format(object_id))
+
+    model = '<?xml version="1.0" encoding="UTF-8"?>\n<model unit="millimeter" xml:lang="en-US" xmlns="{}">\n<resources>\n{}\n</resources>\n<build>\n{}\n</build>\n</model>\n'.format(
+        CORE_NAMESPACE, "\n".join(objects), "\n".join(items))
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", '<?xml version="1.0" encoding="UTF-8"?>\n<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                         '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml" />'
+                         '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml" /></Types>')
+        archive.writestr("_rels/.rels", '<?xml version="1.0" encoding="UTF-8"?>\n<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                         '<Relationship Target="/{}" Id="rel0" Type="{}" /></Relationships>'.format(DEFAULT_MODEL_PATH, MODEL_RELATIONSHIP))
+        archive.writestr(DEFAULT_MODEL_PATH, model)
+
+
+def _spoonObjectIds(model: str) -> List[str]:
+    """Id of the objects flagged spoon_mesh in a 3MF model."""
+    root = ET.fromstring(model)
+    tag = lambda name: "{{{}}}{}".format(CORE_NAMESPACE, name)
+    return [element.get("id") for element in root.iter(tag("object")) if settingsRole(_objectSettings(element, tag)) == ROLE_SPOON]
+
+
+def _removeObjects(model: str, prefix: str, object_ids: Sequence[str]) -> str:
+    """Model without the objects and without the build items and the components using them."""
+    for object_id in object_ids:
+        model = re.sub(r"<{0}object\s[^>]*?\bid=\"{1}\".*?</{0}object>\s*".format(re.escape(prefix), object_id), "", model, flags=re.DOTALL)
+        for element in ("item", "component"):
+            model = re.sub(r"<{0}{1}\s[^>]*?\bobjectid=\"{2}\"[^>]*?(?:/>|>.*?</{0}{1}>)\s*".format(re.escape(prefix), element, object_id), "", model,
+                           flags=re.DOTALL)
+    return model
+
+
+def append3mf(source: str, path: str, tabs: Sequence[BatchMesh], unit: float, settings: Dict[str, str]) -> None:
+    """Copy of a 3MF file with the tabs added as new objects and build items, the rest of the file is not changed.
+
+    The spoon tabs already in the file (a file written by the batch or by Cura with tabs) are replaced : their objects
+    are removed with the build items and the components using them.
+    """
+    with zipfile.ZipFile(source) as archive:
+        model_path = _modelPath(archive)
+        model = archive.read(model_path).decode("utf-8")
+
+        # Namespace prefix of the core elements ("" when it is the default namespace)
+        match = re.search(r"<(\w+:)?model[\s>]", model)
+        prefix = (match.group(1) or "") if match else ""
+        model = _removeObjects(model, prefix, _spoonObjectIds(model))
+        ids = [int(value) for value in re.findall(r"<{}object\s[^>]*?\bid=\"(\d+)\"".format(re.escape(prefix)), model)]
+        first_id = max(ids, default=0) + 1
+
+        objects = [_objectXml(first_id + index, tab, unit, prefix, settings) for index, tab in enumerate(tabs)]
+        items = ['<{}item objectid="{}" />'.format(prefix, first_id + index) for index in range(len(tabs))]
+        model = _insertBefore(model, "</{}resources>".format(prefix), "\n".join(objects) + "\n")
+        model = _insertBefore(model, "</{}build>".format(prefix), "\n".join(items) + "\n")
+
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as output:
+            for info in archive.infolist():
+                output.writestr(info, model.encode("utf-8") if info.filename == model_path else archive.read(info))
+
+
+def _insertBefore(text: str, closing_tag: str, insertion: str) -> str:
+    position = text.rfind(closing_tag)
+    if position < 0:
+        raise ValueError("{} not found in the 3MF model".format(closing_tag))
+    return text[:position] + insertion + text[position:]
+
+
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Command line
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+def processFile(path: str, output_path: str, parameters: BatchParameters) -> Dict[str, object]:
+    """Add the tabs to one file, return a summary for the log."""
+    start_time = time.perf_counter()
+    if path.lower().endswith(".3mf"):
+        parts, unit = read3mf(path)
+        tabs = placeTabs(parts, parameters)
+        append3mf(path, output_path, tabs, unit, parameters.settings())
+    else:
+        parts = readStl(path)
+        tabs = placeTabs(parts, parameters)
+        write3mf(output_path, parts, tabs, parameters.settings())
+    return {"file": path, "output": output_path, "parts": len(parts), "tab_objects": len(tabs), "time": time.perf_counter() - start_time}
+
+
+def _processFileSafe(arguments: Tuple[str, str, BatchParameters]) -> Dict[str, object]:
+    try:
+        return processFile(*arguments)
+    except Exception as error:  # One bad file doesn't stop the batch
+        return {"file": arguments[0], "error": "{}: {}".format(type(error).__name__, error)}
+
+
+def processFiles(paths: Sequence[str], output_folder: str, parameters: BatchParameters, jobs: int = 0) -> List[Dict[str, object]]:
+    """Process the files in parallel (jobs processes, the number of processors when 0)."""
+    os.makedirs(output_folder, exist_ok=True)
+    arguments = [(path, os.path.join(output_folder, os.path.splitext(os.path.basename(path))[0] + ".3mf"), parameters) for path in paths]
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    if jobs == 1 or len(arguments) < 2:
+        return [_processFileSafe(argument) for argument in arguments]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(arguments))) as executor:
+        return list(executor.map(_processFileSafe, arguments))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m SpoonCore.Batch", description="Add spoon anti-warping tabs to 3MF / STL files")
+    parser.add_argument("files", nargs="+", help="3MF or STL files")
+    parser.add_argument("-o", "--output", required=True, help="Output folder of the 3MF files")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="Number of processes, 0 = number of processors")
+    parser.add_argument("--size", type=float, default=10.0, help="Diameter of the tab in mm")
+    parser.add_argument("--length", type=float, default=2.0, help="Length of the handle in mm")
+    parser.add_argument("--width", type=float, default=2.0, help="Width of the handle in mm")
+    parser.add_argument("--layers", type=int, default=1, help="Number of layers of the tab")
+    parser.add_argument("--layer-height-0", type=float, default=0.2, help="Initial layer height of the profile in mm")
+    parser.add_argument("--layer-height", type=float, default=0.2, help="Layer height of the profile in mm")
+    parser.add_argument("--chord-tolerance", type=float, default=0.0, help="Chord tolerance of the round part in mm, 0 = a tenth of the nozzle size")
+    parser.add_argument("--nozzle-size", type=float, default=0.4, help="Nozzle size in mm")
+    parser.add_argument("--initial-layer-speed", type=float, default=0.0, help="Initial layer speed of the tabs in mm/s, 0 = profile")
+    parser.add_argument("--direct-shape", action="store_true", help="Direct shape of the handle")
+    parser.add_argument("--separate", action="store_true", help="One object per tab instead of one object per part")
+    parser.add_argument("--hull", action="store_true", help="Tabs on the convex hull instead of the first layer footprint")
+    parser.add_argument("--no-avoid", action="store_true", help="No collision test between the tabs and the other parts")
+    args = parser.parse_args(argv)
+
+    parameters = BatchParameters(args.size, args.length, args.width, args.layers, args.layer_height_0, args.layer_height,
+                                 args.chord_tolerance if args.chord_tolerance > 0 else args.nozzle_size * NOZZLE_CHORD_RATIO, args.initial_layer_speed,
+                                 args.direct_shape, not args.separate, not args.hull, not args.no_avoid)
+    status = 0
+    for summary in processFiles(args.files, args.output, parameters, args.jobs):
+        if "error" in summary:
+            print("{} : {}".format(summary["file"], summary["error"]), file=sys.stderr)
+            status = 1
+        else:
+            print("{file} -> {output} : {parts} parts, {tab_objects} tab objects, {time:.2f} s".format(**summary))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
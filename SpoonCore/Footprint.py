@@ -0,0 +1,160 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Footprint of a mesh on the build plate : section of the mesh by a plane in the middle of the first layer.
+#
+# Only the triangles of the bottom band (with vertices on both sides of the plane) are intersected, the other
+# triangles are rejected by a test on the height of their vertices. The segments are then linked in closed loops,
+# the holes are removed and the outer loops are returned counter clockwise, with their concave corners.
+# No import from Cura or Uranium in this module.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+
+from typing import List, Optional
+
+from .Polygon import containsPoint, signedArea
+
+
+def bottomBandTriangles(heights: np.ndarray, indices: Optional[np.ndarray], plane: float) -> np.ndarray:
+    """Vertex indices (k, 3) of the triangles cut by the horizontal plane.
+
+    Args:
+        heights (np.ndarray): height (Y) of every vertex
+        indices (np.ndarray): triangles (m, 3), None for a triangle soup (3 consecutive vertices per triangle)
+        plane (float): height of the plane
+    """
+    below = heights < plane
+    if indices is None:
+        nb_triangles = len(heights) // 3
+        below_count = below[:nb_triangles * 3].reshape(-1, 3).sum(axis=1)
+        triangles = np.flatnonzero((below_count > 0) & (below_count < 3))
+        return triangles[:, None] * 3 + np.arange(3)
+
+    indices = np.asarray(indices).reshape(-1, 3)
+    below_count = below[indices].sum(axis=1)
+    return indices[(below_count > 0) & (below_count < 3)]
+
+
+def sliceSegments(triangles: np.ndarray, plane: float) -> np.ndarray:
+    """Intersection segments (k, 2, 2) in X / Z of the triangles (k, 3, 3) cut by the horizontal plane."""
+    below = triangles[:, :, 1] < plane
+    # The lonely vertex is the one on its own side of the plane
+    lonely = np.where(below.sum(axis=1) == 1, np.argmax(below, axis=1), np.argmin(below, axis=1))
+    rows = np.arange(len(triangles))
+    a = triangles[rows, lonely]
+    b = triangles[rows, (lonely + 1) % 3]
+    c = triangles[rows, (lonely + 2) % 3]
+
+    def _cut(p, q):
+        t = (plane - p[:, 1]) / (q[:, 1] - p[:, 1])
+        return p[:, [0, 2]] + t[:, None] * (q[:, [0, 2]] - p[:, [0, 2]])
+
+    return np.stack((_cut(a, b), _cut(a, c)), axis=1)
+
+
+def linkSegments(segments: np.ndarray, quantum: float = 1e-4) -> List[np.ndarray]:
+    """Closed loops made with the segments, the ends are merged when they are closer than quantum."""
+    if len(segments) == 0:
+        return []
+    keys = np.round(segments.reshape(-1, 2) / quantum).astype(np.int64)
+    keys, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    points = segments.reshape(-1, 2)[first]
+    edges = inverse.reshape(-1, 2)
+    edges = edges[edges[:, 0] != edges[:, 1]].tolist()
+
+    adjacency = [[] for _ in range(len(points))]
+    for index, (u, w) in enumerate(edges):
+        adjacency[u].append(index)
+        adjacency[w].append(index)
+
+    used = [False] * len(edges)
+    loops = []
+    for start, (u, w) in enumerate(edges):
+        if used[start]:
+            continue
+        used[start] = True
+        loop = [u]
+        current = w
+        while current != u:
+            following = next((index for index in adjacency[current] if not used[index]), None)
+            if following is None:
+                # Open chain (non manifold mesh), it is ignored
+                loop = None
+                break
+            used[following] = True
+            loop.append(current)
+            a, b = edges[following]
+            current = b if a == current else a
+        if loop is not None and len(loop) >= 3:
+            loops.append(points[loop])
+    return loops
+
+
+def simplifyLoop(points: np.ndarray, tolerance: float = 1e-3) -> np.ndarray:
+    """Remove the vertices closer than tolerance to the line of their neighbours (triangulation of the flat faces)."""
+    while len(points) > 3:
+        previous = np.roll(points, 1, axis=0)
+        chord = np.roll(points, -1, axis=0) - previous
+        offset = points - previous
+        length = np.hypot(chord[:, 0], chord[:, 1])
+        cross = np.abs(chord[:, 0] * offset[:, 1] - chord[:, 1] * offset[:, 0])
+        dot = chord[:, 0] * offset[:, 0] + chord[:, 1] * offset[:, 1]
+        # Vertex on the segment between its neighbours (or duplicated vertex)
+        flat = (cross <= tolerance * length) & (dot >= 0) & (dot <= length * length)
+        removed = np.flatnonzero(flat)[::2]
+        if len(removed) == 0:
+            break
+        # Never remove two consecutive vertices in the same pass
+        if len(removed) > 1 and removed[0] == 0 and removed[-1] == len(points) - 1:
+            removed = removed[:-1]
+        points = np.delete(points, removed, axis=0)
+    return points
+
+
+def outerLoops(loops: List[np.ndarray]) -> List[np.ndarray]:
+    """Loops which are not holes of another loop, counter clockwise."""
+    result = []
+    for index, points in enumerate(loops):
+        depth = sum(1 for other, other_points in enumerate(loops) if other != index and containsPoint(other_points, points[0]))
+        if depth % 2 == 0:
+            result.append(points if signedArea(points) > 0 else points[::-1].copy())
+    return result
+
+
+def firstLayerFootprint(vertices: np.ndarray, indices: Optional[np.ndarray], transformation: Optional[np.ndarray], layer_height: float,
+                        tolerance: float = 1e-3, min_area: float = 0.01) -> List[np.ndarray]:
+    """Contact polygons of a mesh on the build plate.
+
+    Args:
+        vertices (np.ndarray): mesh vertices (n, 3) in local coordinates
+        indices (np.ndarray): triangles (m, 3), None for a triangle soup
+        transformation (np.ndarray): 4x4 world transformation, None when the vertices are in world coordinates
+        layer_height (float): height of the first layer, the mesh is cut in the middle of this layer
+        tolerance (float): maximum distance in mm between a removed vertex and the simplified loop
+        min_area (float): minimum area in mm2 of a kept loop
+
+    Returns:
+        list: outer loops (k, 2) in X / Z, counter clockwise
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    if len(vertices) == 0:
+        return []
+
+    if transformation is None:
+        matrix = np.identity(4)
+    else:
+        matrix = np.asarray(transformation, dtype=np.float64)
+
+    # Only the height of all the vertices is computed, the complete transformation is done on the bottom band
+    heights = vertices @ matrix[1, :3] + matrix[1, 3]
+    plane = float(heights.min()) + layer_height * 0.5
+    triangles = bottomBandTriangles(heights, indices, plane)
+    if len(triangles) == 0:
+        return []
+
+    world = vertices[triangles] @ matrix[:3, :3].T + matrix[:3, 3]
+    loops = linkSegments(sliceSegments(world, plane))
+    loops = [simplifyLoop(points, tolerance) for points in loops]
+    loops = [points for points in loops if abs(signedArea(points)) >= min_area]
+    return outerLoops(loops)
@@ -0,0 +1,328 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Spoon geometry generation with NumPy array operations.
+#
+# The coordinates follow the Cura scene convention : X / Z on the build plate and Y for the height.
+# No import from Cura or Uranium in this module.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import math
+import numpy as np
+
+from typing import List, Tuple
+
+# Point used for each of the 12 vertices of a round segment : 0 = center, 1 = start of the arc, 2 = end of the arc
+# Top (center, end, start) / Side 1a (start, end, end) / Side 1b (end, start, start) / Bottom (center, start, end)
+_SEGMENT_POINTS = np.array([0, 2, 1, 1, 2, 2, 2, 1, 1, 0, 1, 2], dtype=np.intp)
+# True when the vertex is on the top of the spoon
+_SEGMENT_TOP = np.array([1, 1, 1, 1, 1, 0, 0, 0, 1, 0, 0, 0], dtype=bool)
+
+
+def tangentialPointOnCircle(center, radius, point_fixe) -> List[float]:
+    """Point of tangency on a circle of the line passing by point_fixe.
+
+    Args:
+        center : center of the circle (x, z)
+        radius (float): radius of the circle
+        point_fixe : fixed point of the line (x, z)
+
+    Returns:
+        list: coordinates [x, z] of the point of tangency
+    """
+    # Calculation of the distance between point_fix and (center[0], center[1])
+    d = math.sqrt((center[0] - point_fixe[0])**2 + (center[1] - point_fixe[1])**2)
+
+    # If point_fix is on the circle, there is only one point of tangency
+    if d == radius:
+        return [point_fixe[0], point_fixe[1]]
+
+    # Calculation of the angle between the line and the radius of the circle passing through the point of tangency
+    theta = math.asin(radius / d)
+    # Calculation of the angle of the line
+    alpha = math.atan2(center[1] - point_fixe[1], center[0] - point_fixe[0])
+    # Calculation of the angle of the ray passing through the point of tangency
+    beta1 = alpha + theta
+    # Calculation of the coordinates of the tangency point
+    return [center[0] - radius * math.sin(beta1), center[1] + radius * math.cos(beta1)]
+
+
+def handleLimits(size: float, length: float, width: float, direct_shape: bool) -> Tuple[float, float]:
+    """End of the spoon handle on the round part.
+
+    Returns:
+        tuple: (max_l, max_val) X position and half width of the handle where it joins the round part
+    """
+    r = size / 2
+    s_sup = width / 2
+    if direct_shape:
+        result = tangentialPointOnCircle([(r + length), 0], r, [-s_sup, s_sup])
+        return result[0], result[1]
+    return length, s_sup
+
+
+# Default chord tolerance as a part of the nozzle size : the error stays well under the line width while the large
+# tabs keep round arcs
+NOZZLE_CHORD_RATIO = 0.1
+
+
+def segmentAngle(size: float, tolerance: float, min_segments: int = 12, max_segments: int = 360) -> float:
+    """Increment angle of the round part for a maximum chord error.
+
+    Args:
+        size (float): diameter of the round part
+        tolerance (float): maximum distance between the circle and the segments in mm
+        min_segments (int): minimum number of segments on the full circle
+        max_segments (int): maximum number of segments on the full circle
+
+    Returns:
+        float: increment angle in degree, 360 is a multiple of this angle
+    """
+    r = size / 2
+    if tolerance <= 0 or r <= 0:
+        nb_segments = max_segments
+    elif tolerance >= r:
+        nb_segments = min_segments
+    else:
+        # Chord error of a segment : r * (1 - cos(ang / 2))
+        nb_segments = math.ceil(math.pi / math.acos(1 - tolerance / r))
+    return 360 / max(min_segments, min(max_segments, nb_segments))
+
+
+def _keptSegments(r: float, max_val: float, a0: np.ndarray, a1: np.ndarray) -> np.ndarray:
+    """Mask of the round part segments which are not clipped by the handle."""
+    return (r * np.cos(a1) >= 0) | ((np.abs(r * np.sin(a1)) > max_val) & (np.abs(r * np.sin(a0)) > max_val))
+
+
+def _rotate(verts: np.ndarray, angle: float) -> np.ndarray:
+    """Rotate the vertices around the vertical axis."""
+    cos_a = math.cos(angle)
+    sin_a = math.sin(angle)
+    rotation = np.array([[cos_a, 0, sin_a], [0, 1, 0], [-sin_a, 0, cos_a]])
+    return verts @ rotation
+
+
+def createSpoonArrays(size: float, length: float, width: float, nb: float, lg: float, He: float, direct_shape: bool, angle: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Vertices and indices of the spoon tab (triangle soup).
+
+    Args:
+        size (float): diameter of the round part
+        length (float): length of the handle
+        width (float): width of the handle
+        nb (float): increment angle in degree for the round part
+        lg (float): height of the picked point, the bottom of the spoon is placed at -lg
+        He (float): height of the spoon
+        direct_shape (bool): handle tangent to the round part
+        angle (float): rotation of the spoon around the vertical axis in radian
+
+    Returns:
+        tuple: vertices as float32 array (n, 3) and indices as int32 array (m, 3)
+    """
+    r = size / 2
+    # First layer length
+    sup = -lg + He
+    l = -lg
+
+    rng = int(round(360 / nb))
+    ang = math.radians(nb)
+
+    # Add the handle of the spoon
+    s_sup = width / 2
+    s_inf = s_sup
+    max_l, max_val = handleLimits(size, length, width, direct_shape)
+
+    handle = [  # 5 faces with 4 corners each
+        [-s_inf, l,  s_inf], [-s_sup,  sup,  s_sup], [ max_l,  sup,  max_val], [ max_l, l,  max_val],
+        [-s_sup,  sup, -s_sup], [-s_inf, l, -s_inf], [ max_l, l, -max_val], [ max_l,  sup, -max_val],
+        [ max_l, l, -max_val], [-s_inf, l, -s_inf], [-s_inf, l,  s_inf], [ max_l, l,  max_val],
+        [-s_sup,  sup, -s_sup], [ max_l,  sup, -max_val], [ max_l,  sup,  max_val], [-s_sup,  sup,  s_sup],
+        [-s_inf, l,  s_inf], [-s_inf, l, -s_inf], [-s_sup,  sup, -s_sup], [-s_sup,  sup,  s_sup]
+    ]
+    nbv = len(handle)
+
+    # Round part : all the segment angles in one go
+    a0 = np.arange(rng, dtype=np.float64) * ang
+    a1 = np.arange(1, rng + 1, dtype=np.float64) * ang
+    sin0 = r * np.sin(a0)
+    sin1 = r * np.sin(a1)
+    keep = _keptSegments(r, max_val, a0, a1)
+
+    # (start, end) points of every emitted segment on the plate
+    starts = np.column_stack((length + r + r * np.cos(a0), sin0))
+    ends = np.column_stack((length + r + r * np.cos(a1), sin1))
+
+    # The junction with the handle is added at the place of the first clipped segment (as long as remain1 == 0)
+    clipped = np.flatnonzero(~keep)
+    junctions = clipped[:1]
+    if len(clipped) > 1 and clipped[0] == 0:
+        junctions = clipped[:2]
+
+    lgh = max_l if direct_shape else length
+    seg_start = []
+    seg_end = []
+    previous = 0
+    for i in junctions:
+        kept = np.flatnonzero(keep[previous:i]) + previous
+        seg_start.append(starts[kept])
+        seg_end.append(ends[kept])
+        remain1 = i * ang
+        remain2 = 2 * math.pi - remain1
+        rem1 = [length + r + r * math.cos(remain1), r * math.sin(remain1)]
+        rem2 = [length + r + r * math.cos(remain2), r * math.sin(remain2)]
+        seg_start.append(np.array([rem1, [lgh, -max_val]]))
+        seg_end.append(np.array([[lgh, max_val], rem2]))
+        previous = i + 1
+    kept = np.flatnonzero(keep[previous:]) + previous
+    seg_start.append(starts[kept])
+    seg_end.append(ends[kept])
+
+    seg_start = np.concatenate(seg_start)
+    seg_end = np.concatenate(seg_end)
+    nbvr = len(seg_start)
+
+    # (nbvr, 3 points, x / z) -> (nbvr, 12 vertices, x / z)
+    center = np.broadcast_to(np.array([length + r, 0.0]), seg_start.shape)
+    plan = np.stack((center, seg_start, seg_end), axis=1)[:, _SEGMENT_POINTS, :]
+    round_part = np.empty((nbvr, 12, 3), dtype=np.float64)
+    round_part[:, :, 0] = plan[:, :, 0]
+    round_part[:, :, 1] = np.where(_SEGMENT_TOP, sup, l)
+    round_part[:, :, 2] = plan[:, :, 1]
+
+    # Add link part between handle and Round Part
+    link = [
+        # Top center
+        [max_l, sup, max_val], [length + r, sup, 0], [max_l, sup, -max_val],
+        # Bottom  center
+        [max_l, l, -max_val], [length + r, l, 0], [max_l, l, max_val]
+    ]
+
+    verts = np.concatenate((np.asarray(handle, dtype=np.float64), round_part.reshape(-1, 3), np.asarray(link, dtype=np.float64)))
+
+    verts = _rotate(verts, angle)
+
+    # All 6 quads (12 triangles) of the handle then one triangle for every 3 vertices
+    quads = np.arange(0, nbv, 4, dtype=np.int32)[:, None]
+    handle_indices = np.stack((quads + [0, 2, 1], quads + [0, 3, 2]), axis=1).reshape(-1, 3)
+    tri_indices = np.arange(nbv, len(verts), dtype=np.int32).reshape(-1, 3)
+    indices = np.concatenate((handle_indices, tri_indices)).astype(np.int32)
+
+    return verts.astype(np.float32), indices
+
+
+def spoonOutline(size: float, length: float, width: float, nb: float, direct_shape: bool) -> Tuple[np.ndarray, List[Tuple[int, int, int]]]:
+    """Contour of the spoon on the build plate and the triangulation of its surface.
+
+    The contour is counter clockwise (from X to Z), the last point of the contour is followed by the center
+    of the round part which is used by the fan of the round part.
+
+    Returns:
+        tuple: contour as float64 array (n, 2) in X / Z and the triangles as indices in the contour (center = n)
+    """
+    r = size / 2
+    rng = int(round(360 / nb))
+    ang = math.radians(nb)
+    max_l, max_val = handleLimits(size, length, width, direct_shape)
+
+    a0 = np.arange(rng, dtype=np.float64) * ang
+    clipped = np.flatnonzero(~_keptSegments(r, max_val, a0, a0 + ang))
+
+    if (width <= 0 and not direct_shape) or len(clipped) == 0 or clipped[0] == 0:
+        # No handle : full circle
+        angles = a0
+        handle = np.empty((0, 2))
+    else:
+        # Keep the arc on the same side of the handle end points
+        i0 = min(int(clipped[0]), int(math.ceil(math.atan2(max_val, max_l - length - r) / ang)) - 1)
+        angles = np.arange(-i0, i0 + 1, dtype=np.float64) * ang
+        s_sup = width / 2
+        if width <= 0:
+            # Direct shape without width : tapered handle from the apex at x = 0, like the triangle soup
+            handle = np.array([[max_l, max_val], [0.0, 0.0], [max_l, -max_val]])
+        else:
+            handle = np.array([[max_l, max_val], [-s_sup, s_sup], [-s_sup, -s_sup], [max_l, -max_val]])
+
+    rim = np.column_stack((length + r + r * np.cos(angles), r * np.sin(angles)))
+    outline = np.concatenate((rim, handle))
+
+    n = len(outline)
+    nb_rim = len(rim)
+    # Fan of the round part from the center (index n)
+    triangles = [(n, i, (i + 1) % n) for i in range(nb_rim - 1)]
+    if len(handle):
+        h_top, h_bottom = nb_rim, n - 1
+        triangles += [(n, nb_rim - 1, h_top), (n, h_top, h_bottom), (n, h_bottom, 0)]
+        # Handle
+        if len(handle) == 3:
+            triangles.append((h_bottom, h_top, nb_rim + 1))
+        else:
+            s_top, s_bottom = nb_rim + 1, nb_rim + 2
+            triangles += [(h_bottom, h_top, s_top), (h_bottom, s_top, s_bottom)]
+    else:
+        triangles.append((n, nb_rim - 1, 0))
+    return outline, triangles
+
+
+def createSpoonIndexedArrays(size: float, length: float, width: float, nb: float, lg: float, He: float, direct_shape: bool, angle: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Vertices and indices of the spoon tab as a watertight indexed mesh.
+
+    Same parameters as createSpoonArrays, but every vertex of the contour is shared between the top or
+    bottom surface and the side, so every edge belongs to exactly two triangles.
+
+    Returns:
+        tuple: vertices as float32 array (n, 3) and indices as int32 array (m, 3)
+    """
+    r = size / 2
+    sup = -lg + He
+    l = -lg
+
+    outline, triangles = spoonOutline(size, length, width, nb, direct_shape)
+    n = len(outline)
+
+    # Top contour, bottom contour, top center, bottom center
+    verts = np.empty((2 * n + 2, 3), dtype=np.float64)
+    verts[:n, 0] = outline[:, 0]
+    verts[:n, 1] = sup
+    verts[:n, 2] = outline[:, 1]
+    verts[n:2 * n, 0] = outline[:, 0]
+    verts[n:2 * n, 1] = l
+    verts[n:2 * n, 2] = outline[:, 1]
+    verts[2 * n] = [length + r, sup, 0]
+    verts[2 * n + 1] = [length + r, l, 0]
+
+    # Triangles are counter clockwise seen from the top : reversed on the top, as is on the bottom
+    cap = np.asarray(triangles, dtype=np.int32)
+    top = np.where(cap == n, 2 * n, cap)[:, [0, 2, 1]]
+    bottom = np.where(cap == n, 2 * n + 1, cap + n)
+
+    k = np.arange(n, dtype=np.int32)
+    k1 = (k + 1) % n
+    side = np.concatenate((np.column_stack((k, k1, k1 + n)), np.column_stack((k1 + n, k + n, k))))
+
+    indices = np.concatenate((top, bottom, side)).astype(np.int32)
+    return _rotate(verts, angle).astype(np.float32), indices
+
+
+def mergeSpoonArrays(verts: np.ndarray, indices: np.ndarray, placements) -> Tuple[np.ndarray, np.ndarray]:
+    """Copies of one unrotated spoon mesh at several places of the build plate, as one mesh.
+
+    Args:
+        verts (np.ndarray): vertices of the spoon (n, 3)
+        indices (np.ndarray): indices of the spoon (m, 3)
+        placements : (x, z, angle) of every copy, the angle in radian like for createSpoonArrays
+
+    Returns:
+        tuple: vertices as float32 array (k * n, 3) and indices as int32 array (k * m, 3)
+    """
+    placements = np.asarray(placements, dtype=np.float64).reshape(-1, 3)
+    verts = np.asarray(verts, dtype=np.float64)
+    cos_a = np.cos(placements[:, 2])[:, None]
+    sin_a = np.sin(placements[:, 2])[:, None]
+
+    merged = np.empty((len(placements), len(verts), 3), dtype=np.float64)
+    merged[:, :, 0] = verts[:, 0] * cos_a - verts[:, 2] * sin_a + placements[:, 0:1]
+    merged[:, :, 1] = verts[:, 1]
+    merged[:, :, 2] = verts[:, 0] * sin_a + verts[:, 2] * cos_a + placements[:, 1:2]
+
+    offsets = (np.arange(len(placements)) * len(verts))[:, None, None]
+    merged_indices = np.asarray(indices, dtype=np.int64)[None, :, :] + offsets
+    return merged.reshape(-1, 3).astype(np.float32), merged_indices.reshape(-1, 3).astype(np.int32)
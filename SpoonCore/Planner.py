@@ -0,0 +1,191 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Planning of the automatic tab placement, one task per parent.
+#
+# A task only holds NumPy arrays and numbers : it can be run in a thread or sent to another process. The result gives
+# the position and the angle of every tab and, for the merged mode, the vertices of the merged mesh. The scene is
+# modified afterwards, in the main thread, with these results.
+# No import from Cura or Uranium in this module.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import math
+import time
+import numpy as np
+
+from concurrent.futures import Executor
+from typing import Hashable, List, Optional, Sequence, Tuple
+
+from .Footprint import firstLayerFootprint
+from .Geometry import mergeSpoonArrays
+from .Polygon import convexHull, nearestPolygon, outwardAngle
+from .SpatialHash import SpatialHash
+
+# Rotations tried, in degrees, when a tab collides with a neighbouring part or tab
+AVOIDANCE_ANGLES = (0, 20, -20, 40, -40)
+
+
+class PlanTask:
+    def __init__(self, key: Hashable, size: float, loops: Optional[List[np.ndarray]] = None, angle_polygons: Optional[List[np.ndarray]] = None,
+                 vertices: Optional[np.ndarray] = None, indices: Optional[np.ndarray] = None, transformation: Optional[np.ndarray] = None,
+                 layer_height: float = 0.0, template: Optional[Tuple[np.ndarray, np.ndarray]] = None, length: float = 0.0) -> None:
+        """
+        param key: Identification of the parent in the results.
+        param size: Diameter of the tab in mm, the tabs are at least 0.8 * size apart.
+        param loops: Polygons (k, 2) in X / Z whose vertices are the possible tab positions.
+        param angle_polygons: Polygons used to orient the tabs, the loops when None.
+        param vertices: Mesh of the parent used to compute the footprint when loops is None.
+        param indices: Triangles of the mesh, None for a triangle soup.
+        param transformation: 4x4 world transformation of the mesh.
+        param layer_height: Height of the first layer for the footprint.
+        param template: Vertices and indices of the unrotated spoon for the merged mode, None for separated tabs.
+        param length: Length of the handle of the tab, used for the collision test of the disc.
+        """
+        self.key = key
+        self.size = size
+        self.loops = loops
+        self.angle_polygons = angle_polygons
+        self.vertices = vertices
+        self.indices = indices
+        self.transformation = transformation
+        self.layer_height = layer_height
+        self.template = template
+        self.length = length
+
+
+class PlanResult:
+    def __init__(self, key: Hashable, placements: np.ndarray, footprint: Optional[List[np.ndarray]] = None) -> None:
+        self.key = key
+        # (x, z, angle) of every tab
+        self.placements = placements
+        # Footprint computed by the task, None when the loops were given
+        self.footprint = footprint
+        # Merged mode : mesh of all the tabs around origin (x, z)
+        self.origin = None  # type: Optional[np.ndarray]
+        self.vertices = None  # type: Optional[np.ndarray]
+        self.indices = None  # type: Optional[np.ndarray]
+        # Tabs not placed because of a collision
+        self.skipped = 0
+        # Duration of planTabs in seconds
+        self.elapsed = 0.0
+
+
+def spacedPoints(points: np.ndarray, spacing: float) -> np.ndarray:
+    """Points of a closed polygon kept as tab positions.
+
+    A point is kept when it is at least spacing from the previous kept point, and the last point must also be
+    at least spacing from the first one.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    kept = []
+    last = None
+    for index, point in enumerate(points):
+        distance = math.inf if last is None else round(math.hypot(point[0] - last[0], point[1] - last[1]), 0)
+        if distance < spacing:
+            continue
+        if index == len(points) - 1 and index > 0 and math.hypot(point[0] - points[0][0], point[1] - points[0][1]) < spacing:
+            continue
+        kept.append(point)
+        last = point
+    return np.array(kept, dtype=np.float64).reshape(-1, 2)
+
+
+def computeFootprint(task: PlanTask) -> List[np.ndarray]:
+    """Polygons of the task : the loops given or the footprint of the mesh."""
+    if task.loops is not None:
+        return task.loops
+    if task.vertices is None:
+        return []
+    return firstLayerFootprint(task.vertices, task.indices, task.transformation, task.layer_height)
+
+
+def obstacleLoops(task: PlanTask, loops: List[np.ndarray]) -> List[np.ndarray]:
+    """Polygons of the task avoided by the other tasks : its footprint, or the convex hull of its mesh when the mesh
+    cannot be cut (the tabs of this task are then planned on a convex hull too)."""
+    if loops or task.vertices is None:
+        return loops
+    vertices = np.asarray(task.vertices, dtype=np.float64).reshape(-1, 3)
+    if task.transformation is not None:
+        transformation = np.asarray(task.transformation, dtype=np.float64)
+        vertices = vertices @ transformation[:3, :3].T + transformation[:3, 3]
+    hull = convexHull(vertices[:, [0, 2]])
+    return [hull] if len(hull) >= 3 else []
+
+
+def tabDisc(point: np.ndarray, angle: float, size: float, length: float) -> Tuple[float, float, float]:
+    """Center (x, z) and radius of the disc of a tab placed at point with angle."""
+    radius = size * 0.5
+    reach = length + radius
+    return point[0] + reach * math.cos(angle), point[1] + reach * math.sin(angle), radius
+
+
+def planTabs(task: PlanTask, loops: Optional[List[np.ndarray]] = None, tab_hash: Optional[SpatialHash] = None) -> PlanResult:
+    """Positions and angles of the tabs of one parent.
+
+    param loops: Footprint already computed with computeFootprint.
+    param tab_hash: Discs and footprints of the build plate. A tab colliding with another part or another tab is
+    rotated by the AVOIDANCE_ANGLES or skipped, the tabs kept are added to tab_hash.
+    """
+    start_time = time.perf_counter()
+    footprint = None
+    if loops is None:
+        loops = computeFootprint(task)
+    if task.loops is None:
+        footprint = loops
+
+    points = [spacedPoints(loop, task.size * 0.8) for loop in loops]
+    points = np.concatenate(points) if points else np.zeros((0, 2))
+
+    angle_polygons = task.angle_polygons if task.angle_polygons else loops
+    angles = np.zeros(len(points))
+    for index, point in enumerate(points):
+        polygon = 0 if len(angle_polygons) == 1 else nearestPolygon(angle_polygons, point)
+        angles[index] = outwardAngle(angle_polygons[polygon], point)
+
+    skipped = 0
+    if tab_hash is not None and len(points):
+        kept = np.ones(len(points), dtype=bool)
+        for index, point in enumerate(points):
+            for offset in AVOIDANCE_ANGLES:
+                angle = angles[index] + math.radians(offset)
+                x, z, radius = tabDisc(point, angle, task.size, task.length)
+                if not tab_hash.discCollides(x, z, radius, task.key):
+                    angles[index] = angle
+                    tab_hash.addDisc(x, z, radius, task.key)
+                    break
+            else:
+                kept[index] = False
+        skipped = int(len(points) - kept.sum())
+        points = points[kept]
+        angles = angles[kept]
+
+    result = PlanResult(task.key, np.column_stack((points, angles)), footprint)
+    result.skipped = skipped
+    if task.template is not None and len(points):
+        result.origin = points.mean(axis=0)
+        placements = result.placements.copy()
+        placements[:, :2] -= result.origin
+        result.vertices, result.indices = mergeSpoonArrays(task.template[0], task.template[1], placements)
+    result.elapsed = time.perf_counter() - start_time
+    return result
+
+
+def runPlanner(tasks: Sequence[PlanTask], executor: Optional[Executor] = None, tab_hash: Optional[SpatialHash] = None) -> List[PlanResult]:
+    """Plan all the tasks, in parallel with the executor if one is given. The results are in the order of the tasks.
+
+    With tab_hash, the footprints are computed in parallel and added to tab_hash, then the tabs are placed one task
+    after the other so every task sees the tabs of the previous ones.
+    """
+    if tab_hash is None:
+        if executor is None or len(tasks) < 2:
+            return [planTabs(task) for task in tasks]
+        return list(executor.map(planTabs, tasks))
+
+    if executor is None or len(tasks) < 2:
+        footprints = [computeFootprint(task) for task in tasks]
+    else:
+        footprints = list(executor.map(computeFootprint, tasks))
+    for task, loops in zip(tasks, footprints):
+        for loop in obstacleLoops(task, loops):
+            tab_hash.addPolygon(loop, task.key)
+    return [planTabs(task, loops, tab_hash) for task, loops in zip(tasks, footprints)]
@@ -0,0 +1,216 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Polygon tools on the build plate (X / Z) with NumPy array operations.
+# No import from Cura or Uranium in this module.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import math
+import numpy as np
+
+from typing import Tuple
+
+
+def signedArea(points: np.ndarray) -> float:
+    """Signed area of a closed polygon, positive when the polygon is counter clockwise (from X to Z)."""
+    points = np.asarray(points, dtype=np.float64)
+    x = points[:, 0]
+    z = points[:, 1]
+    # Shoelace formula on views of the arrays, the closing edge apart
+    return 0.5 * float(np.dot(x[:-1], z[1:]) - np.dot(x[1:], z[:-1]) + x[-1] * z[0] - x[0] * z[-1])
+
+
+def edgeNormals(points: np.ndarray) -> np.ndarray:
+    """Outward unit normal of every edge (points[i], points[i+1]) of a closed polygon."""
+    points = np.asarray(points, dtype=np.float64)
+    d = np.roll(points, -1, axis=0) - points
+    normals = np.column_stack((d[:, 1], -d[:, 0]))
+    if signedArea(points) < 0:
+        normals = -normals
+    lengths = np.hypot(normals[:, 0], normals[:, 1])
+    lengths[lengths == 0] = 1
+    return normals / lengths[:, None]
+
+
+def _edgeDistances(p: np.ndarray, point) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, float]:
+    """Edge vectors (dx, dz), parameter of the nearest point on every edge, squared distances and twice the signed area.
+
+    The columns are copied once, the operations on contiguous 1D arrays are faster than on the (n, 2) array.
+    """
+    px = p[:, 0].copy()
+    pz = p[:, 1].copy()
+    dx = np.empty_like(px)
+    dz = np.empty_like(pz)
+    np.subtract(px[1:], px[:-1], out=dx[:-1])
+    np.subtract(pz[1:], pz[:-1], out=dz[:-1])
+    dx[-1] = px[0] - px[-1]
+    dz[-1] = pz[0] - pz[-1]
+    area2 = float(np.dot(px, dz) - np.dot(dx, pz))
+
+    # Vectors from the vertices to the point
+    np.subtract(point[0], px, out=px)
+    np.subtract(point[1], pz, out=pz)
+    len2 = dx * dx
+    len2 += dz * dz
+    t = px * dx
+    t += pz * dz
+    # A degenerated edge has t = 0 : nearest point at its start
+    np.maximum(len2, 1e-300, out=len2)
+    t /= len2
+    np.minimum(np.maximum(t, 0, out=t), 1, out=t)
+    px -= t * dx
+    pz -= t * dz
+    dist2 = np.multiply(px, px, out=len2)
+    dist2 += pz * pz
+    return dx, dz, t, dist2, area2
+
+
+def _smallEdgeDistances(points: list, point) -> Tuple[list, list, list, list, float]:
+    """Same as _edgeDistances with Python floats, faster than the array operations for a few edges."""
+    x, z = float(point[0]), float(point[1])
+    dx_list = []
+    dz_list = []
+    t = []
+    dist2 = []
+    area2 = 0.0
+    previous_x, previous_z = points[0]
+    for next_x, next_z in points[1:] + points[:1]:
+        dx = next_x - previous_x
+        dz = next_z - previous_z
+        wx = x - previous_x
+        wz = z - previous_z
+        len2 = dx * dx + dz * dz
+        u = 0.0 if len2 == 0 else min(max((wx * dx + wz * dz) / len2, 0.0), 1.0)
+        ex = wx - u * dx
+        ez = wz - u * dz
+        dx_list.append(dx)
+        dz_list.append(dz)
+        t.append(u)
+        dist2.append(ex * ex + ez * ez)
+        area2 += previous_x * dz - dx * previous_z
+        previous_x, previous_z = next_x, next_z
+    return dx_list, dz_list, t, dist2, area2
+
+
+# Number of edges up to which the distances are computed with Python floats
+SMALL_POLYGON = 16
+
+
+def nearestEdge(points: np.ndarray, point, tie_tolerance: float = 0.05) -> Tuple[np.ndarray, int, np.ndarray]:
+    """Nearest edge of a closed polygon from a point and the outward direction at this place.
+
+    The distance to every edge is computed at once. When the nearest point is a vertex the bisector of the
+    two edge normals is used, and all the edges closer than the minimum distance + tie_tolerance are averaged
+    (for example the arc of an adhesion area around a corner).
+
+    Args:
+        points (np.ndarray): polygon (n, 2) in X / Z
+        point : point (x, z)
+        tie_tolerance (float): distance in mm under which two edges are considered at the same distance
+
+    Returns:
+        tuple: nearest point (2,), index of the nearest edge, outward unit normal (2,)
+    """
+    p = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    n = len(p)
+    if n <= SMALL_POLYGON:
+        dx, dz, t, dist2, area2 = _smallEdgeDistances(p.tolist(), point)
+        nearest = min(range(n), key=dist2.__getitem__)
+        limit = math.sqrt(dist2[nearest]) + tie_tolerance
+        candidates = [i for i in range(n) if dist2[i] <= limit * limit]
+    else:
+        dx, dz, t, dist2, area2 = _edgeDistances(p, point)
+        nearest = int(dist2.argmin())
+        limit = math.sqrt(float(dist2[nearest])) + tie_tolerance
+        candidates = np.flatnonzero(dist2 <= limit * limit).tolist()
+
+    # Outward normal of an edge, the sign depends on the orientation of the polygon
+    side = -1.0 if area2 < 0 else 1.0
+
+    def _edgeNormal(i: int) -> Tuple[float, float]:
+        x = float(dx[i])
+        z = float(dz[i])
+        length = math.hypot(x, z)
+        if length == 0:
+            return 0.0, 0.0
+        return side * z / length, -side * x / length
+
+    normal_x = 0.0
+    normal_z = 0.0
+    for i in candidates:
+        direction_x, direction_z = _edgeNormal(i)
+        # Normal at the vertices : bisector of the previous and the next edge
+        if t[i] <= 0:
+            other = _edgeNormal((i - 1) % n)
+        elif t[i] >= 1:
+            other = _edgeNormal((i + 1) % n)
+        else:
+            other = (0.0, 0.0)
+        direction_x += other[0]
+        direction_z += other[1]
+        norm = math.hypot(direction_x, direction_z)
+        if norm > 0:
+            normal_x += direction_x / norm
+            normal_z += direction_z / norm
+
+    norm = math.hypot(normal_x, normal_z)
+    if norm < 1e-9:
+        normal_x, normal_z = _edgeNormal(nearest)
+    else:
+        normal_x /= norm
+        normal_z /= norm
+    u = float(t[nearest])
+    closest = np.array([p[nearest, 0] + u * float(dx[nearest]), p[nearest, 1] + u * float(dz[nearest])])
+    return closest, nearest, np.array([normal_x, normal_z])
+
+
+def outwardAngle(points: np.ndarray, point) -> float:
+    """Angle in radian of the outward direction of the polygon nearest edge, as used by the spoon rotation."""
+    normal = nearestEdge(points, point)[2]
+    return math.atan2(normal[1], normal[0])
+
+
+def containsPoint(points: np.ndarray, point) -> bool:
+    """True when the point is inside the closed polygon (even-odd rule)."""
+    p = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    x1 = p[:, 0]
+    z1 = p[:, 1]
+    x2 = np.roll(x1, -1)
+    z2 = np.roll(z1, -1)
+    crossing = (z1 > point[1]) != (z2 > point[1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = x1 + (point[1] - z1) * (x2 - x1) / (z2 - z1)
+    return bool(np.count_nonzero(crossing & (point[0] < x)) % 2)
+
+
+def nearestPolygon(polygons, point) -> int:
+    """Index of the polygon of the list with the nearest edge from the point, -1 for an empty list."""
+    best = -1
+    best_distance = math.inf
+    for index, points in enumerate(polygons):
+        closest = nearestEdge(points, point)[0]
+        distance = math.hypot(closest[0] - point[0], closest[1] - point[1])
+        if distance < best_distance:
+            best = index
+            best_distance = distance
+    return best
+
+
+def convexHull(points: np.ndarray) -> np.ndarray:
+    """Convex hull (k, 2) of the points, counter clockwise (monotone chain)."""
+    points = np.unique(np.asarray(points, dtype=np.float64).reshape(-1, 2), axis=0)
+    if len(points) < 3:
+        return points
+
+    def halfHull(sequence):
+        hull = []
+        for point in sequence:
+            while len(hull) >= 2 and ((hull[-1][0] - hull[-2][0]) * (point[1] - hull[-2][1]) - (hull[-1][1] - hull[-2][1]) * (point[0] - hull[-2][0])) <= 0:
+                hull.pop()
+            hull.append(point)
+        return hull
+
+    sequence = points.tolist()
+    lower = halfHull(sequence)
+    upper = halfHull(reversed(sequence))
+    return np.array(lower[:-1] + upper[:-1], dtype=np.float64)
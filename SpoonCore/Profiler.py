@@ -0,0 +1,165 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Timings of the phases of a tab creation and counters, grouped by run (a click or an automatic placement).
+#
+#   profiler = Profiler(enabled = True)
+#   profiler.start("click")
+#   with profiler.span("define_angle"):
+#       ...
+#   profiler.count("tabs")
+#   run = profiler.finish()
+#
+# A span can be given an owner (the id of the parent of the tabs) and its display name to get the totals per parent,
+# so parents with the same name keep separate totals. When the profiler is disabled,
+# span() returns a shared empty scope and count() returns at once, so the calls can stay in the hot paths.
+# No import from Cura or Uranium in this module.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import json
+import time
+
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class _NullSpan:
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, profiler: "Profiler", name: str, owner: Optional[Hashable], owner_name: Optional[str]) -> None:
+        self._profiler = profiler
+        self._name = name
+        self._owner = owner
+        self._owner_name = owner_name
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._profiler.add(self._name, time.perf_counter() - self._start, self._owner, self._owner_name)
+
+
+class Profiler:
+    def __init__(self, enabled: bool = False, history: int = 20) -> None:
+        """
+        param enabled: Record the spans and the counters.
+        param history: Number of finished runs kept for the export.
+        """
+        self._enabled = enabled
+        self._runs = deque(maxlen = history)  # type: deque
+        self._label = ""
+        self._start = 0.0
+        # name -> [count, total seconds, max seconds]
+        self._phases = OrderedDict()  # type: Dict[str, List[float]]
+        self._counters = OrderedDict()  # type: Dict[str, int]
+        # owner -> (display name, name -> total seconds)
+        self._owners = OrderedDict()  # type: Dict[Hashable, Tuple[str, Dict[str, float]]]
+        self._running = False
+
+    def setEnabled(self, enabled: bool) -> None:
+        self._enabled = enabled
+        self._running = False
+
+    def isEnabled(self) -> bool:
+        return self._enabled
+
+    def start(self, label: str) -> None:
+        """Begin a run, the spans and counters recorded outside of a run are dropped."""
+        if not self._enabled:
+            return
+        self._label = label
+        self._start = time.perf_counter()
+        self._phases = OrderedDict()
+        self._counters = OrderedDict()
+        self._owners = OrderedDict()
+        self._running = True
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """End the current run, return its record (None when disabled or without run)."""
+        if not self._enabled or not self._running:
+            return None
+        self._running = False
+        run = OrderedDict()  # type: Dict[str, Any]
+        run["label"] = self._label
+        run["date"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        run["total_ms"] = (time.perf_counter() - self._start) * 1e3
+        run["phases"] = OrderedDict((name, {"count": int(count), "total_ms": total * 1e3, "max_ms": maximum * 1e3})
+                                    for name, (count, total, maximum) in self._phases.items())
+        run["counters"] = OrderedDict(self._counters)
+        # A list, the parents with the same name stay separate in the export
+        run["owners"] = [OrderedDict((("name", owner_name),
+                                      ("phases", OrderedDict((name, total * 1e3) for name, total in phases.items()))))
+                         for owner_name, phases in self._owners.values()]
+        self._runs.append(run)
+        return run
+
+    def span(self, name: str, owner: Optional[Hashable] = None, owner_name: Optional[str] = None):
+        """Scope measured as the phase name, also added to the totals of owner (shown as owner_name)."""
+        if not self._running:
+            return _NULL_SPAN
+        return _Span(self, name, owner, owner_name)
+
+    def add(self, name: str, seconds: float, owner: Optional[Hashable] = None, owner_name: Optional[str] = None) -> None:
+        """Add a duration measured elsewhere (for example in a thread of the planner) to the phase name."""
+        if not self._running:
+            return
+        phase = self._phases.get(name)
+        if phase is None:
+            self._phases[name] = [1, seconds, seconds]
+        else:
+            phase[0] += 1
+            phase[1] += seconds
+            if seconds > phase[2]:
+                phase[2] = seconds
+        if owner is not None:
+            entry = self._owners.get(owner)
+            if entry is None:
+                entry = self._owners[owner] = (str(owner) if owner_name is None else owner_name, OrderedDict())
+            phases = entry[1]
+            phases[name] = phases.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1) -> None:
+        if not self._running:
+            return
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    def getLastRun(self) -> Optional[Dict[str, Any]]:
+        return self._runs[-1] if self._runs else None
+
+    def getRuns(self) -> List[Dict[str, Any]]:
+        return list(self._runs)
+
+    def clear(self) -> None:
+        self._runs.clear()
+
+    def exportJson(self, path: str) -> None:
+        """Write the finished runs in a JSON file."""
+        with open(path, "w") as stream:
+            json.dump({"runs": list(self._runs)}, stream, indent = 1)
+
+
+def summaryText(run: Dict[str, Any], phases: int = 4) -> str:
+    """One line of the total time, the longest phases and the counters of a run."""
+    longest = sorted(run["phases"].items(), key = lambda item: item[1]["total_ms"], reverse = True)[:phases]
+    text = "{} {:.1f} ms".format(run["label"], run["total_ms"])
+    if longest:
+        text += " : " + ", ".join("{} {:.1f}".format(name, phase["total_ms"]) for name, phase in longest)
+    if run["counters"]:
+        text += " | " + ", ".join("{} {}".format(name, value) for name, value in run["counters"].items())
+    return text
+
+
+def ownersText(run: Dict[str, Any], owners: int = 5) -> str:
+    """Parents with the longest total time of a run, one per line."""
+    totals = sorted(((sum(owner["phases"].values()), owner["name"]) for owner in run["owners"]), reverse = True)[:owners]
+    return "\n".join("{} {:.1f} ms".format(name, total) for total, name in totals)
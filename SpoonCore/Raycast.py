@@ -0,0 +1,131 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Ray / mesh intersection with a bounding volume hierarchy (BVH) in NumPy.
+#
+# The triangles are sorted along a Morton curve of their centers and grouped by leaves of leaf_size triangles. The
+# tree is a complete binary tree built from the leaves, level by level, so the construction has no Python loop per
+# node. A ray is tested against all the boxes of a level at once, then against the triangles of the leaves hit.
+# No import from Cura or Uranium in this module.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import numpy as np
+
+from typing import Optional
+
+
+def _spreadBits(values: np.ndarray) -> np.ndarray:
+    """Insert two zero bits between the 10 lower bits of every value."""
+    values = values & 0x3FF
+    values = (values | (values << 16)) & 0x030000FF
+    values = (values | (values << 8)) & 0x0300F00F
+    values = (values | (values << 4)) & 0x030C30C3
+    values = (values | (values << 2)) & 0x09249249
+    return values
+
+
+def _mortonCodes(points: np.ndarray) -> np.ndarray:
+    """Morton code (10 bits per axis) of points normalized in their bounding box."""
+    low = points.min(axis=0)
+    size = points.max(axis=0) - low
+    size[size == 0] = 1
+    cells = np.clip(((points - low) / size * 1023), 0, 1023).astype(np.uint32)
+    return _spreadBits(cells[:, 0]) | (_spreadBits(cells[:, 1]) << 1) | (_spreadBits(cells[:, 2]) << 2)
+
+
+def intersectTriangles(triangles: np.ndarray, origin: np.ndarray, direction: np.ndarray, epsilon: float = 1e-12) -> np.ndarray:
+    """Ray parameter of the intersection with every triangle (k, 3, 3), inf when there is no intersection (Moller-Trumbore)."""
+    triangles = np.asarray(triangles, dtype=np.float64)
+    v0 = triangles[:, 0]
+    edge1 = triangles[:, 1] - v0
+    edge2 = triangles[:, 2] - v0
+    p = np.cross(direction, edge2)
+    det = np.einsum("ij,ij->i", edge1, p)
+    valid = np.abs(det) > epsilon
+    inv_det = np.zeros_like(det)
+    inv_det[valid] = 1.0 / det[valid]
+
+    s = origin - v0
+    u = np.einsum("ij,ij->i", s, p) * inv_det
+    q = np.cross(s, edge1)
+    v = (q @ direction) * inv_det
+    t = np.einsum("ij,ij->i", edge2, q) * inv_det
+
+    hit = valid & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > 0)
+    return np.where(hit, t, np.inf)
+
+
+class TriangleBVH:
+    def __init__(self, vertices: np.ndarray, indices: Optional[np.ndarray] = None, leaf_size: int = 16) -> None:
+        """
+        param vertices: Vertices (n, 3) of the mesh.
+        param indices: Triangles (m, 3), None for a triangle soup (3 consecutive vertices per triangle).
+        param leaf_size: Number of triangles per leaf.
+        """
+        vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        if indices is None:
+            triangles = vertices[:len(vertices) // 3 * 3].reshape(-1, 3, 3)
+        else:
+            triangles = vertices[np.asarray(indices).reshape(-1, 3)]
+
+        self._leaf_size = leaf_size
+        self._count = len(triangles)
+        if self._count == 0:
+            self._triangles = triangles
+            self._levels = []
+            return
+
+        order = np.argsort(_mortonCodes(triangles[:, 0] + triangles[:, 1] + triangles[:, 2]), kind="stable")
+        self._triangles = triangles[order]
+        # Faster than min / max along the axis 1
+        triangle_min = np.minimum(np.minimum(self._triangles[:, 0], self._triangles[:, 1]), self._triangles[:, 2])
+        triangle_max = np.maximum(np.maximum(self._triangles[:, 0], self._triangles[:, 1]), self._triangles[:, 2])
+
+        # Leaves, the number is rounded to a power of two with empty leaves
+        nb_leaves = -(-self._count // leaf_size)
+        depth = max(0, int(nb_leaves - 1).bit_length())
+        starts = np.arange(0, self._count, leaf_size)
+        leaf_min = np.full((1 << depth, 3), np.inf, dtype=np.float32)
+        leaf_max = np.full((1 << depth, 3), -np.inf, dtype=np.float32)
+        leaf_min[:nb_leaves] = np.minimum.reduceat(triangle_min, starts)
+        leaf_max[:nb_leaves] = np.maximum.reduceat(triangle_max, starts)
+        leaf_valid = np.arange(1 << depth) < nb_leaves
+
+        # Levels from the root (1 box) to the leaves
+        self._levels = [(leaf_min, leaf_max, leaf_valid)]
+        while len(self._levels[0][0]) > 1:
+            low, high, valid = self._levels[0]
+            self._levels.insert(0, (np.minimum(low[0::2], low[1::2]), np.maximum(high[0::2], high[1::2]), valid[0::2] | valid[1::2]))
+
+    def getTriangleCount(self) -> int:
+        return self._count
+
+    def intersect(self, origin, direction) -> Optional[float]:
+        """Ray parameter t of the nearest intersection (point = origin + t * direction), None when the mesh is not hit."""
+        if not self._levels:
+            return None
+        origin = np.asarray(origin, dtype=np.float64)
+        direction = np.asarray(direction, dtype=np.float64)
+        with np.errstate(divide="ignore"):
+            inverse = 1.0 / direction
+
+        active = np.zeros(1, dtype=np.int64)
+        for level, (low, high, valid) in enumerate(self._levels):
+            if level > 0:
+                active = np.concatenate((active * 2, active * 2 + 1))
+            with np.errstate(invalid="ignore"):
+                t1 = (low[active] - origin) * inverse
+                t2 = (high[active] - origin) * inverse
+            t_near = np.fmax.reduce(np.fmin(t1, t2), axis=1)
+            t_far = np.fmin.reduce(np.fmax(t1, t2), axis=1)
+            active = active[valid[active] & (t_near <= t_far) & (t_far >= 0)]
+            if len(active) == 0:
+                return None
+
+        # Triangles of the leaves hit by the ray
+        starts = active * self._leaf_size
+        counts = np.minimum(starts + self._leaf_size, self._count) - starts
+        candidates = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        t = intersectTriangles(self._triangles[candidates], origin, direction)
+        nearest = float(t.min())
+        return nearest if np.isfinite(nearest) else None
@@ -0,0 +1,34 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Roles of the sliceable objects (normal / support / infill / cutting / anti_overhang / spoon), given by their per
+# object settings. Used by the scene index of the tool and by the batch for the objects of a 3MF file, so only the
+# normal objects get tabs in both cases.
+# No import from Cura or Uranium in this module.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+from typing import Dict
+
+ROLE_NORMAL = "normal"
+ROLE_SUPPORT = "support"
+ROLE_INFILL = "infill"
+ROLE_CUTTING = "cutting"
+ROLE_ANTI_OVERHANG = "anti_overhang"
+ROLE_SPOON = "spoon"
+
+# Setting defining the role, by order of priority
+ROLE_SETTINGS = (
+    ("spoon_mesh", ROLE_SPOON),
+    ("support_mesh", ROLE_SUPPORT),
+    ("infill_mesh", ROLE_INFILL),
+    ("anti_overhang_mesh", ROLE_ANTI_OVERHANG),
+    ("cutting_mesh", ROLE_CUTTING),
+)
+
+
+def settingsRole(settings: Dict[str, str]) -> str:
+    """Role of an object from its settings as text, as saved by Cura in the metadata of a 3MF object ("True" / "False")."""
+    for key, role in ROLE_SETTINGS:
+        if settings.get(key, "").strip().lower() == "true":
+            return role
+    return ROLE_NORMAL
@@ -0,0 +1,100 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Uniform grid of the build plate holding the tab discs and the part footprints.
+#
+# Every disc and every polygon edge is registered in the cells it covers, a query only reads the few cells around
+# the tested disc : the cost doesn't depend on the number of parts on the build plate.
+# No import from Cura or Uranium in this module.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import math
+import numpy as np
+
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from .Polygon import containsPoint
+
+
+class SpatialHash:
+    def __init__(self, cell_size: float) -> None:
+        """
+        param cell_size: Size of a cell in mm, about the diameter of a tab.
+        """
+        self._cell_size = max(cell_size, 1e-3)
+        self._discs = {}  # type: Dict[Tuple[int, int], List[Tuple[float, float, float, Optional[Hashable]]]]
+        self._edges = {}  # type: Dict[Tuple[int, int], List[Tuple[float, float, float, float, int]]]
+        # Cells of the bounding box of every polygon, used for the test of a disc inside a polygon
+        self._polygon_cells = {}  # type: Dict[Tuple[int, int], List[int]]
+        self._polygons = []  # type: List[Tuple[Optional[Hashable], np.ndarray]]
+
+    def addDisc(self, x: float, z: float, radius: float, owner: Optional[Hashable] = None) -> None:
+        """Add a tab disc. A disc without owner collides with all the discs."""
+        disc = (x, z, radius, owner)
+        for cell in self._cellsOfBox(x - radius, z - radius, x + radius, z + radius):
+            self._discs.setdefault(cell, []).append(disc)
+
+    def addPolygon(self, points: np.ndarray, owner: Optional[Hashable] = None) -> None:
+        """Add the footprint of a part, closed polygon (n, 2) in X / Z."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(points) < 3:
+            return
+        index = len(self._polygons)
+        self._polygons.append((owner, points))
+
+        low = points.min(axis=0)
+        high = points.max(axis=0)
+        for cell in self._cellsOfBox(low[0], low[1], high[0], high[1]):
+            self._polygon_cells.setdefault(cell, []).append(index)
+
+        # Cells crossed by every edge, sampled every quarter of cell
+        following = np.roll(points, -1, axis=0)
+        for (x1, z1), (x2, z2) in zip(points.tolist(), following.tolist()):
+            edge = (x1, z1, x2, z2, index)
+            steps = int(math.hypot(x2 - x1, z2 - z1) / (self._cell_size * 0.25)) + 1
+            t = np.linspace(0, 1, steps + 1)
+            cells = set(zip(np.floor((x1 + t * (x2 - x1)) / self._cell_size).astype(int).tolist(),
+                            np.floor((z1 + t * (z2 - z1)) / self._cell_size).astype(int).tolist()))
+            for cell in cells:
+                self._edges.setdefault(cell, []).append(edge)
+
+    def discCollides(self, x: float, z: float, radius: float, owner: Optional[Hashable] = None, margin: float = 1e-3) -> bool:
+        """True when the disc overlaps a disc or a polygon of another owner (by more than margin)."""
+        cells = self._cellsOfBox(x - radius, z - radius, x + radius, z + radius)
+
+        for cell in cells:
+            for other_x, other_z, other_radius, other_owner in self._discs.get(cell, ()):
+                if owner is not None and other_owner == owner:
+                    continue
+                if math.hypot(other_x - x, other_z - z) < radius + other_radius - margin:
+                    return True
+
+        tested = set()
+        for cell in cells:
+            for x1, z1, x2, z2, index in self._edges.get(cell, ()):
+                if self._polygons[index][0] == owner and owner is not None:
+                    continue
+                if _segmentDistance(x, z, x1, z1, x2, z2) < radius - margin:
+                    return True
+            for index in self._polygon_cells.get(cell, ()):
+                if index in tested or (owner is not None and self._polygons[index][0] == owner):
+                    continue
+                tested.add(index)
+                if containsPoint(self._polygons[index][1], (x, z)):
+                    return True
+        return False
+
+    def _cellsOfBox(self, x1: float, z1: float, x2: float, z2: float) -> List[Tuple[int, int]]:
+        i1 = int(math.floor(x1 / self._cell_size))
+        i2 = int(math.floor(x2 / self._cell_size))
+        j1 = int(math.floor(z1 / self._cell_size))
+        j2 = int(math.floor(z2 / self._cell_size))
+        return [(i, j) for i in range(i1, i2 + 1) for j in range(j1, j2 + 1)]
+
+
+def _segmentDistance(x: float, z: float, x1: float, z1: float, x2: float, z2: float) -> float:
+    dx = x2 - x1
+    dz = z2 - z1
+    length2 = dx * dx + dz * dz
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, ((x - x1) * dx + (z - z1) * dz) / length2))
+    return math.hypot(x - x1 - t * dx, z - z1 - t * dz)
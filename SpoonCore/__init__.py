@@ -0,0 +1,3 @@
+# Copyright (c) 2023 5@xes
+# Spoon Anti-Warping core : geometry code without any dependency on Cura / Uranium
+# so it can be used (and measured) outside of the application.
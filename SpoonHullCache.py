@@ -0,0 +1,119 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Cache of the 2D convex hull, of the adhesion area and of the first layer footprint of the parent nodes.
+#
+# An entry is kept while the mesh data and the world transformation of the node are the same. Every change of a
+# setting value in the global, extruder or per model stacks clears the cache (horizontal expansion, brim width ...).
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import weakref
+
+from typing import Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+from cura.CuraApplication import CuraApplication
+
+from UM.Math.Polygon import Polygon
+from UM.Scene.SceneNode import SceneNode
+
+from .SpoonCore.Footprint import firstLayerFootprint
+
+
+class SpoonHullCache:
+    def __init__(self) -> None:
+        self._entries = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+        self._connected_stacks = weakref.WeakSet()
+        self._hits = 0
+        self._misses = 0
+
+        self._application = CuraApplication.getInstance()
+        self._application.globalContainerStackChanged.connect(self._onGlobalStackChanged)
+        self._onGlobalStackChanged()
+
+    def getConvexHull(self, node: SceneNode) -> Optional[Polygon]:
+        """2D convex hull of the node mesh (_compute2DConvexHull)."""
+        return self._get(node, "hull", lambda: node.callDecoration("_compute2DConvexHull"))
+
+    def getAdhesionArea(self, node: SceneNode) -> Optional[Polygon]:
+        """Convex hull of the node with the adhesion margin (getAdhesionArea)."""
+        return self._get(node, "adhesion", lambda: node.callDecoration("getAdhesionArea"))
+
+    def getFootprint(self, node: SceneNode, layer_height: float) -> List[np.ndarray]:
+        """Contact polygons of the node on the build plate, cut in the middle of the first layer."""
+        return self._get(node, ("footprint", layer_height), lambda: self._computeFootprint(node, layer_height))
+
+    def getCachedFootprint(self, node: SceneNode, layer_height: float) -> Optional[List[np.ndarray]]:
+        """Footprint of the node if it is in the cache, else None (computed elsewhere and given by storeFootprint)."""
+        values = self._values(node)
+        kind = ("footprint", layer_height)
+        if kind not in values:
+            return None
+        self._hits += 1
+        return values[kind]
+
+    def storeFootprint(self, node: SceneNode, layer_height: float, loops: List[np.ndarray]) -> None:
+        self._misses += 1
+        self._values(node)[("footprint", layer_height)] = loops
+
+    def invalidate(self, node: Optional[SceneNode] = None) -> None:
+        """Remove the entry of a node, or all the entries."""
+        if node is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(node, None)
+
+    def getStats(self) -> Dict[str, int]:
+        return {"hits": self._hits, "misses": self._misses, "entries": len(self._entries)}
+
+    def resetStats(self) -> None:
+        self._hits = 0
+        self._misses = 0
+
+    def _values(self, node: SceneNode) -> Dict[Hashable, object]:
+        mesh_data = node.getMeshData()
+        transformation = node.getWorldTransformation().getData().tobytes()
+
+        entry = self._entries.get(node)
+        if entry is None or entry[0] is not mesh_data or entry[1] != transformation:
+            entry = (mesh_data, transformation, {})
+            self._entries[node] = entry
+            self._connectStack(node.callDecoration("getStack"))
+        return entry[2]
+
+    def _get(self, node: SceneNode, kind: Hashable, compute: Callable):
+        values = self._values(node)
+        if kind in values:
+            self._hits += 1
+            return values[kind]
+
+        self._misses += 1
+        values[kind] = compute()
+        return values[kind]
+
+    def _computeFootprint(self, node: SceneNode, layer_height: float) -> List[np.ndarray]:
+        mesh_data = node.getMeshData()
+        if mesh_data is None or mesh_data.getVertices() is None:
+            return []
+        indices = mesh_data.getIndices() if mesh_data.hasIndices() else None
+        return firstLayerFootprint(mesh_data.getVertices(), indices, node.getWorldTransformation().getData(), layer_height)
+
+    def _onGlobalStackChanged(self) -> None:
+        self.invalidate()
+        global_stack = self._application.getGlobalContainerStack()
+        if global_stack is None:
+            return
+        self._connectStack(global_stack)
+        for extruder_stack in global_stack.extruderList:
+            self._connectStack(extruder_stack)
+
+    def _connectStack(self, stack) -> None:
+        if stack is None or stack in self._connected_stacks:
+            return
+        stack.propertyChanged.connect(self._onStackPropertyChanged)
+        self._connected_stacks.add(stack)
+
+    def _onStackPropertyChanged(self, key: str, property_name: str) -> None:
+        if property_name == "value":
+            self.invalidate()
@@ -0,0 +1,88 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Scope grouping the notifications sent for every tab (scene changed and tool properties changed).
+#
+#   with self._notifications:
+#       ... create the tabs
+#
+# Inside the scope the notifications are only counted, one sceneChanged and one propertyChanged are emitted when the
+# outermost scope ends. Outside of a scope the notifications are emitted at once. With a Profiler, the time of the
+# slots of the sceneChanged signal is measured as the scene_changed phase.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+from typing import Optional, TYPE_CHECKING
+
+from UM.Logger import Logger
+from UM.Scene.Scene import Scene
+from UM.Scene.SceneNode import SceneNode
+from UM.Signal import Signal
+
+if TYPE_CHECKING:
+    from .SpoonCore.Profiler import Profiler
+
+
+class SpoonNotificationBatch:
+    def __init__(self, scene: Scene, property_changed: Signal, profiler: Optional["Profiler"] = None) -> None:
+        self._scene = scene
+        self._property_changed = property_changed
+        self._profiler = profiler
+        self._depth = 0
+        self._scene_pending = False
+        self._property_pending = False
+        # Notifications not emitted in the current batch and since the creation
+        self._batch_suppressed = 0
+        self._suppressed = 0
+
+    def __enter__(self) -> "SpoonNotificationBatch":
+        if self._depth == 0:
+            self._batch_suppressed = 0
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._depth -= 1
+        if self._depth > 0:
+            return
+
+        if self._batch_suppressed:
+            Logger.log('d', "Spoon notifications : {} grouped in one".format(self._batch_suppressed))
+        if self._scene_pending:
+            self._scene_pending = False
+            self._emitSceneChanged(self._scene.getRoot())
+        if self._property_pending:
+            self._property_pending = False
+            self._property_changed.emit()
+
+    def sceneChanged(self, node: Optional[SceneNode] = None) -> None:
+        if self._depth == 0:
+            self._emitSceneChanged(node if node is not None else self._scene.getRoot())
+            return
+        self._scene_pending = True
+        self._count()
+
+    def propertyChanged(self) -> None:
+        if self._depth == 0:
+            self._property_changed.emit()
+            return
+        self._property_pending = True
+        self._count()
+
+    def getSuppressedCount(self) -> int:
+        """Number of notifications not emitted since the creation."""
+        return self._suppressed
+
+    def getBatchSuppressedCount(self) -> int:
+        """Number of notifications not emitted in the current (or last) batch."""
+        return self._batch_suppressed
+
+    def _emitSceneChanged(self, node: SceneNode) -> None:
+        if self._profiler is None:
+            self._scene.sceneChanged.emit(node)
+            return
+        with self._profiler.span("scene_changed"):
+            self._scene.sceneChanged.emit(node)
+
+    def _count(self) -> None:
+        self._batch_suppressed += 1
+        self._suppressed += 1
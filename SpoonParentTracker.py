@@ -0,0 +1,138 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Follow the transformation of the parents of the spoon tabs.
+#
+# transformationChanged of every parent with tabs is connected. The changed parents are collected and given to a
+# callback once the transformation is finished : after a delay without change and when no mouse button is pressed
+# (end of the drag of a tool handle). A move on the build plate (translation in X / Z and rotation around Y) is
+# followed by the tabs without any rebuild.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+try:
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+except ImportError:
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+
+import weakref
+
+import numpy as np
+
+from typing import Callable, List
+
+from UM.Scene.Scene import Scene
+from UM.Scene.SceneNode import SceneNode
+
+from .SpoonSceneIndex import SpoonSceneIndex
+
+
+def isPlateMove(previous: np.ndarray, current: np.ndarray, tolerance: float = 1e-5) -> bool:
+    """True when current is previous moved on the build plate : translation in X / Z and rotation around Y."""
+    try:
+        delta = current @ np.linalg.inv(previous)
+    except np.linalg.LinAlgError:
+        return False
+    rotation = delta[:3, :3]
+    if abs(rotation[1, 1] - 1) > tolerance or abs(delta[1, 3]) > tolerance:
+        return False
+    if np.abs(rotation[[0, 1, 1, 2], [1, 0, 2, 1]]).max() > tolerance:
+        return False
+    # No scale and no mirror
+    return bool(np.allclose(rotation @ rotation.T, np.identity(3), atol=tolerance)) and np.linalg.det(rotation) > 0
+
+
+class SpoonParentTracker:
+    def __init__(self, scene: Scene, scene_index: SpoonSceneIndex, on_parents_changed: Callable[[List[SceneNode]], None], delay: int = 300) -> None:
+        """
+        param on_parents_changed: Called with the parents transformed (not only moved on the build plate) since the last call.
+        param delay: Time in ms without transformation before the call.
+        """
+        self._scene = scene
+        self._scene_index = scene_index
+        self._on_parents_changed = on_parents_changed
+        self._enabled = True
+
+        # World transformation of the parents when their tabs were last placed
+        self._transformations = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
+        self._changed = weakref.WeakSet()
+        self._connections_dirty = True
+
+        self._timer = QTimer()
+        self._timer.setInterval(delay)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._onTimeout)
+
+        scene.sceneChanged.connect(self._onSceneChanged)
+
+    def setEnabled(self, enabled: bool) -> None:
+        self._enabled = enabled
+        if enabled:
+            self._connections_dirty = True
+            self._timer.start()
+        else:
+            self._disconnectAll()
+
+    def isEnabled(self) -> bool:
+        return self._enabled
+
+    def acceptTransformation(self, parent: SceneNode) -> None:
+        """The tabs of the parent are placed for its current transformation."""
+        if parent in self._transformations:
+            self._transformations[parent] = parent.getWorldTransformation().getData().copy()
+        self._changed.discard(parent)
+
+    def _onSceneChanged(self, source: SceneNode) -> None:
+        # Tabs added or removed : the connections are updated after the delay
+        if self._enabled:
+            self._connections_dirty = True
+            if not self._timer.isActive():
+                self._timer.start()
+
+    def _onTransformationChanged(self, source: SceneNode) -> None:
+        # The signal of the parent is also emitted for the transformation of its children (the tabs)
+        if source not in self._transformations:
+            return
+        self._changed.add(source)
+        self._timer.start()
+
+    def _onTimeout(self) -> None:
+        if QApplication.mouseButtons():
+            # Still dragging
+            self._timer.start()
+            return
+
+        if self._connections_dirty:
+            self._updateConnections()
+
+        changed = []
+        for parent in list(self._changed):
+            current = parent.getWorldTransformation().getData().copy()
+            previous = self._transformations.get(parent)
+            self._transformations[parent] = current
+            if previous is not None and not isPlateMove(previous, current):
+                changed.append(parent)
+        self._changed.clear()
+
+        if changed:
+            self._on_parents_changed(changed)
+
+    def _updateConnections(self) -> None:
+        self._connections_dirty = False
+        parents = set(self._scene_index.getParentsWithTabs())
+        for parent in list(self._transformations.keys()):
+            if parent not in parents:
+                parent.transformationChanged.disconnect(self._onTransformationChanged)
+                del self._transformations[parent]
+        for parent in parents:
+            if parent not in self._transformations:
+                parent.transformationChanged.connect(self._onTransformationChanged)
+                self._transformations[parent] = parent.getWorldTransformation().getData().copy()
+
+    def _disconnectAll(self) -> None:
+        self._timer.stop()
+        for parent in list(self._transformations.keys()):
+            parent.transformationChanged.disconnect(self._onTransformationChanged)
+        self._transformations.clear()
+        self._changed.clear()
@@ -0,0 +1,58 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Values of the container stacks used to place the tabs, read once for a manual click or an automatic run.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+from cura.CuraApplication import CuraApplication
+
+from UM.Logger import Logger
+
+from .SpoonCore.Geometry import NOZZLE_CHORD_RATIO, segmentAngle
+
+
+class SpoonPlacementContext:
+    def __init__(self, size: float, nb_layer: int, chord_tolerance: float) -> None:
+        """
+        param size: Diameter of the tab in mm.
+        param nb_layer: Number of layers of the tab.
+        param chord_tolerance: Chord tolerance of the round part in mm ( 0 = a tenth of the Nozzle size ).
+        """
+        application = CuraApplication.getInstance()
+        # Number of getProperty calls, for the profiling
+        self.stack_lookups = 0
+        # This function can be triggered in the middle of a machine change, so do not proceed if the machine change has not done yet.
+        self.global_stack = application.getGlobalContainerStack()
+        self.extruder_stack = application.getExtruderManager().getActiveExtruderStacks()[0]
+        self.active_build_plate = application.getMultiBuildPlateModel().activeBuildPlate
+
+        # get layer_height_0 used to define pastille height
+        layer_height_0 = self._getProperty(self.extruder_stack, "layer_height_0")
+        layer_height = self._getProperty(self.extruder_stack, "layer_height")
+        self.layer_height_0 = layer_height_0
+        self.spoon_height = (layer_height_0 * 1.2) + (layer_height * (nb_layer - 1))
+
+        # Number of segments of the round part according to the chord tolerance
+        if chord_tolerance <= 0:
+            chord_tolerance = self._getProperty(self.extruder_stack, "machine_nozzle_size") * NOZZLE_CHORD_RATIO
+        self.segment_angle = segmentAngle(size, chord_tolerance)
+
+        self.adhesion_type = self._getProperty(self.global_stack, "adhesion_type")
+        self._adhesion_fixed = False
+
+    def _getProperty(self, stack, key: str):
+        self.stack_lookups += 1
+        return stack.getProperty(key, "value")
+
+    def needAdhesionFix(self) -> bool:
+        """True when the adhesion must be forced to skirt and this has not been done in this context."""
+        return self.adhesion_type == "none" and not self._adhesion_fixed
+
+    def fixAdhesion(self) -> None:
+        """Define temporary adhesion_type=skirt to force boundary calculation, only once per context."""
+        if not self.needAdhesionFix():
+            return
+        self.global_stack.setProperty("adhesion_type", "value", "skirt")
+        Logger.log('d', "Info adhesion_type --> " + str(self.adhesion_type))
+        self.adhesion_type = "skirt"
+        self._adhesion_fixed = True
@@ -0,0 +1,138 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Index of the sliceable nodes of the scene by role (normal / support / infill / cutting / anti_overhang / spoon)
+# and of the spoon tabs by parent.
+#
+# The index is maintained from the sceneChanged signal : only the changed nodes (and the new ones below them)
+# are evaluated again, so the stack properties of a node are read once and not at every scene scan.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import weakref
+
+from typing import Dict, Iterable, List, Optional
+
+from UM.Scene.Scene import Scene
+from UM.Scene.SceneNode import SceneNode
+from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
+
+from .SpoonCore import Roles
+
+
+class SpoonSceneIndex:
+    ROLE_NORMAL = Roles.ROLE_NORMAL
+    ROLE_SUPPORT = Roles.ROLE_SUPPORT
+    ROLE_INFILL = Roles.ROLE_INFILL
+    ROLE_CUTTING = Roles.ROLE_CUTTING
+    ROLE_ANTI_OVERHANG = Roles.ROLE_ANTI_OVERHANG
+    ROLE_SPOON = Roles.ROLE_SPOON
+
+    # Setting defining the role, by order of priority
+    _ROLE_SETTINGS = Roles.ROLE_SETTINGS
+
+    def __init__(self, scene: Scene) -> None:
+        self._scene = scene
+        self._roles = {}  # type: Dict[SceneNode, Optional[str]]
+        self._pending = {scene.getRoot()}
+        self._tabs_by_parent = None  # type: Optional[Dict[SceneNode, List[SceneNode]]]
+        self._connected_stacks = weakref.WeakSet()
+        # Number of stack reads since the creation
+        self._stack_lookups = 0
+
+        scene.sceneChanged.connect(self._onSceneChanged)
+
+    def getRole(self, node: SceneNode) -> Optional[str]:
+        """Role of a node, None when the node is not a sliceable node of the scene."""
+        self._update()
+        if not self._isInScene(node):
+            return None
+        if node not in self._roles:
+            self._roles[node] = self._readRole(node)
+        return self._roles[node]
+
+    def getNodes(self, roles: Iterable[str]) -> List[SceneNode]:
+        """All the nodes of the scene with one of these roles."""
+        self._update()
+        roles = set(roles)
+        return [node for node, role in self._roles.items() if role in roles and self._isInScene(node)]
+
+    def getTabs(self, parent: SceneNode) -> List[SceneNode]:
+        """Spoon tabs attached to a parent node."""
+        return list(self._tabsByParent().get(parent, []))
+
+    def getAllTabs(self) -> List[SceneNode]:
+        return [tab for tabs in self._tabsByParent().values() for tab in tabs]
+
+    def getParentsWithTabs(self) -> List[SceneNode]:
+        return [parent for parent in self._tabsByParent() if parent is not self._scene.getRoot()]
+
+    def getStackLookups(self) -> int:
+        """Number of stack reads (getStack and getProperty) done by the index since its creation."""
+        return self._stack_lookups
+
+    def invalidate(self) -> None:
+        """Read again the role of all the nodes."""
+        self._roles.clear()
+        self._pending.add(self._scene.getRoot())
+        self._tabs_by_parent = None
+
+    def _tabsByParent(self) -> Dict[SceneNode, List[SceneNode]]:
+        self._update()
+        if self._tabs_by_parent is None:
+            self._tabs_by_parent = {}
+            for node in self.getNodes((self.ROLE_SPOON, )):
+                self._tabs_by_parent.setdefault(node.getParent(), []).append(node)
+        return self._tabs_by_parent
+
+    def _onSceneChanged(self, node: SceneNode) -> None:
+        self._pending.add(node)
+        self._tabs_by_parent = None
+
+    def _onStackPropertyChanged(self, key: str, property_name: str) -> None:
+        # Mesh type changed in the per model settings
+        if property_name == "value" and key in dict(self._ROLE_SETTINGS):
+            self.invalidate()
+
+    def _update(self) -> None:
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = set()
+
+        for changed_node in pending:
+            if not self._isInScene(changed_node):
+                self._roles.pop(changed_node, None)
+                continue
+            for node in DepthFirstIterator(changed_node):
+                if node is changed_node or node not in self._roles:
+                    self._roles[node] = self._readRole(node)
+
+        # Removed nodes
+        for node in [node for node in self._roles if not self._isInScene(node)]:
+            del self._roles[node]
+
+    def _readRole(self, node: SceneNode) -> Optional[str]:
+        if not node.callDecoration("isSliceable"):
+            return None
+        node_stack = node.callDecoration("getStack")
+        self._stack_lookups += 1
+        if not node_stack:
+            return None
+
+        if node_stack not in self._connected_stacks:
+            node_stack.propertyChanged.connect(self._onStackPropertyChanged)
+            self._connected_stacks.add(node_stack)
+
+        for key, role in self._ROLE_SETTINGS:
+            self._stack_lookups += 1
+            if node_stack.getProperty(key, "value"):
+                return role
+        return self.ROLE_NORMAL
+
+    def _isInScene(self, node: SceneNode) -> bool:
+        root = self._scene.getRoot()
+        while node is not None:
+            if node is root:
+                return True
+            node = node.getParent()
+        return False
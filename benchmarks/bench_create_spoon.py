@@ -0,0 +1,176 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Benchmark of the spoon generation : per vertex Python loop (up to V1.1.1) against the NumPy engine of SpoonCore.Geometry
+#
+#   python benchmarks/bench_create_spoon.py [--repeat 200]
+#
+# The reference loop is a copy of the former SpoonAntiWarping._createSpoon without MeshBuilder, the two
+# implementations are also compared vertex by vertex. The top surface of the indexed mesh must have the same area as
+# the one of the triangle soup.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SpoonCore.Geometry import createSpoonArrays, createSpoonIndexedArrays, tangentialPointOnCircle
+
+
+def legacyCreateSpoon(size, length, width, nb, lg, He, direct_shape, angle):
+    r = size / 2
+    sup = -lg + He
+    l = -lg
+    rng = int(360 / nb)
+    ang = math.radians(nb)
+    s_sup = width / 2
+    s_inf = s_sup
+    if direct_shape:
+        result = tangentialPointOnCircle([(r+length), 0], r, [-s_sup, s_sup])
+        max_val = result[1]
+        max_l = result[0]
+    else:
+        max_val = s_sup
+        max_l = length
+    nbv = 20
+    verts = [
+        [-s_inf, l,  s_inf], [-s_sup,  sup,  s_sup], [ max_l,  sup,  max_val], [ max_l, l,  max_val],
+        [-s_sup,  sup, -s_sup], [-s_inf, l, -s_inf], [ max_l, l, -max_val], [ max_l,  sup, -max_val],
+        [ max_l, l, -max_val], [-s_inf, l, -s_inf], [-s_inf, l,  s_inf], [ max_l, l,  max_val],
+        [-s_sup,  sup, -s_sup], [ max_l,  sup, -max_val], [ max_l,  sup,  max_val], [-s_sup,  sup,  s_sup],
+        [-s_inf, l,  s_inf], [-s_inf, l, -s_inf], [-s_sup,  sup, -s_sup], [-s_sup,  sup,  s_sup]
+    ]
+    nbvr = 0
+    remain1 = 0
+    remain2 = 0
+    for i in range(0, rng):
+        if (r*math.cos((i+1)*ang)) >= 0 or (abs(r*math.sin((i+1)*ang)) > max_val and abs(r*math.sin(i*ang)) > max_val):
+            nbvr += 1
+            verts.append([length+r, sup, 0])
+            verts.append([length+r+r*math.cos((i+1)*ang), sup, r*math.sin((i+1)*ang)])
+            verts.append([length+r+r*math.cos(i*ang), sup, r*math.sin(i*ang)])
+            verts.append([length+r+r*math.cos(i*ang), sup, r*math.sin(i*ang)])
+            verts.append([length+r+r*math.cos((i+1)*ang), sup, r*math.sin((i+1)*ang)])
+            verts.append([length+r+r*math.cos((i+1)*ang), l, r*math.sin((i+1)*ang)])
+            verts.append([length+r+r*math.cos((i+1)*ang), l, r*math.sin((i+1)*ang)])
+            verts.append([length+r+r*math.cos(i*ang), l, r*math.sin(i*ang)])
+            verts.append([length+r+r*math.cos(i*ang), sup, r*math.sin(i*ang)])
+            verts.append([length+r, l, 0])
+            verts.append([length+r+r*math.cos(i*ang), l, r*math.sin(i*ang)])
+            verts.append([length+r+r*math.cos((i+1)*ang), l, r*math.sin((i+1)*ang)])
+        else:
+            if remain1 == 0:
+                remain1 = i*ang
+                remain2 = 2*math.pi-remain1
+                lgh = max_l if direct_shape else length
+                nbvr += 1
+                verts.append([length+r, sup, 0])
+                verts.append([lgh, sup, max_val])
+                verts.append([length+r+r*math.cos(remain1), sup, r*math.sin(remain1)])
+                verts.append([length+r+r*math.cos(remain1), sup, r*math.sin(remain1)])
+                verts.append([lgh, sup, max_val])
+                verts.append([lgh, l, max_val])
+                verts.append([lgh, l, max_val])
+                verts.append([length+r+r*math.cos(remain1), l, r*math.sin(remain1)])
+                verts.append([length+r+r*math.cos(remain1), sup, r*math.sin(remain1)])
+                verts.append([length+r, l, 0])
+                verts.append([length+r+r*math.cos(remain1), l, r*math.sin(remain1)])
+                verts.append([lgh, l, max_val])
+                nbvr += 1
+                verts.append([length+r, sup, 0])
+                verts.append([length+r+r*math.cos(remain2), sup, r*math.sin(remain2)])
+                verts.append([lgh, sup, -max_val])
+                verts.append([lgh, sup, -max_val])
+                verts.append([length+r+r*math.cos(remain2), sup, r*math.sin(remain2)])
+                verts.append([length+r+r*math.cos(remain2), l, r*math.sin(remain2)])
+                verts.append([length+r+r*math.cos(remain2), l, r*math.sin(remain2)])
+                verts.append([lgh, l, -max_val])
+                verts.append([lgh, sup, -max_val])
+                verts.append([length+r, l, 0])
+                verts.append([lgh, l, -max_val])
+                verts.append([length+r+r*math.cos(remain2), l, r*math.sin(remain2)])
+    verts.append([max_l, sup, max_val])
+    verts.append([length+r, sup, 0])
+    verts.append([max_l, sup, -max_val])
+    verts.append([max_l, l, -max_val])
+    verts.append([length+r, l, 0])
+    verts.append([max_l, l, max_val])
+    tot = nbvr * 12 + 6 + nbv
+    Tverts = []
+    for i in range(0, tot):
+        xr = (verts[i][0] * math.cos(angle)) - (verts[i][2] * math.sin(angle))
+        yr = (verts[i][0] * math.sin(angle)) + (verts[i][2] * math.cos(angle))
+        zr = verts[i][1]
+        Tverts.append([xr, zr, yr])
+    indices = []
+    for i in range(0, nbv, 4):
+        indices.append([i, i+2, i+1])
+        indices.append([i, i+3, i+2])
+    for i in range(nbv, tot, 3):
+        indices.append([i, i+1, i+2])
+    return np.asarray(Tverts, dtype=np.float32), np.asarray(indices, dtype=np.int32)
+
+
+# Diameter, Length, Width, Increment angle, length, height, direct shape, angle
+CASES = [
+    (10.0, 2.0, 2.0, 10, 0.0, 0.36, False, 0.0),
+    (10.0, 2.0, 2.0, 10, 12.5, 0.36, True, 1.2),
+    (3.0, 0.0, 0.0, 10, 0.0, 0.24, False, -2.5),
+    (40.0, 8.0, 6.0, 10, 3.0, 0.6, False, 3.9),
+    (40.0, 8.0, 6.0, 10, 3.0, 0.6, True, 0.7),
+    (10.0, 5.0, 10.0, 10, 0.0, 0.36, False, 2.0),
+    (10.0, 2.0, 2.0, 5, 0.0, 0.36, True, 4.4),
+    (10.0, 8.0, 0.0, 10, 0.0, 0.36, True, 0.0),
+    (10.0, 8.0, 0.0, 10, 0.0, 0.36, False, 0.0),
+]
+
+
+def topArea(verts, indices, height):
+    """Area of the triangles lying on the top of the spoon, seen from above."""
+    triangles = verts[indices].astype(np.float64)
+    triangles = triangles[np.all(np.abs(triangles[:, :, 1] - height) < 1e-4, axis = 1)]
+    a = triangles[:, 1] - triangles[:, 0]
+    b = triangles[:, 2] - triangles[:, 0]
+    return np.abs(a[:, 0] * b[:, 2] - a[:, 2] * b[:, 0]).sum() / 2
+
+
+def _timeIt(function, case, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(*case)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Spoon generation benchmark")
+    parser.add_argument("--repeat", type = int, default = 200, help = "Number of tabs generated per case")
+    args = parser.parse_args()
+
+    print("{:<48} {:>12} {:>12} {:>8} {:>11} {:>13}".format("case", "loop us/tab", "numpy us/tab", "speedup", "soup bytes", "indexed bytes"))
+    for case in CASES:
+        ref_verts, ref_indices = legacyCreateSpoon(*case)
+        verts, indices = createSpoonArrays(*case)
+        if ref_verts.shape != verts.shape or not np.array_equal(ref_indices, indices) or not np.allclose(ref_verts, verts, atol = 1e-5):
+            print("Mismatch for case {}".format(case))
+            return 1
+
+        loop_time = _timeIt(legacyCreateSpoon, case, args.repeat)
+        numpy_time = _timeIt(createSpoonArrays, case, args.repeat)
+        indexed_verts, indexed_indices = createSpoonIndexedArrays(*case)
+        height = case[5] - case[4]
+        if not math.isclose(topArea(verts, indices, height), topArea(indexed_verts, indexed_indices, height), rel_tol = 1e-4):
+            print("Top area mismatch between the soup and the indexed mesh for case {}".format(case))
+            return 1
+        print("{:<48} {:>12.1f} {:>12.1f} {:>7.1f}x {:>11} {:>13}".format(str(case[:4] + case[6:7]), loop_time * 1e6, numpy_time * 1e6, loop_time / numpy_time,
+                                                                          verts.nbytes + indices.nbytes, indexed_verts.nbytes + indexed_indices.nbytes))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
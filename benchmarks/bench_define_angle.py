@@ -0,0 +1,138 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Benchmark of the tab orientation : nearest hull point loop (up to V1.1.1) against SpoonCore.Polygon.outwardAngle
+#
+#   python benchmarks/bench_define_angle.py [--repeat 20]
+#
+# The reference loop is a copy of the former SpoonAntiWarping._defineAngle with tuples instead of UM.Math.Vector.
+# The angles of the solver must match the ones of this loop without its rounding of the distances to the millimetre
+# (every edge tested with the exact distance), within ANGLE_TOLERANCE : the solver averages the edges at less than
+# 0.05 mm of the nearest one. The largest differences with both loops are printed.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SpoonCore.Polygon import outwardAngle
+
+
+def _closestPointOnSegment(segment, point):
+    p, q = segment
+    pq_distance = math.hypot(q[0] - p[0], q[1] - p[1])
+    if pq_distance == 0:
+        return p
+    u = ((point[0] - p[0]) * (q[0] - p[0]) + (point[1] - p[1]) * (q[1] - p[1])) / pq_distance ** 2
+    if u < 0:
+        return p
+    elif u > 1:
+        return q
+    return (p[0] + u * (q[0] - p[0]), p[1] + u * (q[1] - p[1]))
+
+
+def legacyDefineAngle(points, pick):
+    min_lght = 9999999.999
+    Id = 0
+    Start_Id = 0
+    End_Id = 0
+    Select_position = None
+    for point in points:
+        lght = round(math.hypot(pick[0] - point[0], pick[1] - point[1]), 0)
+        if lght < min_lght and lght > 0:
+            min_lght = lght
+            Start_Id = Id
+            Select_position = (point[0], point[1])
+        if lght == min_lght and lght > 0:
+            if Id > End_Id + 1:
+                Start_Id = Id
+                End_Id = Id
+            else:
+                End_Id = Id
+        Id += 1
+    if Start_Id == End_Id:
+        for p1, p2 in ((points[Start_Id], points[(Start_Id + 1) % len(points)]), (points[Start_Id - 1], points[Start_Id])):
+            pt_r = _closestPointOnSegment(((p1[0], p1[1]), (p2[0], p2[1])), pick)
+            lght = round(math.hypot(pick[0] - pt_r[0], pick[1] - pt_r[1]), 0)
+            if lght < min_lght and lght > 0:
+                Select_position = pt_r
+    else:
+        Id = int(Start_Id + 0.5 * (End_Id - Start_Id))
+        Select_position = (points[Id][0], points[Id][1])
+    ux = pick[0] - Select_position[0]
+    uz = pick[1] - Select_position[1]
+    norm = math.hypot(ux, uz)
+    LeSin = math.asin(uz / norm)
+    return math.pi + LeSin if ux >= 0 else -LeSin
+
+
+def exactDefineAngle(points, pick):
+    """Legacy angle with the exact nearest point of all the edges, instead of the rounded nearest vertex."""
+    best = None
+    min_lght = math.inf
+    for index in range(len(points)):
+        p1 = points[index]
+        p2 = points[(index + 1) % len(points)]
+        pt_r = _closestPointOnSegment(((p1[0], p1[1]), (p2[0], p2[1])), pick)
+        lght = math.hypot(pick[0] - pt_r[0], pick[1] - pt_r[1])
+        if lght < min_lght:
+            min_lght = lght
+            best = pt_r
+    ux = pick[0] - best[0]
+    uz = pick[1] - best[1]
+    norm = math.hypot(ux, uz)
+    LeSin = math.asin(uz / norm)
+    return math.pi + LeSin if ux >= 0 else -LeSin
+
+
+# Degrees, the averaged edges of a 100 points hull turn the angle by about 2 degrees
+ANGLE_TOLERANCE = 3.0
+
+
+def _angleDifference(a, b):
+    return abs((a - b + math.pi) % (2 * math.pi) - math.pi)
+
+
+def _hull(nb_points):
+    angles = np.linspace(0, 2 * math.pi, nb_points, endpoint = False)
+    return np.column_stack((60 * np.cos(angles), 35 * np.sin(angles)))
+
+
+def _timeIt(function, points, picks, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for pick in picks:
+            function(points, pick)
+    return (time.perf_counter() - start) / (repeat * len(picks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Tab orientation benchmark")
+    parser.add_argument("--repeat", type = int, default = 20, help = "Number of runs per hull")
+    args = parser.parse_args()
+
+    picks = [(40.0, 5.0), (-10.0, -30.0), (0.0, 30.0), (-55.0, 2.0)]
+    print("{:>10} {:>14} {:>14} {:>8} {:>10} {:>12}".format("points", "loop us/tab", "numpy us/tab", "speedup", "deg exact", "deg rounded"))
+    for nb_points in (10, 100, 1000, 10000):
+        points = _hull(nb_points)
+        angles = [outwardAngle(points, pick) for pick in picks]
+        exact = max(_angleDifference(angle, exactDefineAngle(points, pick)) for angle, pick in zip(angles, picks))
+        rounded = max(_angleDifference(angle, legacyDefineAngle(points, pick)) for angle, pick in zip(angles, picks))
+        if math.degrees(exact) > ANGLE_TOLERANCE:
+            print("Angle mismatch of {:.2f} degrees with the exact loop for {} points".format(math.degrees(exact), nb_points))
+            return 1
+        loop_time = _timeIt(legacyDefineAngle, points, picks, args.repeat)
+        numpy_time = _timeIt(outwardAngle, points, picks, args.repeat)
+        print("{:>10} {:>14.1f} {:>14.1f} {:>7.1f}x {:>10.2f} {:>12.2f}".format(nb_points, loop_time * 1e6, numpy_time * 1e6, loop_time / numpy_time,
+                                                                               math.degrees(exact), math.degrees(rounded)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
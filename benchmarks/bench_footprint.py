@@ -0,0 +1,70 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Benchmark of the first layer footprint of SpoonCore.Footprint on tall meshes
+#
+#   python benchmarks/bench_footprint.py [--repeat 5]
+#
+# The test part is a tube (outer and inner wall) made of thin rings stacked on each other, so the number of
+# triangles grows with the height while the bottom band stays the same.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SpoonCore.Footprint import bottomBandTriangles, firstLayerFootprint
+
+
+def tubeMesh(segments, rings, ring_height = 0.1, outer = 30.0, inner = 10.0):
+    """Indexed tube mesh (vertices, indices) of rings * segments * 4 triangles."""
+    angles = np.linspace(0, 2 * math.pi, segments, endpoint = False)
+    heights = np.arange(rings + 1) * ring_height
+    walls = []
+    for radius in (outer, inner):
+        x = np.tile(radius * np.cos(angles), rings + 1)
+        z = np.tile(radius * np.sin(angles), rings + 1)
+        y = np.repeat(heights, segments)
+        walls.append(np.column_stack((x, y, z)))
+    vertices = np.vstack(walls)
+
+    ring = np.arange(segments)
+    following = (ring + 1) % segments
+    quads = []
+    for wall in range(2):
+        offset = wall * segments * (rings + 1)
+        for level in range(rings):
+            a = offset + level * segments + ring
+            b = offset + level * segments + following
+            quads.append(np.column_stack((a, b, b + segments)))
+            quads.append(np.column_stack((a, b + segments, a + segments)))
+    return vertices, np.vstack(quads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "First layer footprint benchmark")
+    parser.add_argument("--repeat", type = int, default = 5, help = "Number of footprints computed per mesh")
+    args = parser.parse_args()
+
+    print("{:>12} {:>14} {:>10} {:>7} {:>8}".format("triangles", "band triangles", "ms", "loops", "points"))
+    for rings in (10, 100, 1000, 2500):
+        vertices, indices = tubeMesh(200, rings)
+        heights = vertices[:, 1]
+        band = bottomBandTriangles(heights, indices, heights.min() + 0.1)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            loops = firstLayerFootprint(vertices, indices, None, 0.2)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print("{:>12} {:>14} {:>10.1f} {:>7} {:>8}".format(len(indices), len(band), elapsed * 1e3, len(loops), sum(len(loop) for loop in loops)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Benchmark of the placement planner of SpoonCore.Planner on a plate with many parts
+#
+#   python benchmarks/bench_planner.py [--parts 200] [--workers 1 2 4 8]
+#
+# Every part is a tube like in bench_footprint.py, the planner computes the footprint, the tab positions and angles
+# and the merged mesh of each part. The plate is planned sequentially, then with thread and process pools.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import argparse
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_footprint import tubeMesh
+from SpoonCore.Geometry import NOZZLE_CHORD_RATIO, createSpoonIndexedArrays, segmentAngle
+from SpoonCore.Planner import PlanTask, runPlanner
+
+
+def plateTasks(parts, rings):
+    vertices, indices = tubeMesh(200, rings)
+    template = createSpoonIndexedArrays(10.0, 2.0, 2.0, segmentAngle(10.0, 0.4 * NOZZLE_CHORD_RATIO), 0, 0.36, False, 0)
+    return [PlanTask(key, 10.0, vertices = vertices, indices = indices, layer_height = 0.2, template = template) for key in range(parts)]
+
+
+def _timeIt(tasks, executor):
+    start = time.perf_counter()
+    results = runPlanner(tasks, executor)
+    return time.perf_counter() - start, sum(len(result.placements) for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Placement planner benchmark")
+    parser.add_argument("--parts", type = int, default = 200, help = "Number of parts on the plate")
+    parser.add_argument("--rings", type = int, default = 250, help = "Height of a part in rings of 1600 triangles")
+    parser.add_argument("--workers", type = int, nargs = "+", default = [2, 4, 8], help = "Pool sizes")
+    args = parser.parse_args()
+
+    tasks = plateTasks(args.parts, args.rings)
+    reference, nb_tabs = _timeIt(tasks, None)
+    print("{} parts, {} triangles per part, {} tabs, {} processors".format(args.parts, len(tasks[0].indices), nb_tabs, os.cpu_count()))
+    print("{:<10} {:>8} {:>10} {:>8}".format("pool", "workers", "s", "speedup"))
+    print("{:<10} {:>8} {:>10.3f} {:>7.2f}x".format("none", 1, reference, 1.0))
+    for name, pool in (("thread", ThreadPoolExecutor), ("process", ProcessPoolExecutor)):
+        for workers in args.workers:
+            with pool(max_workers = workers) as executor:
+                elapsed, _ = _timeIt(tasks, executor)
+            print("{:<10} {:>8} {:>10.3f} {:>7.2f}x".format(name, workers, elapsed, reference / elapsed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Benchmark of the ray cast of SpoonCore.Raycast used for the manual placement
+#
+#   python benchmarks/bench_raycast.py [--rays 200]
+#
+# The rays are cast on UV spheres of growing size, with the BVH and against all the triangles. The two results are
+# compared for every ray.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SpoonCore.Raycast import TriangleBVH, intersectTriangles
+
+
+def sphereMesh(rings, radius = 20.0):
+    """Indexed UV sphere (vertices, indices) of about 4 * rings * rings triangles."""
+    theta = np.linspace(0, math.pi, rings)
+    phi = np.linspace(0, 2 * math.pi, 2 * rings, endpoint = False)
+    theta, phi = np.meshgrid(theta, phi, indexing = "ij")
+    vertices = np.stack((np.sin(theta) * np.cos(phi), np.cos(theta), np.sin(theta) * np.sin(phi)), axis = -1).reshape(-1, 3) * radius
+
+    columns = 2 * rings
+    i, j = np.meshgrid(np.arange(rings - 1), np.arange(columns), indexing = "ij")
+    a = (i * columns + j).ravel()
+    b = (i * columns + (j + 1) % columns).ravel()
+    indices = np.concatenate((np.column_stack((a, a + columns, b)), np.column_stack((b, a + columns, b + columns))))
+    return vertices, indices
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Ray cast benchmark")
+    parser.add_argument("--rays", type = int, default = 200, help = "Number of rays per mesh")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    print("{:>10} {:>10} {:>10} {:>10} {:>9}".format("triangles", "build ms", "bvh ms", "brute ms", "mismatch"))
+    for rings in (50, 200, 500):
+        vertices, indices = sphereMesh(rings)
+        start = time.perf_counter()
+        bvh = TriangleBVH(vertices, indices)
+        build_time = time.perf_counter() - start
+
+        triangles = vertices[indices]
+        bvh_time = 0.0
+        brute_time = 0.0
+        mismatch = 0
+        for _ in range(args.rays):
+            origin = rng.normal(size = 3) * 50
+            direction = rng.normal(size = 3) * 0.3 - origin / 50
+
+            start = time.perf_counter()
+            t = bvh.intersect(origin, direction)
+            bvh_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            reference = float(intersectTriangles(triangles, origin, direction).min())
+            brute_time += time.perf_counter() - start
+
+            reference = reference if np.isfinite(reference) else None
+            if (t is None) != (reference is None) or (t is not None and abs(t - reference) > 1e-4 * max(1.0, reference)):
+                mismatch += 1
+
+        print("{:>10} {:>10.1f} {:>10.3f} {:>10.3f} {:>9}".format(len(indices), build_time * 1e3, bvh_time / args.rays * 1e3, brute_time / args.rays * 1e3, mismatch))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Benchmark of the collision avoidance of the automatic placement (SpoonCore.SpatialHash)
+#
+#   python benchmarks/bench_spatial_hash.py [--gap 6]
+#
+# Build plates of square parts separated by gap mm. The time per tab must stay about the same whatever the number of
+# parts, and the tabs kept must not overlap another part or another tab.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SpoonCore.Planner import PlanTask, runPlanner, tabDisc
+from SpoonCore.Polygon import containsPoint
+from SpoonCore.SpatialHash import SpatialHash
+
+SIZE = 10.0
+LENGTH = 2.0
+
+
+def squarePlate(parts, side, gap):
+    """Square parts (counter clockwise) on a grid."""
+    columns = int(math.ceil(math.sqrt(parts)))
+    square = np.array([[0, 0], [side, 0], [side, side], [0, side]], dtype = np.float64)
+    return [square + ((index % columns) * (side + gap), (index // columns) * (side + gap)) for index in range(parts)]
+
+
+def countOverlaps(results, polygons):
+    """Tabs overlapping another part or another tab, tested against all of them."""
+    discs = []
+    for result in results:
+        for x, z, angle in result.placements:
+            discs.append((result.key,) + tabDisc((x, z), angle, SIZE, LENGTH))
+    overlaps = 0
+    for key, x, z, radius in discs:
+        for other, polygon in enumerate(polygons):
+            if other != key and containsPoint(polygon, (x, z)):
+                overlaps += 1
+        for other_key, other_x, other_z, other_radius in discs:
+            if other_key != key and math.hypot(other_x - x, other_z - z) < radius + other_radius - 1e-2:
+                overlaps += 1
+    return overlaps
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Spatial hash benchmark")
+    parser.add_argument("--gap", type = float, default = 6.0, help = "Space between the parts in mm")
+    args = parser.parse_args()
+
+    print("{:>6} {:>7} {:>8} {:>10} {:>10} {:>9}".format("parts", "tabs", "skipped", "total ms", "us / tab", "overlaps"))
+    for parts in (1, 10, 100, 500):
+        polygons = squarePlate(parts, 30.0, args.gap)
+        tasks = [PlanTask(key, SIZE, loops = [polygon], length = LENGTH) for key, polygon in enumerate(polygons)]
+        start = time.perf_counter()
+        results = runPlanner(tasks, tab_hash = SpatialHash(SIZE))
+        elapsed = time.perf_counter() - start
+
+        tabs = sum(len(result.placements) for result in results)
+        skipped = sum(result.skipped for result in results)
+        overlaps = countOverlaps(results, polygons) if parts <= 100 else -1
+        print("{:>6} {:>7} {:>8} {:>10.1f} {:>10.1f} {:>9}".format(parts, tabs, skipped, elapsed * 1e3, elapsed / max(1, tabs + skipped) * 1e6, overlaps))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
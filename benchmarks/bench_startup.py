@@ -0,0 +1,103 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Benchmark of the startup of the plugin : registration at the start of Cura, then first activation of the tool
+#
+#   python benchmarks/bench_startup.py [--before REVISION] [--runs 10]
+#
+# Uranium, Cura and Qt are replaced by the stubs of benchmarks/stubs, every measure is done in a new process. NumPy is
+# imported before the measure as it is already loaded by Cura. With --before, the plugin of a git revision is
+# measured too (for example the revision before the lazy startup).
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+PLUGIN = "SpoonAntiWarping"
+
+
+def measure(folder):
+    """Registration and first activation of the plugin found in folder/SpoonAntiWarping (run in the child process)."""
+    import importlib
+    import numpy  # noqa: F401 already loaded by Cura
+
+    sys.path.insert(0, BENCHMARKS)
+    from stubs import COUNTERS, install
+    install()
+    sys.path.insert(0, folder)
+
+    start = time.perf_counter()
+    plugin = importlib.import_module(PLUGIN)
+    tool = plugin.register(None)["tool"]
+    registration = time.perf_counter() - start
+    registration_counters = dict(COUNTERS)
+    registration_modules = sorted(name for name in sys.modules if name.startswith(PLUGIN + "."))
+
+    from UM.Event import Event
+    event = type("ToolEvent", (), {"type": Event.ToolActivateEvent})()
+    start = time.perf_counter()
+    tool.event(event)
+    activation = time.perf_counter() - start
+
+    return {"registration_ms": registration * 1e3, "activation_ms": activation * 1e3, "registration": registration_counters,
+            "total": dict(COUNTERS), "modules_at_registration": len(registration_modules)}
+
+
+def runChild(folder):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", folder], check=True, stdout=subprocess.PIPE).stdout
+    return json.loads(output.decode())
+
+
+def exportRevision(revision, folder):
+    """Files of the plugin at a git revision, in folder/SpoonAntiWarping."""
+    target = os.path.join(folder, PLUGIN)
+    os.makedirs(target)
+    archive = subprocess.run(["git", "-C", ROOT, "archive", revision], check=True, stdout=subprocess.PIPE).stdout
+    subprocess.run(["tar", "-x", "-C", target], input=archive, check=True)
+
+
+def report(name, runs):
+    registration = statistics.median(run["registration_ms"] for run in runs)
+    activation = statistics.median(run["activation_ms"] for run in runs)
+    counters = runs[0]["registration"]
+    print("{:<12} {:>10.2f} {:>10.2f} {:>8} {:>8} {:>8} {:>8}".format(name, registration, activation, runs[0]["modules_at_registration"],
+                                                                    counters["catalogs"], counters["signal_connections"], counters["preferences"]))
+    return {"registration_ms": registration, "activation_ms": activation, "registration": counters, "total": runs[0]["total"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Plugin startup benchmark")
+    parser.add_argument("--before", help = "git revision of the plugin to compare with")
+    parser.add_argument("--runs", type = int, default = 10, help = "Number of processes per measure")
+    parser.add_argument("--child", help = argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child)))
+        return 0
+
+    print("Median of {} runs, counters at the registration".format(args.runs))
+    print("{:<12} {:>10} {:>10} {:>8} {:>8} {:>8} {:>8}".format("plugin", "register ms", "activate ms", "modules", "catalogs", "signals", "prefs"))
+    with tempfile.TemporaryDirectory() as folder:
+        if args.before:
+            before = os.path.join(folder, "before")
+            exportRevision(args.before, before)
+            report(args.before, [runChild(before) for _ in range(args.runs)])
+
+        current = os.path.join(folder, "current")
+        os.makedirs(current)
+        os.symlink(ROOT, os.path.join(current, PLUGIN))
+        report("working tree", [runChild(current) for _ in range(args.runs)])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
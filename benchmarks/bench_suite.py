@@ -0,0 +1,276 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Benchmark suite of the tool and of the SpoonOrder script, without Cura
+#
+#   python benchmarks/bench_suite.py [--quick] [--gcode-mb 10,100,1000] [--output results.json] [--compare previous.json]
+#
+# The plugin is loaded with the stand-ins of benchmarks/stubs (vectors, mesh builder, scene nodes, container stacks,
+# operations) and its methods are measured on synthetic data :
+#   create_spoon     SpoonAntiWarping._createSpoon for several increment angles
+#   define_angle     SpoonAntiWarping._defineAngle on convex hulls of 10 to 100k points
+#   auto_placement   SpoonAntiWarping.addAutoSpoonMesh on build plates of 1 to 500 parts
+#   spoon_order      SpoonOrder.execute on synthetic G-code of 10 MB to 1 GB
+# The results are written as JSON, --compare prints the ratio with the results of a previous run.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import argparse
+import datetime
+import importlib
+import importlib.util
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+PLUGIN = "SpoonAntiWarping"
+
+sys.path.insert(0, BENCHMARKS)
+sys.path.insert(0, ROOT)
+
+from stubs import install
+install()
+
+from stubs.scene import MeshBuilder, SceneNode, Vector, resetScene, setupMachine  # noqa: E402 after the import hook
+
+
+def timeRuns(function, repeat, setup=None):
+    """Durations of repeat calls of function, setup is called before every run and is not measured."""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        argument = setup() if setup is not None else None
+        start = time.perf_counter()
+        result = function(argument) if setup is not None else function()
+        durations.append(time.perf_counter() - start)
+    return durations, result
+
+
+def record(name, params, durations, **metrics):
+    entry = {"name": name, "params": params, "median_s": statistics.median(durations), "min_s": min(durations), "runs": len(durations)}
+    entry.update(metrics)
+    print("{:<16} {:<28} {:>12.3f} ms {}".format(name, json.dumps(params, sort_keys=True), entry["median_s"] * 1e3,
+                                                 " ".join("{}={}".format(key, value) for key, value in metrics.items())))
+    return entry
+
+
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Tool
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+def loadTool(folder):
+    """Registered and activated tool, the plugin is imported as a package from a link in folder."""
+    os.symlink(ROOT, os.path.join(folder, PLUGIN))
+    sys.path.insert(0, folder)
+    plugin = importlib.import_module(PLUGIN)
+    setupMachine()
+    tool = plugin.register(None)["tool"]
+
+    from UM.Event import Event
+    tool.event(type("ToolEvent", (), {"type": Event.ToolActivateEvent})())
+    return tool
+
+
+def prismPart(points, height=10.0, position=(0.0, 0.0)):
+    """Sliceable node of a prism on the build plate over the polygon points (n, 2) in X / Z."""
+    count = len(points)
+    vertices = np.zeros((2 * count, 3), dtype=np.float32)
+    vertices[:count, 0] = points[:, 0]
+    vertices[:count, 2] = points[:, 1]
+    vertices[count:, 0] = points[:, 0]
+    vertices[count:, 1] = height
+    vertices[count:, 2] = points[:, 1]
+
+    k = np.arange(count)
+    k1 = (k + 1) % count
+    sides = np.concatenate((np.column_stack((k, k1, k1 + count)), np.column_stack((k1 + count, k + count, k))))
+    fan = np.column_stack((np.zeros(count - 2, dtype=np.int64), np.arange(2, count), np.arange(1, count - 1)))
+    indices = np.concatenate((sides, fan, fan[:, [0, 2, 1]] + count))
+
+    builder = MeshBuilder()
+    builder.setVertices(vertices)
+    builder.setIndices(indices)
+    builder.calculateNormals()
+
+    node = SceneNode(name="Part")
+    node.setMeshData(builder.build())
+    node.setPosition(Vector(position[0], 0, position[1]))
+    return node
+
+
+def circle(count, radius):
+    angles = np.linspace(0, 2 * math.pi, count, endpoint=False)
+    return np.column_stack((np.cos(angles) * radius, np.sin(angles) * radius))
+
+
+def benchCreateSpoon(tool, repeat):
+    results = []
+    context = tool._createPlacementContext()
+    for increment in (10, 5, 2, 1):
+        durations, mesh = timeRuns(lambda: tool._createSpoon(10, 2, 2, increment, 0, context.spoon_height, False, 0).build(), repeat)
+        results.append(record("create_spoon", {"increment_deg": increment}, durations, vertices=mesh.getVertexCount()))
+    return results
+
+
+def benchDefineAngle(tool, sizes, repeat, picks=200):
+    results = []
+    tool._use_footprint = False
+    context = tool._createPlacementContext()
+    rng = np.random.default_rng(1)
+    for size in sizes:
+        scene = resetScene()
+        part = prismPart(circle(size, 50.0))
+        scene.getRoot().addChild(part)
+        scene.sceneChanged.emit(part)
+        tool._defineAngle(part, Vector(0, 0, 0), context)  # Hull in the cache
+
+        positions = [Vector(x, 0, z) for x, z in rng.uniform(-60, 60, (picks, 2))]
+        durations, _ = timeRuns(lambda: [tool._defineAngle(part, position, context) for position in positions], repeat)
+        results.append(record("define_angle", {"hull_points": size}, [duration / picks for duration in durations]))
+    tool._use_footprint = True
+    return results
+
+
+def benchAutoPlacement(tool, plates, repeat):
+    results = []
+
+    def buildPlate(parts):
+        scene = resetScene()
+        columns = int(math.ceil(math.sqrt(parts)))
+        outline = circle(32, 10.0)
+        for index in range(parts):
+            part = prismPart(outline, position=((index % columns) * 40.0, (index // columns) * 40.0))
+            scene.getRoot().addChild(part)
+        scene.sceneChanged.emit(scene.getRoot())
+        tool._hull_cache.invalidate()
+        return parts
+
+    for parts in plates:
+        durations, _ = timeRuns(lambda _: tool.addAutoSpoonMesh(), repeat, setup=lambda: buildPlate(parts))
+        results.append(record("auto_placement", {"parts": parts}, durations, tabs=len(tool._scene_index.getAllTabs())))
+    resetScene()
+    return results
+
+
+#--------------------------------------------------------------------------------------------------------------------------------------
+# SpoonOrder
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+def loadSpoonOrder():
+    """SpoonOrder script imported as a script of the post processing plugin."""
+    importlib.import_module("PostProcessingPlugin.scripts")
+    path = os.path.join(ROOT, "resources", "scripts", "SpoonOrder.py")
+    spec = importlib.util.spec_from_file_location("PostProcessingPlugin.scripts.SpoonOrder", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def syntheticGcode(size_mb, layer_kb=200, tabs=20):
+    """Layers of G-code as given to the post processing scripts (header, start, layers, end), about size_mb MB.
+
+    The first two layers start with the tabs, the other blocks are parts. The layers are built by repeating a block of
+    distinct lines so that 1 GB is generated in a few seconds.
+    """
+    rng = np.random.default_rng(2)
+    coordinates = rng.uniform(10, 200, (2000, 2))
+    block = "".join("G1 X{:.3f} Y{:.3f} E0.03125\n".format(x, y) for x, y in coordinates)
+    part_block = ";MESH:Part\n;TYPE:WALL-OUTER\nG0 F6000 X100 Y100\n" + block
+    tab_block = "".join(";MESH:SpoonTab\n;TYPE:WALL-OUTER\nG0 F6000 X{:.3f} Y{:.3f}\n".format(x, y) + block[:2000] for x, y in coordinates[:tabs])
+
+    repeats = max(1, int(layer_kb * 1024 / len(part_block)))
+    layer_count = max(2, int(size_mb * 1024 * 1024 / (repeats * len(part_block))))
+    data = [";FLAVOR:Marlin\n;Generated with Cura_SteamEngine 5.3.0\n", ";LAYER_COUNT:{}\nM83\nG92 E0\n".format(layer_count)]
+    for layer in range(layer_count):
+        body = part_block * repeats
+        if layer < 2:
+            body = tab_block + body
+        data.append(";LAYER:{}\nM107\n{};TIME_ELAPSED:{}.0\n".format(layer, body, layer))
+    data.append("M140 S0\nM104 S0\n;End of Gcode\n")
+    return data
+
+
+def benchSpoonOrder(sizes_mb, repeat):
+    results = []
+    module = loadSpoonOrder()
+    script = module.SpoonOrder()
+    script.setSettingValues({"layer": 1, "marker": "SpoonTab", "priority": "", "optimize": True})
+    for size in sizes_mb:
+        data = syntheticGcode(size)
+        megabytes = sum(len(layer) for layer in data) / (1024 * 1024)
+        runs = repeat if size <= 100 else 1
+        durations, _ = timeRuns(lambda layers: script.execute(layers), runs, setup=lambda: list(data))
+        results.append(record("spoon_order", {"gcode_mb": size}, durations, mb_per_s=round(megabytes / statistics.median(durations), 1)))
+        del data
+    return results
+
+
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Comparison
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+def compare(results, path):
+    with open(path) as stream:
+        previous = {(entry["name"], json.dumps(entry["params"], sort_keys=True)): entry for entry in json.load(stream)["results"]}
+    print("\nComparison with {} (ratio < 1 : faster now)".format(path))
+    for entry in results:
+        key = (entry["name"], json.dumps(entry["params"], sort_keys=True))
+        if key in previous:
+            ratio = entry["median_s"] / previous[key]["median_s"] if previous[key]["median_s"] else float("nan")
+            print("{:<16} {:<28} {:>8.2f}".format(key[0], key[1], ratio))
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark suite of the tool and of SpoonOrder")
+    parser.add_argument("--quick", action = "store_true", help = "Smaller sizes")
+    parser.add_argument("--only", help = "Comma separated benchmarks : create_spoon,define_angle,auto_placement,spoon_order")
+    parser.add_argument("--repeat", type = int, default = 3, help = "Runs per measure, the median is kept")
+    parser.add_argument("--gcode-mb", help = "Comma separated G-code sizes in MB (default 10,100 or 10 with --quick, up to 1000)")
+    parser.add_argument("--output", help = "JSON file of the results")
+    parser.add_argument("--compare", help = "JSON file of a previous run")
+    args = parser.parse_args()
+
+    hull_sizes = (10, 100, 1000, 10000) if args.quick else (10, 100, 1000, 10000, 100000)
+    plates = (1, 10, 100) if args.quick else (1, 10, 100, 500)
+    gcode_sizes = [float(size) for size in args.gcode_mb.split(",")] if args.gcode_mb else ([10.0] if args.quick else [10.0, 100.0])
+    selected = set(args.only.split(",")) if args.only else {"create_spoon", "define_angle", "auto_placement", "spoon_order"}
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        tool = loadTool(folder)
+        if "create_spoon" in selected:
+            results += benchCreateSpoon(tool, args.repeat)
+        if "define_angle" in selected:
+            results += benchDefineAngle(tool, hull_sizes, args.repeat)
+        if "auto_placement" in selected:
+            results += benchAutoPlacement(tool, plates, args.repeat)
+    if "spoon_order" in selected:
+        results += benchSpoonOrder(gcode_sizes, args.repeat)
+
+    report = {
+        "date": datetime.datetime.now().isoformat(timespec = "seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as stream:
+            json.dump(report, stream, indent = 1)
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Stand-ins of Uranium, Cura and PyQt used by the benchmarks to load the plugin without the application.
+#
+#   from stubs import install, COUNTERS
+#   install()
+#
+# install() adds an import hook answering every UM.*, cura.*, PyQt6.*, PyQt5.* and PostProcessingPlugin.* import. The
+# classes used at registration (signals, preferences, catalogs, application, tool) have a minimal behaviour and count
+# their use in COUNTERS, the scene, mesh and operation classes are in stubs.scene, every other name is an inert stub
+# class. Only for the benchmarks, the plugin never imports it.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import importlib.abc
+import importlib.machinery
+import sys
+import types
+
+COUNTERS = {"catalogs": 0, "signal_connections": 0, "preferences": 0}
+
+STUBBED_PACKAGES = ("UM", "cura", "PyQt6", "PyQt5", "PostProcessingPlugin")
+
+
+class _StubMeta(type):
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        # One distinct class per name, so two different enum values are never equal
+        stub = _StubMeta(name, (Stub,), {})
+        setattr(cls, name, stub)
+        return stub
+
+
+class Stub(metaclass=_StubMeta):
+    """Inert object : every attribute, call and operation gives another stub or a neutral value."""
+    def __init__(self, *args, **kwargs) -> None:
+        pass
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Stub()
+
+    def __call__(self, *args, **kwargs):
+        return Stub()
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __and__(self, other):
+        return 0
+
+    __rand__ = __or__ = __ror__ = __and__
+
+    def __iter__(self):
+        return iter(())
+
+
+class Signal:
+    def __init__(self, *args, **kwargs) -> None:
+        self._slots = []
+
+    def connect(self, slot) -> None:
+        COUNTERS["signal_connections"] += 1
+        self._slots.append(slot)
+
+    def disconnect(self, slot) -> None:
+        if slot in self._slots:
+            self._slots.remove(slot)
+
+    def emit(self, *args) -> None:
+        for slot in list(self._slots):
+            slot(*args)
+
+
+class i18nCatalog:
+    def __init__(self, name: str = None) -> None:
+        COUNTERS["catalogs"] += 1
+        self._name = name
+
+    def hasTranslationLoaded(self) -> bool:
+        return False
+
+    def i18nc(self, context: str, text: str, *args) -> str:
+        return text.format(*args) if args else text
+
+    def i18n(self, text: str, *args) -> str:
+        return text.format(*args) if args else text
+
+
+class Preferences:
+    def __init__(self) -> None:
+        self._values = {}
+
+    def addPreference(self, key: str, default_value) -> None:
+        COUNTERS["preferences"] += 1
+        self._values.setdefault(key, default_value)
+
+    def getValue(self, key: str):
+        return self._values.get(key)
+
+    def setValue(self, key: str, value) -> None:
+        self._values[key] = value
+
+
+class Controller:
+    def __init__(self) -> None:
+        self._scene = None
+        self.toolEnabledChanged = Signal()
+
+    def getScene(self):
+        if self._scene is None:
+            from .scene import Scene
+            self._scene = Scene()
+        return self._scene
+
+    def getToolsEnabled(self) -> bool:
+        return True
+
+
+class Application:
+    _instance = None
+
+    def __init__(self) -> None:
+        self._preferences = Preferences()
+        self._controller = Controller()
+        self.globalContainerStackChanged = Signal()
+        self.fileCompleted = Signal()
+        self._global_stack = None
+        self._extruder_manager = None
+
+    @classmethod
+    def getInstance(cls) -> "Application":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def getPreferences(self) -> Preferences:
+        return self._preferences
+
+    def getController(self) -> Controller:
+        return self._controller
+
+    def getGlobalContainerStack(self):
+        return self._global_stack
+
+    def setGlobalContainerStack(self, stack) -> None:
+        self._global_stack = stack
+        self.globalContainerStackChanged.emit()
+
+    def getExtruderManager(self):
+        return self._extruder_manager
+
+    def setExtruderManager(self, manager) -> None:
+        self._extruder_manager = manager
+
+    def getMultiBuildPlateModel(self) -> Stub:
+        return Stub()
+
+    def callLater(self, function, *args) -> None:
+        function(*args)
+
+
+class ContainerRegistry:
+    _instance = None
+
+    def __init__(self) -> None:
+        self.containerLoadComplete = Signal()
+
+    @classmethod
+    def getInstance(cls) -> "ContainerRegistry":
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+
+class Selection:
+    selectionChanged = Signal()
+    _selection = []
+
+    @classmethod
+    def hasSelection(cls) -> bool:
+        return bool(cls._selection)
+
+    @classmethod
+    def getAllSelectedObjects(cls) -> list:
+        return list(cls._selection)
+
+    @classmethod
+    def isSelected(cls, node) -> bool:
+        return node in cls._selection
+
+    @classmethod
+    def add(cls, node) -> None:
+        if node not in cls._selection:
+            cls._selection.append(node)
+            cls.selectionChanged.emit()
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._selection = []
+        cls.selectionChanged.emit()
+
+
+class Tool:
+    def __init__(self) -> None:
+        self._plugin_id = "SpoonAntiWarping"
+        self.propertyChanged = Signal()
+
+    def getController(self) -> Controller:
+        return Application.getInstance().getController()
+
+    def setExposedProperties(self, *names) -> None:
+        self._exposed_properties = names
+
+    def event(self, event) -> bool:
+        return False
+
+
+class Logger:
+    @staticmethod
+    def log(level: str, message: str, *args) -> None:
+        pass
+
+    @staticmethod
+    def logException(level: str, message: str, *args) -> None:
+        pass
+
+
+class QTimer:
+    def __init__(self, *args) -> None:
+        self.timeout = Signal()
+        self._active = False
+
+    def setInterval(self, interval: int) -> None:
+        pass
+
+    def setSingleShot(self, single_shot: bool) -> None:
+        pass
+
+    def start(self, *args) -> None:
+        self._active = True
+
+    def stop(self) -> None:
+        self._active = False
+
+    def isActive(self) -> bool:
+        return self._active
+
+
+# Names with a behaviour, by module
+_MODULE_ATTRIBUTES = {
+    "UM.Signal": {"Signal": Signal},
+    "UM.i18n": {"i18nCatalog": i18nCatalog},
+    "UM.Logger": {"Logger": Logger},
+    "UM.Tool": {"Tool": Tool},
+    "UM.Scene.Selection": {"Selection": Selection},
+    "UM.Settings.ContainerRegistry": {"ContainerRegistry": ContainerRegistry},
+    "UM.Application": {"Application": Application},
+    "cura.CuraApplication": {"CuraApplication": Application},
+    "cura.CuraVersion": {"CuraVersion": "5.3.0"},
+    "PyQt6.QtCore": {"QTimer": QTimer, "QT_VERSION_STR": "6.4.0"},
+    "PyQt5.QtCore": {"QTimer": QTimer, "QT_VERSION_STR": "5.15.0"},
+}
+
+
+from .scene import MODULE_ATTRIBUTES as _SCENE_ATTRIBUTES  # noqa: E402 uses the classes above
+_MODULE_ATTRIBUTES.update(_SCENE_ATTRIBUTES)
+
+
+def _moduleGetattr(module_name: str):
+    def __getattr__(name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        stub = _StubMeta(name, (Stub,), {"__module__": module_name})
+        setattr(sys.modules[module_name], name, stub)
+        return stub
+    return __getattr__
+
+
+class _StubLoader(importlib.abc.Loader):
+    def create_module(self, spec):
+        module = types.ModuleType(spec.name)
+        module.__path__ = []  # Package : the sub modules are stubbed too
+        module.__getattr__ = _moduleGetattr(spec.name)
+        module.__dict__.update(_MODULE_ATTRIBUTES.get(spec.name, {}))
+        return module
+
+    def exec_module(self, module) -> None:
+        pass
+
+
+class _StubFinder(importlib.abc.MetaPathFinder):
+    def __init__(self, packages) -> None:
+        self._packages = packages
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname.split(".")[0] in self._packages:
+            return importlib.machinery.ModuleSpec(fullname, _StubLoader(), is_package=True)
+        return None
+
+
+def install(packages=STUBBED_PACKAGES) -> None:
+    """Answer the imports of these packages with stubs, only the packages not installed for the Qt bindings."""
+    packages = tuple(package for package in packages if not (package.startswith("PyQt") and _isInstalled(package)))
+    if not any(isinstance(finder, _StubFinder) for finder in sys.meta_path):
+        sys.meta_path.insert(0, _StubFinder(packages))
+
+
+def _isInstalled(package: str) -> bool:
+    return any(finder.find_spec(package, None) is not None for finder in sys.meta_path
+               if hasattr(finder, "find_spec") and not isinstance(finder, _StubFinder))
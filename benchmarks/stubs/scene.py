@@ -0,0 +1,503 @@
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Copyright (c) 2023 5@xes
+#--------------------------------------------------------------------------------------------------------------------------------------
+# Stand-ins with a behaviour for the benchmarks of the tool : vectors and matrices, mesh builder, scene nodes with
+# decorators and container stacks, scene operations and jobs. They do the same NumPy work as Uranium where it matters
+# for the timings (normals of the meshes, matrix products) and nothing else.
+#--------------------------------------------------------------------------------------------------------------------------------------
+
+import math
+
+import numpy as np
+
+from . import Application, Selection, Signal, Stub
+
+
+class Vector:
+    Unit_X = None  # type: Vector
+    Unit_Y = None  # type: Vector
+    Unit_Z = None  # type: Vector
+
+    def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0) -> None:
+        self._data = np.array([x, y, z], dtype=np.float64)
+
+    @property
+    def x(self) -> float:
+        return float(self._data[0])
+
+    @property
+    def y(self) -> float:
+        return float(self._data[1])
+
+    @property
+    def z(self) -> float:
+        return float(self._data[2])
+
+    def getData(self) -> np.ndarray:
+        return self._data
+
+    def __add__(self, other: "Vector") -> "Vector":
+        return Vector(*(self._data + other._data))
+
+    def __sub__(self, other: "Vector") -> "Vector":
+        return Vector(*(self._data - other._data))
+
+    def __mul__(self, value: float) -> "Vector":
+        return Vector(*(self._data * value))
+
+
+Vector.Unit_X = Vector(1, 0, 0)
+Vector.Unit_Y = Vector(0, 1, 0)
+Vector.Unit_Z = Vector(0, 0, 1)
+
+
+class Matrix:
+    def __init__(self, data=None) -> None:
+        self._data = np.identity(4) if data is None else np.array(data, dtype=np.float64)
+
+    def getData(self) -> np.ndarray:
+        return self._data
+
+    def setByTranslation(self, direction: Vector) -> None:
+        self._data = np.identity(4)
+        self._data[:3, 3] = direction.getData()
+
+    def setByRotationAxis(self, angle: float, direction: Vector) -> None:
+        x, y, z = direction.getData() / np.linalg.norm(direction.getData())
+        c, s = math.cos(angle), math.sin(angle)
+        self._data = np.identity(4)
+        self._data[:3, :3] = [[c + x * x * (1 - c), x * y * (1 - c) - z * s, x * z * (1 - c) + y * s],
+                              [y * x * (1 - c) + z * s, c + y * y * (1 - c), y * z * (1 - c) - x * s],
+                              [z * x * (1 - c) - y * s, z * y * (1 - c) + x * s, c + z * z * (1 - c)]]
+
+    def multiply(self, other: "Matrix", copy: bool = False) -> "Matrix":
+        if copy:
+            return Matrix(self._data @ other._data)
+        self._data = self._data @ other._data
+        return self
+
+    def getInverse(self) -> "Matrix":
+        return Matrix(np.linalg.inv(self._data))
+
+
+class Quaternion:
+    def __init__(self, matrix: np.ndarray = None) -> None:
+        self._matrix = np.identity(4) if matrix is None else matrix
+
+    @staticmethod
+    def fromAngleAxis(angle: float, axis: Vector) -> "Quaternion":
+        rotation = Matrix()
+        rotation.setByRotationAxis(angle, axis)
+        return Quaternion(rotation.getData())
+
+    def toMatrix(self) -> Matrix:
+        return Matrix(self._matrix)
+
+
+class Polygon:
+    def __init__(self, points=None) -> None:
+        self._points = np.zeros((0, 2)) if points is None else np.asarray(points, dtype=np.float64)
+
+    def getPoints(self) -> np.ndarray:
+        return self._points
+
+
+class MeshData:
+    def __init__(self, vertices=None, normals=None, indices=None) -> None:
+        self._vertices = vertices
+        self._normals = normals
+        self._indices = indices
+
+    def getVertices(self):
+        return self._vertices
+
+    def getNormals(self):
+        return self._normals
+
+    def getIndices(self):
+        return self._indices
+
+    def hasIndices(self) -> bool:
+        return self._indices is not None
+
+    def getVertexCount(self) -> int:
+        return 0 if self._vertices is None else len(self._vertices)
+
+
+class MeshBuilder:
+    def __init__(self) -> None:
+        self._vertices = None
+        self._normals = None
+        self._indices = None
+
+    def setVertices(self, vertices) -> None:
+        self._vertices = np.asarray(vertices, dtype=np.float32)
+
+    def setIndices(self, indices) -> None:
+        self._indices = np.asarray(indices, dtype=np.int32)
+
+    def calculateNormals(self, fast: bool = False) -> None:
+        # Face normals accumulated on the vertices, as Uranium does for an indexed mesh
+        vertices = self._vertices
+        if self._indices is None:
+            triangles = vertices.reshape(-1, 3, 3)
+            normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+            self._normals = np.repeat(normals, 3, axis=0)
+        else:
+            triangles = vertices[self._indices]
+            normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+            self._normals = np.zeros_like(vertices)
+            for corner in range(3):
+                np.add.at(self._normals, self._indices[:, corner], normals)
+        lengths = np.linalg.norm(self._normals, axis=1)
+        lengths[lengths == 0] = 1
+        self._normals /= lengths[:, None]
+
+    def build(self) -> MeshData:
+        return MeshData(self._vertices, self._normals, self._indices)
+
+
+class ContainerStack:
+    """Values of the settings by key, the instances of the top container first, the other properties are True."""
+    def __init__(self, values=None, extruders=None) -> None:
+        self._values = dict(values or {})
+        self.propertyChanged = Signal()
+        self.extruderList = list(extruders or [])
+        self._top = _InstanceContainer()
+
+    def getProperty(self, key: str, property_name: str):
+        if property_name == "value":
+            instance = self._top._instances.get(key)
+            return instance._values.get("value") if instance is not None else self._values.get(key)
+        return True
+
+    def setProperty(self, key: str, property_name: str, value) -> None:
+        if property_name == "value":
+            self._values[key] = value
+            self.propertyChanged.emit(key, property_name)
+
+    def getTop(self) -> "_InstanceContainer":
+        return self._top
+
+    def getSettingDefinition(self, key: str) -> str:
+        return key
+
+
+class _InstanceContainer:
+    def __init__(self) -> None:
+        self._instances = {}
+
+    def addInstance(self, instance: "SettingInstance") -> None:
+        self._instances[instance.definition] = instance
+
+
+class SettingInstance:
+    def __init__(self, definition, container) -> None:
+        self.definition = definition
+        self._container = container
+        self._values = {}
+
+    def setProperty(self, name: str, value) -> None:
+        self._values[name] = value
+
+    def resetState(self) -> None:
+        pass
+
+
+class SceneNode:
+    class TransformSpace:
+        Local = 1
+        Parent = 2
+        World = 3
+
+    def __init__(self, parent: "SceneNode" = None, name: str = "") -> None:
+        self._name = name
+        self._parent = None
+        self._children = []
+        self._mesh_data = None
+        self._transformation = np.identity(4)
+        self._decorators = {}
+        self._stack = None
+        self.transformationChanged = Signal()
+        if parent is not None:
+            parent.addChild(self)
+
+    # Tree
+    def getParent(self) -> "SceneNode":
+        return self._parent
+
+    def setParent(self, parent: "SceneNode") -> None:
+        if self._parent is not None and self in self._parent._children:
+            self._parent._children.remove(self)
+        self._parent = parent
+        if parent is not None:
+            parent._children.append(self)
+
+    def addChild(self, node: "SceneNode") -> None:
+        node.setParent(self)
+
+    def getChildren(self) -> list:
+        return self._children
+
+    def hasChildren(self) -> bool:
+        return bool(self._children)
+
+    def getAllChildren(self) -> list:
+        children = []
+        for child in self._children:
+            children.append(child)
+            children.extend(child.getAllChildren())
+        return children
+
+    # Data
+    def getName(self) -> str:
+        return self._name
+
+    def setName(self, name: str) -> None:
+        self._name = name
+
+    def setSelectable(self, selectable: bool) -> None:
+        pass
+
+    def getMeshData(self) -> MeshData:
+        return self._mesh_data
+
+    def setMeshData(self, mesh_data: MeshData) -> None:
+        self._mesh_data = mesh_data
+
+    # Transformation
+    def getWorldTransformation(self, copy: bool = True) -> Matrix:
+        world = self._transformation
+        if self._parent is not None:
+            world = self._parent.getWorldTransformation().getData() @ world
+        return Matrix(world)
+
+    def getLocalTransformation(self) -> Matrix:
+        return Matrix(self._transformation)
+
+    def setTransformation(self, transformation: Matrix) -> None:
+        self._transformation = transformation.getData().copy()
+        self.transformationChanged.emit(self)
+
+    def getWorldPosition(self) -> Vector:
+        return Vector(*self.getWorldTransformation().getData()[:3, 3])
+
+    def setPosition(self, position: Vector, transform_space: int = TransformSpace.Local) -> None:
+        world = self.getWorldTransformation().getData()
+        world[:3, 3] = position.getData()
+        self._setWorld(world)
+
+    def setOrientation(self, orientation: Quaternion, transform_space: int = TransformSpace.Local) -> None:
+        world = self.getWorldTransformation().getData()
+        world[:3, :3] = orientation.toMatrix().getData()[:3, :3]
+        self._setWorld(world)
+
+    def _setWorld(self, world: np.ndarray) -> None:
+        parent = np.identity(4) if self._parent is None else self._parent.getWorldTransformation().getData()
+        self._transformation = np.linalg.inv(parent) @ world
+        self.transformationChanged.emit(self)
+
+    # Decorators
+    def addDecorator(self, decorator) -> None:
+        self._decorators[type(decorator).__name__] = decorator
+
+    def callDecoration(self, name: str, *args):
+        if name == "getStack":
+            if self._stack is None and self._mesh_data is not None:
+                self._stack = ContainerStack()
+            return self._stack
+        if name == "isSliceable":
+            return self._mesh_data is not None
+        if name in ("getAdhesionArea", "_compute2DConvexHull", "getConvexHull"):
+            return self._hull()
+        return None
+
+    def _hull(self) -> Polygon:
+        from SpoonCore.Polygon import convexHull
+        if self._mesh_data is None:
+            return Polygon()
+        vertices = self._mesh_data.getVertices().astype(np.float64)
+        world = vertices @ self.getWorldTransformation().getData()[:3, :3].T + self.getWorldTransformation().getData()[:3, 3]
+        return Polygon(convexHull(world[:, [0, 2]]))
+
+
+class DepthFirstIterator:
+    def __init__(self, node: SceneNode) -> None:
+        self._node = node
+
+    def __iter__(self):
+        stack = [self._node]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.getChildren()))
+
+
+class Scene:
+    def __init__(self) -> None:
+        self.sceneChanged = Signal()
+        self._root = SceneNode(name="Root")
+
+    def getRoot(self) -> SceneNode:
+        return self._root
+
+    def findObject(self, object_id):
+        return None
+
+
+def _sceneChanged(node: SceneNode) -> None:
+    Application.getInstance().getController().getScene().sceneChanged.emit(node)
+
+
+class Operation:
+    def push(self) -> None:
+        self.redo()
+
+    def undo(self) -> None:
+        pass
+
+    def redo(self) -> None:
+        pass
+
+
+class GroupedOperation(Operation):
+    def __init__(self) -> None:
+        self._children = []
+
+    def addOperation(self, operation: Operation) -> None:
+        self._children.append(operation)
+
+    def getNumChildrenOperations(self) -> int:
+        return len(self._children)
+
+    def redo(self) -> None:
+        for operation in self._children:
+            operation.redo()
+
+    def undo(self) -> None:
+        for operation in reversed(self._children):
+            operation.undo()
+
+
+class AddSceneNodeOperation(Operation):
+    def __init__(self, node: SceneNode, parent: SceneNode) -> None:
+        self._node = node
+        self._parent = parent
+
+    def redo(self) -> None:
+        self._node.setParent(self._parent)
+        _sceneChanged(self._node)
+
+    def undo(self) -> None:
+        self._node.setParent(None)
+        _sceneChanged(self._parent)
+
+
+class SetParentOperation(Operation):
+    def __init__(self, node: SceneNode, parent: SceneNode) -> None:
+        self._node = node
+        self._parent = parent
+        self._old_parent = None
+
+    def redo(self) -> None:
+        # The world transformation is kept, as in Cura
+        world = self._node.getWorldTransformation().getData()
+        self._old_parent = self._node.getParent()
+        self._node.setParent(self._parent)
+        self._node._setWorld(world)
+        _sceneChanged(self._node)
+
+    def undo(self) -> None:
+        self._node.setParent(self._old_parent)
+        _sceneChanged(self._node)
+
+
+class RemoveSceneNodeOperation(Operation):
+    def __init__(self, node: SceneNode) -> None:
+        self._node = node
+        self._parent = node.getParent()
+
+    def redo(self) -> None:
+        self._node.setParent(None)
+        _sceneChanged(self._parent)
+
+    def undo(self) -> None:
+        self._node.setParent(self._parent)
+        _sceneChanged(self._node)
+
+
+class Job:
+    """Run in the calling thread by start()."""
+    def __init__(self) -> None:
+        pass
+
+    def start(self) -> None:
+        self.run()
+
+    def run(self) -> None:
+        pass
+
+
+class ExtruderManager:
+    def __init__(self, stacks: list) -> None:
+        self._stacks = stacks
+
+    def getActiveExtruderStacks(self) -> list:
+        return self._stacks
+
+
+class Script:
+    """Base of the post processing scripts, with the values given to setSettingValues."""
+    def __init__(self) -> None:
+        self._setting_values = {}
+
+    def setSettingValues(self, values: dict) -> None:
+        self._setting_values = dict(values)
+
+    def getSettingValueByKey(self, key: str):
+        return self._setting_values.get(key)
+
+
+def setupMachine(values: dict = None) -> ContainerStack:
+    """Global and extruder stacks of the application, with the profile values used by the tool."""
+    profile = {"layer_height_0": 0.2, "layer_height": 0.2, "machine_nozzle_size": 0.4, "adhesion_type": "skirt", "relative_extrusion": True}
+    profile.update(values or {})
+    extruder = ContainerStack(profile)
+    global_stack = ContainerStack(profile, [extruder])
+    application = Application.getInstance()
+    application.setGlobalContainerStack(global_stack)
+    application.setExtruderManager(ExtruderManager([extruder]))
+    return global_stack
+
+
+def resetScene() -> Scene:
+    """Empty scene, the nodes of the previous benchmark are removed."""
+    scene = Application.getInstance().getController().getScene()
+    for child in list(scene.getRoot().getChildren()):
+        child.setParent(None)
+    Selection.clear()
+    scene.sceneChanged.emit(scene.getRoot())
+    return scene
+
+
+MODULE_ATTRIBUTES = {
+    "UM.Math.Vector": {"Vector": Vector},
+    "UM.Math.Matrix": {"Matrix": Matrix},
+    "UM.Math.Quaternion": {"Quaternion": Quaternion},
+    "UM.Math.Polygon": {"Polygon": Polygon},
+    "UM.Mesh.MeshBuilder": {"MeshBuilder": MeshBuilder},
+    "UM.Mesh.MeshData": {"MeshData": MeshData},
+    "UM.Settings.SettingInstance": {"SettingInstance": SettingInstance},
+    "UM.Settings.ContainerStack": {"ContainerStack": ContainerStack},
+    "UM.Scene.SceneNode": {"SceneNode": SceneNode},
+    "UM.Scene.Scene": {"Scene": Scene},
+    "UM.Scene.Iterator.DepthFirstIterator": {"DepthFirstIterator": DepthFirstIterator},
+    "UM.Operations.Operation": {"Operation": Operation},
+    "UM.Operations.GroupedOperation": {"GroupedOperation": GroupedOperation},
+    "UM.Operations.AddSceneNodeOperation": {"AddSceneNodeOperation": AddSceneNodeOperation},
+    "UM.Operations.RemoveSceneNodeOperation": {"RemoveSceneNodeOperation": RemoveSceneNodeOperation},
+    "UM.Job": {"Job": Job},
+    "cura.Scene.CuraSceneNode": {"CuraSceneNode": SceneNode},
+    "cura.Operations.SetParentOperation": {"SetParentOperation": SetParentOperation},
+    "PostProcessingPlugin.Script": {"Script": Script},
+}
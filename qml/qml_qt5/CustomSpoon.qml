@@ -8,8 +8,11 @@
 //   "SWidth"      : Width set for Tab in mm
 //   "NLayer"      : Number of layer
 //   "ISpeed"      : Initial Speed in mm/s
+//   "STolerance"  : Chord tolerance of the round part in mm (0 = a tenth of the Nozzle size)
 //   "DirectShape" : Direct shape
+//   "MergeTabs"   : One spoon mesh per object in automatic mode
 //   "SMsg"        : Text for the Remove All Button
+//   "SProfile"    : Summary of the last profiled creation (empty when the profiling is off)
 //
 //-----------------------------------------------------------------------------
 
@@ -91,6 +94,17 @@ Item
             renderType: Text.NativeRendering
             width: Math.ceil(contentWidth) //Make sure that the grid cells have an integer width.
         }
+
+        Label
+        {
+            height: UM.Theme.getSize("setting_control").height
+            text: catalog.i18nc("@label", "Chord Tolerance")
+            font: UM.Theme.getFont("default")
+            color: UM.Theme.getColor("text")
+            verticalAlignment: Text.AlignVCenter
+            renderType: Text.NativeRendering
+            width: Math.ceil(contentWidth) //Make sure that the grid cells have an integer width.
+        }
 		
 		TextField
         {
@@ -199,6 +213,28 @@ Item
                 UM.ActiveTool.setProperty("ISpeed", modified_text)
             }
         }	
+
+		TextField
+        {
+            id: toleranceTextField
+            width: UM.Theme.getSize("setting_control").width
+            height: UM.Theme.getSize("setting_control").height
+            property string unit: "mm"
+            style: UM.Theme.styles.text_field
+            text: UM.ActiveTool.properties.getValue("STolerance")
+            validator: DoubleValidator
+            {
+                decimals: 2
+				bottom: 0
+                locale: "en_US"
+            }
+
+            onEditingFinished:
+            {
+                var modified_text = text.replace(",", ".") // User convenience. We use dots for decimal values
+                UM.ActiveTool.setProperty("STolerance", modified_text)
+            }
+        }
 			
     }
 
@@ -211,10 +247,20 @@ Item
 			UM.ActiveTool.setProperty("DirectShape", checked)
 		}
 	}
+
+	CheckBox {
+	    id: mergeCheck
+		anchors.top: dshapeCheck.bottom 
+		text: catalog.i18nc("@option:check","Merge tabs")
+		checked: UM.ActiveTool.properties.getValue("MergeTabs")
+		onClicked: {
+			UM.ActiveTool.setProperty("MergeTabs", checked)
+		}
+	}
 		
 	Rectangle {
         id: topRect
-        anchors.top: dshapeCheck.bottom 
+        anchors.top: mergeCheck.bottom 
 		color: "#00000000"
 		width: UM.Theme.getSize("setting_control").width * 1.3
 		height: UM.Theme.getSize("setting_control").height 
@@ -251,5 +297,17 @@ Item
 		text: catalog.i18nc("@label", "Automatic Addition")
 		onClicked: UM.ActiveTool.triggerAction("addAutoSpoonMesh")
 	}
+
+	Label
+	{
+		id: profileLabel
+		anchors.top: bottomRect.bottom
+		anchors.left: parent.left
+		anchors.topMargin: UM.Theme.getSize("default_margin").height
+		width: UM.Theme.getSize("setting_control").width * 1.3
+		visible: text != ""
+		wrapMode: Text.Wrap
+		text: UM.ActiveTool.properties.getValue("SProfile")
+	}
 	
 }
@@ -9,130 +9,535 @@
 #------------------------------------------------------------------------------------------------------------------------------------
 #
 #   Version 1.0 13/03/2023 first prototype right now must be use with the relative extrusion activated 
+#   Version 1.1 Single pass : the layers after the analysed layers are not split, the lines are moved by blocks
+#   Version 1.2 Command line tool for G-code files, without Cura :
+#
+#       python SpoonOrder.py input.gcode -o output.gcode --layer 1 --marker SpoonTab
+#
+#   The file is memory-mapped and cut at the ;LAYER: lines, only the layers to reorder are read as text and the
+#   rest of the file is copied by blocks, so the memory used doesn't depend on the size of the file.
+#   Version 1.3 The tabs are printed in a short tour (nearest neighbour and 2-opt), the travel saved is logged
+#   Version 1.4 Priority table : the lines are printed by buckets of ;MESH: texts and ;TYPE: names after the tabs,
+#   a moved block gets back its start point, feedrate and type, and its E value (G92) in absolute extrusion (M82).
+#   These lines are only added when the value in effect in the new order is different, the output of the default
+#   settings can still differ from version 1.3 when a moved block relies on the type, feedrate or position of the
+#   part printed before it in the original order.
+#   The type is not restored for a block without extrusion, and a layer ending with another block than the original
+#   last block gets back the end position (and feedrate, E value) of the original layer for the next layer.
 #
 #------------------------------------------------------------------------------------------------------------------------------------
 
-from ..Script import Script
-from UM.Logger import Logger
-from UM.Application import Application
-from UM.Message import Message
-import re #To perform the search
-from UM.i18n import i18nCatalog # Translation
-catalog = i18nCatalog("cura")
-
-__version__ = '1.0'
-
-def is_begin_layer_line(line: str) -> bool:
-    """Check if current line is the start of a layer section.
+import argparse
+import itertools
+import math
+import mmap
+import os
+import sys
+
+try:
+    from ..Script import Script
+    from UM.Logger import Logger
+    from UM.Application import Application
+except ImportError:
+    # Command line tool : only the functions working on the G-code are used
+    Script = object
+
+__version__ = '1.4'
+
+# Comment lines changing the copy of the lines, by prefix up to the colon. The other lines are not read.
+LAYER_LINE = 1
+MESH_LINE = 2
+TIME_ELAPSED_LINE = 3
+TYPE_LINE = 4
+LINE_KINDS = {
+    ";LAYER:": LAYER_LINE,
+    ";MESH:": MESH_LINE,
+    ";TIME_ELAPSED:": TIME_ELAPSED_LINE,
+    ";TYPE:": TYPE_LINE,
+}
+
+# State of the copy : line dropped, otherwise index of the bucket of the line in the priority table (the spoon tabs
+# first, the lines matching no rule after the last rule)
+SKIP = -1
+SPOON = 0
+
+
+def priority_table(marker: str, priority: str = ""):
+    """Rules of the buckets of a layer, the spoon tabs first.
 
     Args:
-        line (str): Gcode line
+        marker (str): Text of the ;MESH: line of the spoon tabs
+        priority (str): Comma separated rules of the next buckets : a ;TYPE: name (SKIRT, WALL-OUTER...) or MESH:
+            followed by a text of the ;MESH: lines
 
     Returns:
-        bool: True if the line is the start of a layer section
+        list: Kind of line (MESH_LINE or TYPE_LINE) and text of every rule
     """
-    return line.startswith(";LAYER:")
-
-def is_begin_skirt_line(line: str) -> bool:
-    """Check if current line is the start of a SKIRT section.
+    rules = [(MESH_LINE, marker)]
+    for item in priority.split(","):
+        item = item.strip()
+        if item.upper().startswith("MESH:"):
+            rules.append((MESH_LINE, item[5:].strip()))
+        elif item:
+            if item.upper().startswith("TYPE:"):
+                item = item[5:].strip()
+            rules.append((TYPE_LINE, item.upper()))
+    return rules
+
+
+def line_bucket(rules, mesh: str, line_type: str) -> int:
+    """Index of the first rule matching the ;MESH: line or the ;TYPE: name in effect, len(rules) when none matches."""
+    for index, (kind, text) in enumerate(rules):
+        if kind == MESH_LINE:
+            if mesh is not None and text in mesh:
+                return index
+        elif text == line_type:
+            return index
+    return len(rules)
+
+
+def marker_lines(layer: str):
+    """Find the lines of a layer found in LINE_KINDS.
+
+    Only the comment lines are looked at, with str.find from one comment line to the next.
 
     Args:
-        line (str): Gcode line
+        layer (str): Gcode of a layer
 
-    Returns:
-        bool: True if the line is the start of a SKIRT section
+    Yields:
+        tuple: Kind, start and end (position of the newline) of the line
     """
-    return line.startswith(";TYPE:SKIRT")
-
-def is_begin_type_line(line: str) -> bool:
-    """Check if current line is the start of a type section.
+    newline = -1
+    while True:
+        start = newline + 1
+        end = layer.find("\n", start)
+        if end < 0:
+            end = len(layer)
+        if layer.startswith(";", start):
+            colon = layer.find(":", start, end)
+            kind = LINE_KINDS.get(layer[start:colon + 1]) if colon > 0 else None
+            if kind is not None:
+                yield kind, start, end
+        newline = layer.find("\n;", end)
+        if newline < 0:
+            return
+
+
+def has_layer_to_analyse(layer: str, last_layer: int) -> bool:
+    """Check if a layer contains a ;LAYER:X line with X <= last_layer.
 
     Args:
-        line (str): Gcode line
+        layer (str): Gcode of a layer
+        last_layer (int): Last layer number to reorder
 
     Returns:
-        bool: True if the line is the start of a type section
+        bool: True if the layer must be read line by line
     """
-    return line.startswith(";TYPE")
+    position = layer.find(";LAYER:")
+    while position >= 0:
+        if position == 0 or layer[position - 1] == "\n":
+            end = layer.find("\n", position)
+            if int(layer[position + 7:end if end >= 0 else len(layer)]) <= last_layer:
+                return True
+        position = layer.find(";LAYER:", position + 7)
+    return False
+
 
-def is_begin_mesh_line(line: str) -> bool:
-    """Check if current line is the start of a new MESH.
+def reorder_layer(layer: str, state: int, last_layer: int, rules, optimize: bool = False, absolute: bool = False, entry = None):
+    """Print the lines of a layer bucket after bucket, in the order of the priority table.
+
+    The layer is cut in one pass over its comment lines, at the lines which change the bucket and at the ;MESH: line
+    of every tab, then every part is copied as a block. A part which no longer follows the same part as in the
+    original order gets back the state in effect before it, see Block.moved.
 
     Args:
-        line (str): Gcode line
+        layer (str): Gcode of a layer
+        state (int): State of the copy at the start of the layer
+        last_layer (int): Last layer number to reorder
+        rules (list): Priority table, see priority_table
+        optimize (bool): Print the tabs in a short tour, see order_tabs
+        absolute (bool): Absolute extrusion (M82), the E value of the moved parts is set again with G92
+        entry (MoveState): State at the start of the layer, changed to the state at the end of the layer
 
     Returns:
-        bool: True if the line is the start of a new MESH
+        tuple: New Gcode of the layer (the same string when it is not modified), state at the end of the layer and
+        travel of the tabs (layer number, before, after) for every group of tabs reordered
     """
-    return line.startswith(";MESH:")
-
-def is_e_line(line: str) -> bool:
-    """Check if current line is a an Extruder line
+    other = len(rules)
+    type_rules = any(kind == TYPE_LINE for kind, text in rules)
+    parts = []
+    part_start = 0
+    part_state = state
+    mesh = None
+    line_type = None
+    for kind, start, end in marker_lines(layer):
+        if kind == LAYER_LINE:
+            state = SPOON if int(layer[start + 7:end]) <= last_layer else SKIP
+            mesh = line_type = None
+        elif state == SKIP:
+            continue
+        elif kind == MESH_LINE:
+            # The type of the new mesh is not known before its ;TYPE: line
+            mesh = layer[start:end]
+            line_type = None
+            state = line_bucket(rules, mesh, line_type)
+        elif kind == TYPE_LINE:
+            if not type_rules:
+                continue
+            line_type = layer[start + 6:end]
+            state = line_bucket(rules, mesh, line_type)
+        else:
+            mesh = line_type = None
+            state = other
+
+        if state != part_state or (kind == MESH_LINE and state == SPOON):
+            if start > part_start and part_state != SKIP:
+                parts.append((part_state, layer[part_start:start - 1]))
+            part_start = start
+            part_state = state
+
+    if state == SKIP:
+        return layer, state, []
+    parts.append((part_state, layer[part_start:]))
+
+    # State before every part in the original order and at the end of the layer
+    current = entry if entry is not None else MoveState()
+    states = []
+    buckets = [[] for _ in range(other + 1)]
+    for index, (part_state, text) in enumerate(parts):
+        states.append(current.copy())
+        current.update(text)
+        buckets[part_state].append(index)
+    states.append(current.copy())
+
+    travels = []
+    if optimize:
+        buckets[SPOON], travels = order_tabs(parts, buckets[SPOON], states)
+
+    texts = []
+    previous = None
+    # State in effect in the new order. A part ends in the same state as in the original order, except the type
+    # which is not restored for a part without extrusion.
+    current = states[0]
+    for index in itertools.chain.from_iterable(buckets):
+        text = parts[index][1]
+        keep_type = False
+        if previous != (index - 1 if index > 0 else None) or current.line_type != states[index].line_type:
+            block = Block(text, states[index], states[index + 1])
+            text = block.moved(current, absolute)
+            keep_type = not block.has_type and not block.extrudes
+        if keep_type:
+            line_type = current.line_type
+            current = states[index + 1].copy()
+            current.line_type = line_type
+        else:
+            current = states[index + 1]
+        texts.append(text)
+        previous = index
+    if previous != len(parts) - 1:
+        # The next layers go on from the position, feedrate and E value of the end of the original layer
+        restored = restore_lines(states[-1], current, states[-1].position(), absolute)
+        if restored:
+            texts.append("\n".join(restored) + "\n")
+    return ";BEGIN_OF_MODIFICATION\n" + "\n".join(texts) + ";END_OF_MODIFICATION\n", state, travels
+
+
+def move_values(line: str):
+    """Read the words of a G0 / G1 line.
 
     Args:
         line (str): Gcode line
 
     Returns:
-        bool: True if the line is an Extruder line segment
+        dict: Values of the X, Y, F and E words, None if the line is not a G0 / G1 move
     """
-    return "G1" in line  and "E" in line
+    if not (line.startswith("G0 ") or line.startswith("G1 ")):
+        return None
+    return command_values(line)
+
 
-def is_relative_extrusion_line(line: str) -> bool:
-    """Check if current line is a relative extrusion line
+def command_values(line: str):
+    """Read the X, Y, F and E words of a Gcode line.
 
     Args:
         line (str): Gcode line
 
     Returns:
-        bool: True if the line is a relative extrusion line
+        dict: Values of the words found
     """
-    return "M83" in line  
-
-def is_absolute_extrusion_line(line: str) -> bool:
-    """Check if current line is an absolute extrusion line
+    values = {}
+    for word in line.split(";", 1)[0].split()[1:]:
+        if word[0] in "XYFE":
+            try:
+                values[word[0]] = float(word[1:])
+            except ValueError:
+                pass
+    return values
+
+
+class MoveState:
+    """Position, feedrate, ;TYPE: and E value in effect at a point of the Gcode, None when unknown."""
+    def __init__(self, x = None, y = None, f = None, line_type = None, e = None) -> None:
+        self.x = x
+        self.y = y
+        self.f = f
+        self.line_type = line_type
+        self.e = e
+
+    def copy(self) -> "MoveState":
+        return MoveState(self.x, self.y, self.f, self.line_type, self.e)
+
+    def position(self):
+        return None if self.x is None or self.y is None else (self.x, self.y)
+
+    def update(self, text: str) -> None:
+        """Values in effect after text, read from its last lines."""
+        x = y = f = line_type = e = None
+        for line in reversed(text.split("\n")):
+            if line_type is None and line.startswith(";TYPE:"):
+                line_type = line[6:]
+            values = move_values(line)
+            if values:
+                if x is None:
+                    x = values.get("X")
+                if y is None:
+                    y = values.get("Y")
+                if f is None:
+                    f = values.get("F")
+                if e is None:
+                    e = values.get("E")
+            elif e is None and line.startswith("G92 "):
+                e = command_values(line).get("E")
+            if x is not None and y is not None and f is not None and line_type is not None and e is not None:
+                break
+        self.x = self.x if x is None else x
+        self.y = self.y if y is None else y
+        self.f = self.f if f is None else f
+        self.line_type = self.line_type if line_type is None else line_type
+        self.e = self.e if e is None else e
+
+
+def restore_lines(target: MoveState, current: MoveState, start, absolute: bool = False, feedrate: bool = True) -> list:
+    """Lines setting again the E value (absolute extrusion), a position and the feedrate of target.
 
     Args:
-        line (str): Gcode line
+        target (MoveState): State to restore
+        current (MoveState): State in effect
+        start (tuple): Position to restore, None to keep the position in effect
+        absolute (bool): Absolute extrusion, the E value is set with G92
+        feedrate (bool): Restore the feedrate
 
     Returns:
-        bool: True if the line is an absolute  extrusion line
+        list: Lines for the values which differ from current
     """
-    return "M82" in line  
-
-def is_relative_instruction_line(line: str) -> bool:
-    """Check if current line contain a M83 / G91 instruction
+    lines = []
+    if absolute and target.e is not None and target.e != current.e:
+        lines.append("G92 E{:.5f}".format(target.e))
+    feedrate = feedrate and target.f is not None and target.f != current.f
+    if start is not None and start != current.position():
+        lines.append("G0 {}X{:g} Y{:g}".format("F{:g} ".format(target.f) if feedrate else "", start[0], start[1]))
+    elif feedrate:
+        lines.append("G1 F{:g}".format(target.f))
+    return lines
+
+
+class Block:
+    """Lines of a part of a layer from its first line, with the state in effect before and after them and the point
+    where the nozzle starts the part."""
+    def __init__(self, text: str, entry: MoveState, exit_state: MoveState) -> None:
+        self.text = text
+        self.entry = entry
+        self.has_type = False
+        self.has_feedrate = False
+        self.extrudes = False
+        self.start = None
+        self.positioned = False
+        for line in text.split("\n"):
+            if line.startswith(";TYPE:"):
+                self.has_type = True
+                if self.start is not None:
+                    break
+                continue
+            values = move_values(line)
+            if values is None:
+                continue
+            if self.start is None:
+                self.has_feedrate = self.has_feedrate or "F" in values
+                if "X" in values or "Y" in values:
+                    # A travel to X Y gives the start, otherwise the part starts where the previous part ended
+                    self.positioned = "X" in values and "Y" in values and "E" not in values
+                    self.start = (values["X"], values["Y"]) if self.positioned else entry.position()
+            if "E" in values and ("X" in values or "Y" in values):
+                # First extrusion : printed with the type in effect
+                self.extrudes = True
+                break
+        if self.start is None:
+            # Without any move the following lines go on from the position where the previous part ended
+            self.start = entry.position()
+        self.end = exit_state.position()
+
+    def moved(self, current: MoveState, absolute: bool = False) -> str:
+        """Lines of the part printed after another part : the type, the E value in absolute extrusion, the start point
+        and the feedrate of the original order are restored after its first line, only when they differ from the
+        values in effect (current) in the new order. The type is only restored for a part with extrusions."""
+        prefix = []
+        if self.extrudes and not self.has_type and self.entry.line_type is not None and self.entry.line_type != current.line_type:
+            prefix.append(";TYPE:" + self.entry.line_type)
+        # A positioned part starts with its own travel
+        start = None if self.positioned else self.start
+        prefix.extend(restore_lines(self.entry, current, start, absolute, not self.has_feedrate))
+        if not prefix:
+            return self.text
+        first_end = self.text.find("\n")
+        if first_end < 0:
+            return self.text + "\n" + "\n".join(prefix)
+        return self.text[:first_end + 1] + "\n".join(prefix) + self.text[first_end:]
+
+
+# Maximum number of passes of the 2-opt on the tour of the tabs
+MAX_SWEEPS = 50
+
+
+def distance(a, b) -> float:
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def tour_length(blocks, order, origin) -> float:
+    """Travel from origin (None : from the start of the first tab) through the tabs in this order."""
+    length = 0.0
+    previous = origin if origin is not None else blocks[order[0]].start
+    for index in order:
+        length += distance(previous, blocks[index].start)
+        previous = blocks[index].end
+    return length
+
+
+def short_tour(blocks, origin):
+    """Order of the tabs : nearest neighbour from origin, improved by 2-opt.
+
+    The travel from a tab to the next one goes from the end of the first to the start of the second, so the
+    reversal of a part of the tour also changes the travel inside this part (asymmetric 2-opt).
 
     Args:
-        line (str): Gcode line
+        blocks (list): Block with a start and an end
+        origin (tuple): Position before the first tab, None to keep the first tab first
 
     Returns:
-        bool: True contain a M83 / G91 instruction
+        list: Index of the blocks in the print order
     """
-    return "G91" in line or "M83" in line
-
-def is_not_relative_instruction_line(line: str) -> bool:
-    """Check if current line contain a M82 / G90 instruction
+    count = len(blocks)
+    remaining = set(range(count))
+    order = []
+    position = origin
+    if origin is None:
+        order.append(0)
+        remaining.discard(0)
+        position = blocks[0].end
+    while remaining:
+        nearest = min(remaining, key = lambda index: distance(position, blocks[index].start))
+        order.append(nearest)
+        remaining.discard(nearest)
+        position = blocks[nearest].end
+
+    first = 0 if origin is not None else 1
+    improved = True
+    sweeps = 0
+    while improved and sweeps < MAX_SWEEPS:
+        improved = False
+        sweeps += 1
+        for i in range(first, count - 1):
+            before_end = origin if i == 0 else blocks[order[i - 1]].end
+            forward, backward = _tour_sums(blocks, order)
+            j = i + 1
+            while j < count:
+                old = distance(before_end, blocks[order[i]].start) + forward[j] - forward[i]
+                new = distance(before_end, blocks[order[j]].start) + backward[j] - backward[i]
+                if j + 1 < count:
+                    next_start = blocks[order[j + 1]].start
+                    old += distance(blocks[order[j]].end, next_start)
+                    new += distance(blocks[order[i]].end, next_start)
+                if new < old - 1e-6:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    forward, backward = _tour_sums(blocks, order)
+                    improved = True
+                j += 1
+    return order
+
+
+def _tour_sums(blocks, order):
+    """Prefix sums of the travel between two neighbours of the tour, forward and with the two tabs swapped."""
+    forward = [0.0]
+    backward = [0.0]
+    for k in range(len(order) - 1):
+        forward.append(forward[-1] + distance(blocks[order[k]].end, blocks[order[k + 1]].start))
+        backward.append(backward[-1] + distance(blocks[order[k + 1]].end, blocks[order[k]].start))
+    return forward, backward
+
+
+def order_tabs(parts, indices, states):
+    """Spoon parts of a layer with the tabs following each other printed in a short tour.
 
     Args:
-        line (str): Gcode line
+        parts (list): Bucket and text of the parts of the layer in the original order
+        indices (list): Index of the spoon parts in the original order
+        states (list): MoveState before every part and at the end of the layer
 
     Returns:
-        bool: True contain a M82 / G90 instruction
+        tuple: Index of the spoon parts in the print order and travel (layer number, before, after) of every group of
+        tabs reordered
     """
-    return "G90" in line or "M82" in line
-
-def is_reset_extruder_line(line: str) -> bool:
-    """Check if current line contain a G92 E0
+    order = []
+    travels = []
+    spoon_end = None
+    layer = None
+    run = []
+    run_origin = None
+    for index in indices:
+        text = parts[index][1]
+        if text.startswith(";MESH:"):
+            if not run:
+                run_origin = spoon_end
+            run.append((index, Block(text, states[index], states[index + 1])))
+        else:
+            _flush_tabs(run, run_origin, layer, order, travels)
+            run = []
+            if text.startswith(";LAYER:"):
+                layer = int(text.split("\n", 1)[0][7:])
+            order.append(index)
+        spoon_end = states[index + 1].position()
+    _flush_tabs(run, run_origin, layer, order, travels)
+    return order, travels
+
+
+def _flush_tabs(run, origin, layer, order, travels) -> None:
+    """Add the tabs of a run to the order, in a short tour when it is shorter and all the tabs can be moved."""
+    blocks = [block for index, block in run]
+    if len(run) < 2 or any(block.start is None or block.end is None for block in blocks):
+        order.extend(index for index, block in run)
+        return
+    tour = short_tour(blocks, origin)
+    before = tour_length(blocks, list(range(len(blocks))), origin)
+    after = tour_length(blocks, tour, origin)
+    if after >= before - 1e-3:
+        order.extend(index for index, block in run)
+        return
+    travels.append((layer, before, after))
+    order.extend(run[position][0] for position in tour)
+
+
+def travel_report(travels):
+    """Lines of the travel saved for every group of tabs reordered.
 
     Args:
-        line (str): Gcode line
+        travels (list): Layer number, travel before and after, from reorder_layer
 
     Returns:
-        bool: True contain a G92 E0 instruction
+        list: One text per group
     """
-    return "G92" in line and "E0" in line
+    return ["SpoonOrder layer {} : tab travel {:.1f} mm -> {:.1f} mm, {:.1f} mm saved".format(layer, before, after, before - after)
+            for layer, before, after in travels]
+
 
-    
 class SpoonOrder(Script):
     def __init__(self):
         super().__init__()
@@ -159,7 +564,21 @@ class SpoonOrder(Script):
                     "description": "Spoon Tab identificator",
                     "type": "str",
                     "default_value": "SpoonTab"
-                }               
+                },
+                "priority":
+                {
+                    "label": "Print Order After Tabs",
+                    "description": "Comma separated list of the lines printed after the tabs, in this order, before the other lines : line types (SKIRT, WALL-OUTER, WALL-INNER...) or MESH: followed by a part of the object names",
+                    "type": "str",
+                    "default_value": ""
+                },
+                "optimize":
+                {
+                    "label": "Optimize Tab Order",
+                    "description": "Print the tabs in the order giving the shortest travel between them",
+                    "type": "bool",
+                    "default_value": true
+                }
             }
         }"""
 
@@ -169,98 +588,225 @@ class SpoonOrder(Script):
         LayerAnalyse -= 1
         Logger.log('d', "LayerAnalyse : {}".format(LayerAnalyse))
         Marker = str(self.getSettingValueByKey("marker"))           
+        Optimize = bool(self.getSettingValueByKey("optimize"))
+        Rules = priority_table(Marker, str(self.getSettingValueByKey("priority")))
         
         extrud = Application.getInstance().getGlobalContainerStack().extruderList
         relative_extrusion = bool(extrud[0].getProperty("relative_extrusion", "value"))
-        
-        if not relative_extrusion:
-            Message("Must be in mode Relative extrusion", title = catalog.i18nc("@info:title", "Post Processing Spoon Order")).show()
-            return data
             
-        idl=0
-
-        currentlayer=0
-        CurrentE=0
-        ResetE=0
-        RelativeExtruder = False
-        SaveE = -1
-        
-        for layer in data:
-            layer_index = data.index(layer)
-            # Logger.log('d', "Layer_index founded : {}".format(layer_index))
-            lines_spoon = []
-            lines_not_spoon = []
-            
-            lines = layer.split("\n")
-            for line in lines:                  
-                # line_index = lines.index(line)
-                # Check if the line start with the Comment Char
-                if is_relative_instruction_line(line) and line[0] != ";" :
-                    relative_extrusion = True
-                    # Logger.log('d', "Relative_extrusion founded : {}".format(line))
-                
-                # Check if the line start with the Comment Char                
-                if is_not_relative_instruction_line(line) and line[0] != ";" :
-                    relative_extrusion = False
-                    
-                if is_reset_extruder_line(line) and line[0] != ";" :
-                    # Logger.log('d', "Reset_extruder :" + str(CurrentE))
-                    CurrentE = 0
-                    SaveE = 0
-                    
-                if is_relative_extrusion_line(line):
-                    RelativeExtruder = True
+        # One pass : a layer without line to move is kept as it is (same string), the parts of the other layers are joined once
+        state = SKIP
+        modified = 0
+        # Position, feedrate and E value at the start of the first layer, read in the start G-code
+        machine = MoveState()
+        start_gcode = True
+        for layer_index, layer in enumerate(data):
+            if state == SKIP and not has_layer_to_analyse(layer, LayerAnalyse):
+                start_gcode = start_gcode and ";LAYER:" not in layer
+                if start_gcode:
+                    machine.update(layer)
+                continue
+            start_gcode = False
+            result, state, travels = reorder_layer(layer, state, LayerAnalyse, Rules, Optimize, not relative_extrusion, machine)
+            if result is not layer:
+                data[layer_index] = result
+                modified += 1
+            for line in travel_report(travels):
+                Logger.log('d', line)
                 
-                if is_absolute_extrusion_line(line):
-                    RelativeExtruder = False
-                    
-                if line.startswith(";LAYER_COUNT:"):
-                    # Logger.log("w", "found LAYER_COUNT %s", line[13:])
-                    layercount=int(line[13:])                    
-
-                if idl >= 1 and line.startswith(";TIME_ELAPSED:"):
-                    idl = 1
-                                             
-                # ;LAYER:X
-                if is_begin_layer_line(line):  
-                    Logger.log('d', "layer_lines : {}".format(line))
-                    currentlayer=int(line[7:])
-                    if currentlayer <= LayerAnalyse :
-                        # Logger.log('d', "CurrentLayer : {} / {}".format(currentlayer,LayerAnalyse))
-                        idl=2
-                    else:
-                        idl=0
-                        
-                if idl >= 1 and is_begin_mesh_line(line) :               
-                    if Marker in line :
-                        # Logger.log('d', "Marker mesh : {}".format(line))
-                        idl = 2
-                    else:
-                        # Logger.log('d', "Not Marker mesh : {}".format(line))
-                        idl = 1
-                
-                #---------------------------------------
-                # Add the Spoon line to the spoon path 
-                #---------------------------------------                
-                if idl == 2 :
-                    lines_spoon.append(line)
-                
-                if idl == 1 :
-                    lines_not_spoon.append(line)
-            
-            # Logger.log('d', "idl : {}".format(idl))
-            if idl>0 :            
-                result = ";BEGIN_OF_MODIFICATION"
-                for line in lines_spoon:
-                    result += "\n"
-                    result += line
-                for line in lines_not_spoon:
-                    result += "\n"
-                    result += line                    
-                result += ";END_OF_MODIFICATION\n"          
-            else:
-                result = "\n".join(lines)
-            
-            data[layer_index] = result
-
+        Logger.log('d', "SpoonOrder layers modified : {}".format(modified))
         return data
+
+
+#------------------------------------------------------------------------------------------------------------------------------------
+# Command line tool
+#------------------------------------------------------------------------------------------------------------------------------------
+
+# Size of the blocks copied from the input file
+COPY_BLOCK = 1 << 20
+# Size of the part of the memory-mapped file searched before releasing the pages
+SCAN_WINDOW = 16 << 20
+
+
+def layer_offsets(view):
+    """Find the ;LAYER: lines of a G-code file.
+
+    The file is searched by windows of SCAN_WINDOW bytes, the pages already searched are released so the memory used
+    stays the same whatever the size of the file.
+
+    Args:
+        view (mmap.mmap): Content of the file
+
+    Yields:
+        int: Position of every ;LAYER: line
+    """
+    if view[:7] == b";LAYER:":
+        yield 0
+    needle = b"\n;LAYER:"
+    size = len(view)
+    start = 0
+    released = 0
+    while start < size:
+        end = min(start + SCAN_WINDOW, size)
+        position = view.find(needle, start, end)
+        if position >= 0:
+            yield position + 1
+            start = position + len(needle)
+        elif end == size:
+            return
+        else:
+            # The needle can start at the end of this window
+            start = end - len(needle) + 1
+        released = release_pages(view, released, start - SCAN_WINDOW)
+
+
+def release_pages(view, released: int, position: int) -> int:
+    """Release the pages of the memory-mapped file between released and position.
+
+    Returns:
+        int: New position of the released pages
+    """
+    position = position // mmap.PAGESIZE * mmap.PAGESIZE
+    if position <= released or not hasattr(mmap, "MADV_DONTNEED"):
+        return released
+    view.madvise(mmap.MADV_DONTNEED, released, position - released)
+    return position
+
+
+def layer_number(view, offset: int) -> int:
+    """Number X of the ;LAYER:X line at offset."""
+    end = view.find(b"\n", offset)
+    return int(view[offset + 7:end if end >= 0 else len(view)])
+
+
+def extrusion_mode(text: str):
+    """Find the extrusion mode set by the last M82 / M83 command of a G-code.
+
+    Args:
+        text (str): Gcode
+
+    Returns:
+        str: "absolute", "relative" or None without M82 / M83 command
+    """
+    mode = None
+    for line in text.split("\n"):
+        command = line.split(";", 1)[0].strip()
+        if command.startswith("M82"):
+            mode = "absolute"
+        elif command.startswith("M83"):
+            mode = "relative"
+    return mode
+
+
+def copy_range(source, target, start: int, end: int) -> None:
+    """Copy the bytes [start, end) of the file source to target by blocks."""
+    source.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        block = source.read(min(COPY_BLOCK, remaining))
+        if not block:
+            break
+        target.write(block)
+        remaining -= len(block)
+
+
+def reorder_file(input_path: str, output_path: str, layer: int = 1, marker: str = "SpoonTab", priority: str = "", optimize: bool = True):
+    """Write input_path to output_path with the spoon tab lines moved before the other lines of the first layers.
+
+    The layers are the parts of the file between two ;LAYER: lines, the part before the first ;LAYER: line is the
+    start G-code, which gives the extrusion mode (M82 / M83). The lines are moved like the post processing script run
+    in Cura.
+
+    Args:
+        input_path (str): G-code file
+        output_path (str): G-code file written, must not be input_path
+        layer (int): Number of layers to analyse
+        marker (str): Text of the ;MESH: line of the spoon tabs
+        priority (str): Buckets printed after the tabs, see priority_table
+        optimize (bool): Print the tabs in a short tour
+
+    Returns:
+        tuple: Number of layers modified and travel of the tabs (layer number, before, after) of the groups reordered
+    """
+    last_layer = layer - 1
+    modified = 0
+    travels = []
+    with open(input_path, "rb") as source, open(output_path, "wb") as target:
+        size = os.fstat(source.fileno()).st_size
+        if size == 0:
+            return 0, travels
+        with mmap.mmap(source.fileno(), 0, access = mmap.ACCESS_READ) as view:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                view.madvise(mmap.MADV_SEQUENTIAL)
+            offsets = layer_offsets(view)
+            first = next(offsets, size)
+            rules = priority_table(marker, priority)
+            machine = MoveState()
+            absolute = False
+            if first < size:
+                start_gcode = view[:first].decode("utf-8", "surrogateescape")
+                absolute = extrusion_mode(start_gcode) == "absolute"
+                machine.update(start_gcode)
+
+            state = SKIP
+            copied = 0
+            start = 0
+            for end in itertools.chain((first, ), offsets, (size, )):
+                if end <= start:
+                    continue
+                # Only a layer after a copied line or a ;LAYER:X line with X <= last_layer can be modified
+                if state != SKIP or (view[start:start + 7] == b";LAYER:" and layer_number(view, start) <= last_layer):
+                    text = view[start:end].decode("utf-8", "surrogateescape")
+                    result, state, layer_travels = reorder_layer(text, state, last_layer, rules, optimize, absolute, machine)
+                    travels += layer_travels
+                    if result is not text:
+                        copy_range(source, target, copied, start)
+                        target.write(result.encode("utf-8", "surrogateescape"))
+                        copied = end
+                        modified += 1
+                start = end
+            copy_range(source, target, copied, size)
+    return modified, travels
+
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(description = "Move the spoon tab lines before the other lines of the first layers of a G-code file")
+    parser.add_argument("input", help = "G-code file")
+    parser.add_argument("-o", "--output", help = "G-code file written (default : input_SpoonOrder.gcode)")
+    parser.add_argument("--in-place", action = "store_true", help = "Replace the input file")
+    parser.add_argument("--layer", type = int, default = 1, help = "Number of layers to analyse (default 1)")
+    parser.add_argument("--marker", default = "SpoonTab", help = "Spoon tab identificator (default SpoonTab)")
+    parser.add_argument("--priority", default = "", help = "Comma separated line types or MESH:text printed after the tabs, in this order (example SKIRT,WALL-OUTER)")
+    parser.add_argument("--no-optimize", action = "store_true", help = "Keep the order of the tabs given by the slicer")
+    args = parser.parse_args(argv)
+
+    if args.in_place:
+        output = args.input + ".tmp"
+    elif args.output:
+        output = args.output
+    else:
+        output = os.path.splitext(args.input)[0] + "_SpoonOrder.gcode"
+    if not os.path.isfile(args.input):
+        parser.error("{} is not a file".format(args.input))
+    if os.path.abspath(output) == os.path.abspath(args.input):
+        parser.error("the output file must be different from the input file, use --in-place")
+
+    try:
+        modified, travels = reorder_file(args.input, output, args.layer, args.marker, args.priority, not args.no_optimize)
+    except (OSError, ValueError) as error:
+        if os.path.exists(output):
+            os.remove(output)
+        print("SpoonOrder : {}".format(error), file = sys.stderr)
+        return 1
+
+    if args.in_place:
+        os.replace(output, args.input)
+        output = args.input
+    for line in travel_report(travels):
+        print(line)
+    print("{} : {} layers modified".format(output, modified))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())